@@ -1,28 +1,126 @@
 import asyncio
+import hashlib
 import json
 import logging
 import os
 import re
-from typing import Any, Dict, List, Literal, Optional, Union
-
-from fastapi import FastAPI
+import secrets
+import threading
+import time
+from datetime import timedelta
+from functools import lru_cache
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Literal, Optional, Set, Tuple, TypeVar, Union
+
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-try:
-    import google.generativeai as genai
-    from google.generativeai.types import HarmBlockThreshold, HarmCategory
-except Exception:  # pragma: no cover - import failure handled at runtime
-    genai = None
-    HarmBlockThreshold = None
-    HarmCategory = None
+from chat_stream import TurnEventStream, current_turn_events, emit_turn_event, streaming_turn
+from department_routing import DepartmentRouter, load_keyword_table
+from intents import IntentEngine, IntentRule
+from json_stream import StreamingJsonObjectParser
+from language_packs import LanguagePack, load_language_packs
+from llm_hedging import HedgePolicy
+from log_pipeline import configure_logging, log_context, parse_sample_rates
+from llm_provider import gemini_safety_settings, genai_import_error, load_genai, warm_connection
+from llm_executor import BlockingCallExecutor
+from llm_scheduler import CircuitBreaker, LLMScheduler, LLMUnavailable
+from metrics import Family, MetricsRegistry
+from prompt_budget import PromptBudget, estimate_tokens, fold_into_summary, render_summary
+from response_cache import ResponseCache, make_cache_key
+from session_locks import SessionBusyError, SessionLockTable
+from session_model import COMPLAINT_FIELDS, ROLE_BOT, ROLE_USER, ChatSession, HistoryEntry, HistoryRing
+from session_store import SessionStore, create_session_store
+from spelling import SpellingCorrector, load_vocabulary, load_word_list
+from tracing import Tracer, add_span, annotate, chrome_trace, span
+from warmup import StartupWarmup
+
+
+# Log records are queued and written as JSON lines (LOG_FORMAT=text for the
+# plain layout) by a background thread, in batches; a full queue of
+# LOG_QUEUE_SIZE records drops new ones instead of blocking a turn.
+# LOG_SAMPLE_RATES keeps a share of INFO records per category, e.g.
+# "turn=0.1,session=0"; repeats of the same exception beyond
+# LOG_EXCEPTION_BURST per LOG_EXCEPTION_WINDOW_SECONDS are counted, not written.
+log_pipeline = configure_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format=os.getenv("LOG_FORMAT", "json"),
+    queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("LOG_BATCH_SIZE", "256")),
+    sample_rates=parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "")),
+    exception_window_seconds=float(os.getenv("LOG_EXCEPTION_WINDOW_SECONDS", "60")),
+    exception_burst=int(os.getenv("LOG_EXCEPTION_BURST", "3")),
+)
+logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
 
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "10000"))
+SESSION_REAP_INTERVAL_SECONDS = float(os.getenv("SESSION_REAP_INTERVAL_SECONDS", "60"))
+SESSION_MAX_PENDING_TURNS = int(os.getenv("SESSION_MAX_PENDING_TURNS", "4"))
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_DB_PATH = os.getenv(
+    "SESSION_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions.db")
+)
+# sqlite backend: how long a call waits for another worker's write, and the
+# threads that make those calls (never the event loop)
+SESSION_DB_BUSY_TIMEOUT_SECONDS = float(os.getenv("SESSION_DB_BUSY_TIMEOUT_SECONDS", "5"))
+SESSION_STORE_WORKERS = int(os.getenv("SESSION_STORE_WORKERS", "2"))
+# snapshot backend: snapshot and change log directory, how often changes are
+# written (the most a crash can lose) and log size that triggers a new snapshot
+SESSION_SNAPSHOT_DIR = os.getenv(
+    "SESSION_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "session_snapshots")
+)
+SESSION_FLUSH_INTERVAL_SECONDS = float(os.getenv("SESSION_FLUSH_INTERVAL_SECONDS", "1.0"))
+SESSION_SNAPSHOT_LOG_BYTES = int(os.getenv("SESSION_SNAPSHOT_LOG_BYTES", str(16 * 1024 * 1024)))
+
+# Build the Gemini models, open the provider connection and run the local
+# pipeline once at startup, before the first chat needs them.
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "1") == "1"
+GEMINI_WARM_CONNECTION = os.getenv("GEMINI_WARM_CONNECTION", "1") == "1"
+
+
+async def _reap_sessions_forever() -> None:
+    while True:
+        await asyncio.sleep(SESSION_REAP_INTERVAL_SECONDS)
+        try:
+            purged = await _store_call(sessions.purge_expired)
+            if purged:
+                logger.info("Expired %s idle sessions (%s)", purged, await _store_call(sessions.stats))
+        except Exception:
+            logger.exception("Session reaper failed")
 
-app = FastAPI(title="Smart Grievance Chatbot")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    reaper = asyncio.create_task(_reap_sessions_forever())
+    if STARTUP_WARMUP:
+        # in the background: the server accepts requests meanwhile, /ready says when it is done
+        warming = asyncio.ensure_future(asyncio.to_thread(startup_warmup.run))
+    else:
+        startup_warmup.skip()
+        warming = None
+    try:
+        yield
+    finally:
+        if warming is not None:
+            warming.cancel()
+        reaper.cancel()
+        try:
+            await reaper
+        except asyncio.CancelledError:
+            pass
+        llm_executor.shutdown()
+        store_executor.shutdown()
+        sessions.close()
+
+
+app = FastAPI(title="Smart Grievance Chatbot", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -58,12 +156,48 @@ class BotResponse(BaseModel):
     complaint_ready: Optional[bool] = None
 
 
-sessions: Dict[str, Dict[str, Any]] = {}
+sessions: SessionStore = create_session_store(
+    SESSION_BACKEND,
+    ttl_seconds=SESSION_TTL_SECONDS,
+    max_sessions=SESSION_MAX_COUNT,
+    db_path=SESSION_DB_PATH,
+    snapshot_dir=SESSION_SNAPSHOT_DIR,
+    flush_interval=SESSION_FLUSH_INTERVAL_SECONDS,
+    snapshot_log_bytes=SESSION_SNAPSHOT_LOG_BYTES,
+    busy_timeout=SESSION_DB_BUSY_TIMEOUT_SECONDS,
+)
+store_executor = BlockingCallExecutor(max_workers=max(SESSION_STORE_WORKERS, 1), thread_name_prefix="session-store")
+
+session_locks = SessionLockTable(max_pending=SESSION_MAX_PENDING_TURNS)
+
+# Sessions loaded during the current turn, written back to the store once when it
+# ends; None marks a session the turn found missing or deleted.
+_turn_sessions: ContextVar[Optional[Dict[str, Optional[ChatSession]]]] = ContextVar(
+    "turn_sessions", default=None
+)
 
-DATA_KEYS = ["department", "description", "address", "timing", "specific_details", "title"]
+DATA_KEYS = list(COMPLAINT_FIELDS)
 DEPARTMENT_OPTIONS = ["Electricity", "Water", "Roads", "Sanitation", "Parks", "Other"]
 REQUIRED_FIELDS = ["department", "description", "address", "timing", "specific_details"]
 
+DEPARTMENT_KEYWORDS = {
+    "Electricity": ["electric", "power", "street light", "outage"],
+    "Water": ["water", "sewage", "leak", "drain"],
+    "Roads": ["road", "street", "pothole", "traffic signal"],
+    "Sanitation": ["sanitation", "garbage", "waste", "trash", "cleaning"],
+    "Parks": ["park", "playground", "tree", "garden"],
+}
+DEPARTMENT_KEYWORDS_FILE = os.getenv(
+    "DEPARTMENT_KEYWORDS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "department_keywords.json"),
+)
+GRIEVANCE_CITY = os.getenv("GRIEVANCE_CITY")
+
+department_keywords = load_keyword_table(
+    DEPARTMENT_KEYWORDS, DEPARTMENT_KEYWORDS_FILE, GRIEVANCE_CITY, DEPARTMENT_OPTIONS
+)
+department_router = DepartmentRouter(department_keywords)
+
 SPELLING_CORRECTIONS = {
     "electisity": "electricity",
     "watter": "water",
@@ -72,6 +206,15 @@ SPELLING_CORRECTIONS = {
     "deaprtment": "department",
     "folllow": "follow",
     "follup": "follow up",
+    # intent words are never correction targets, so their common typos are listed
+    "cancle": "cancel",
+    "cancell": "cancel",
+    "staus": "status",
+    "stauts": "status",
+    "restrat": "restart",
+    "sumbit": "submit",
+    "submitt": "submit",
+    "confrim": "confirm",
 }
 
 FIELD_QUESTIONS = {
@@ -82,24 +225,322 @@ FIELD_QUESTIONS = {
     "specific_details": "Please share one more specific detail (severity, size, frequency, or impact).",
 }
 
-STATUS_PATTERNS = {
-    "greeting": [r"\b(hi|hello|hey)\b"],
-    "farewell": [r"\b(bye|goodbye|thanks|thank you)\b"],
-    "status_check": [r"\b(status|update|tracking|track)\b"],
-    "restart": [r"\b(start over|restart|reset|new complaint)\b"],
-    "help": [r"\b(help|assist|support)\b"],
-    "cancel": [r"\b(cancel|stop|forget it|drop this)\b"],
+STATUS_PHRASES = {
+    "greeting": ["hi", "hello", "hey"],
+    "farewell": ["bye", "goodbye", "thanks", "thank you"],
+    "status_check": ["status", "update", "tracking", "track"],
+    "restart": ["start over", "restart", "reset", "new complaint"],
+    "help": ["help", "assist", "support"],
+    "cancel": ["cancel", "stop", "forget it", "drop this"],
 }
 
-YES_PATTERN = re.compile(
-    r"\b(yes|yup|yeah|ok|okay|confirm|submit|proceed|correct|right|go ahead)\b"
+YES_WORDS = ["yes", "yup", "yeah", "ok", "okay", "confirm", "submit", "proceed", "correct", "right", "go ahead"]
+NO_WORDS = ["no", "nope", "wrong", "incorrect", "change", "edit", "not correct"]
+
+CONFIRM_YES_EXACT = ["yes", "yes submit", "y", "ok", "okay", "confirm", "submit", "proceed", "go ahead", "correct"]
+CONFIRM_NO_EXACT = ["no", "nope", "wrong", "incorrect", "change", "edit", "not correct", "no change this"]
+
+
+def _leading_word(words: List[str]) -> Dict[str, List[str]]:
+    """A leading word followed only by a comma or the end of the message ("yes", "yes, ...")."""
+    return {
+        "exact": words,
+        "prefixes": [f"{word}{separator}" for word in words for separator in (",", " ,")],
+    }
+
+
+# Ordered by priority; recognize_intent returns the first rule that matches.
+INTENT_RULES = [
+    *(IntentRule(intent, phrases) for intent, phrases in STATUS_PHRASES.items()),
+    IntentRule("confirmation_yes", exact=CONFIRM_YES_EXACT),
+    IntentRule("confirmation_yes", **_leading_word(["yes", "yup", "yeah"])),
+    IntentRule("confirmation_yes", ["yes submit", "yes,submit", "yes, submit", "confirm and submit"]),
+    IntentRule("confirmation_no", exact=CONFIRM_NO_EXACT),
+    IntentRule("confirmation_no", **_leading_word(["no", "nope"])),
+    IntentRule("confirmation_no", ["change details"]),
+    IntentRule("confirmation_yes", YES_WORDS, weak=True, max_words=4),
+    IntentRule("confirmation_no", NO_WORDS, weak=True, max_words=4),
+]
+
+intent_engine = IntentEngine(INTENT_RULES)
+
+# Civic terms, everyday words and GRIEVANCE_CITY place names the spelling
+# corrector maps unknown words onto; department keywords are always included.
+# Words of SPELLING_KNOWN_WORDS_FILE are English typed correctly and kept as is.
+SPELLING_VOCABULARY_FILE = os.getenv(
+    "SPELLING_VOCABULARY_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "spelling_vocabulary.json"),
+)
+SPELLING_KNOWN_WORDS_FILE = os.getenv(
+    "SPELLING_KNOWN_WORDS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "english_words.txt"),
+)
+_spelling_words, _protected_words = load_vocabulary(
+    SPELLING_VOCABULARY_FILE,
+    GRIEVANCE_CITY,
+    [
+        *DEPARTMENT_OPTIONS,
+        *(phrase for phrases in department_keywords.values() for phrase in phrases),
+    ],
+)
+# Intent runs on the corrected text, so a one-word intent phrase or yes/no
+# word is never suggested: "collect" must not become "correct", a confirmation.
+_protected_words += [
+    phrase
+    for phrase in [*(phrase for phrases in STATUS_PHRASES.values() for phrase in phrases), *YES_WORDS, *NO_WORDS]
+    if " " not in phrase
+]
+_known_words = load_word_list(SPELLING_KNOWN_WORDS_FILE)
+spelling_corrector = SpellingCorrector(
+    _spelling_words,
+    protected=_protected_words,
+    corrections=SPELLING_CORRECTIONS,
+    max_edit_distance=int(os.getenv("SPELLING_MAX_EDIT_DISTANCE", "2")),
+    cache_size=int(os.getenv("SPELLING_CACHE_SIZE", "8192")),
+    known=_known_words,
+)
+
+# Per-language intent, confirmation, department, timing and question
+# resources; a turn uses the pack for its ``language`` code, English when
+# there is none.
+LANGUAGE_PACKS_DIR = os.getenv(
+    "LANGUAGE_PACKS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "language_packs"),
+)
+english_pack = LanguagePack("en", "English", intent_engine, department_router, questions=FIELD_QUESTIONS)
+language_packs = load_language_packs(
+    LANGUAGE_PACKS_DIR,
+    english_pack,
+    {
+        "intents": STATUS_PHRASES,
+        "confirm_yes": CONFIRM_YES_EXACT,
+        "confirm_no": CONFIRM_NO_EXACT,
+        "yes_words": YES_WORDS,
+        "no_words": NO_WORDS,
+        "departments": department_keywords,
+    },
+    DEPARTMENT_OPTIONS,
 )
-NO_PATTERN = re.compile(r"\b(no|nope|wrong|incorrect|change|edit|not correct)\b")
+_turn_language: ContextVar[LanguagePack] = ContextVar("turn_language", default=english_pack)
+language_turn_counts: Dict[str, int] = {}
 
 INVALID_VALUES = {"", "unknown", "none", "null", "n/a", "na", "not provided"}
 
-_gemini_model = None
+ADDRESS_PATTERN = re.compile(
+    r"\b(?:at|in|near|on|around|beside|behind|opposite)\s+([a-z0-9][a-z0-9 ,/#\-.]{5,})",
+    flags=re.IGNORECASE,
+)
+ADDRESS_HINT_PATTERN = re.compile(
+    r"\d|\b(?:road|rd|street|lane|gali|sector|block|colony|nagar|marg|chowk|market|"
+    r"phase|society|apartment|house|flat|plot|landmark|village)\b"
+)
+TIMING_PATTERN = re.compile(
+    r"\b(for\s+\d+\s+(?:hour|hours|day|days|week|weeks|month|months)|since\s+[a-z0-9 ,:-]+|today|yesterday|last\s+week)\b",
+    flags=re.IGNORECASE,
+)
+
+# Minimum confidence for the local extractor to answer an awaited field without Gemini.
+RULES_CONFIDENCE_THRESHOLD = float(os.getenv("RULES_CONFIDENCE_THRESHOLD", "0.8"))
+
+extraction_tier_counts: Dict[str, int] = {"rules": 0, "llm_field": 0, "llm": 0, "fallback": 0}
+
+# Small prompts used instead of the full extraction prompt when the user is
+# answering one awaited field: (instruction, output schema, max output tokens).
+FIELD_PROMPTS: Dict[str, Tuple[str, str, int]] = {
+    "department": (
+        f"Pick the department responsible, from {json.dumps(DEPARTMENT_OPTIONS)}, or null if unclear.",
+        '{"department": "... or null"}',
+        24,
+    ),
+    "address": (
+        "Rewrite the location as a clean address (house or landmark, street, area, city). "
+        "Keep names as given; null if the reply has no location.",
+        '{"address": "... or null"}',
+        64,
+    ),
+    "timing": (
+        "Rewrite when the issue started or how long it has lasted as a short phrase, "
+        "e.g. \"since 3 days\" or \"yesterday morning\"; null if not stated.",
+        '{"timing": "... or null"}',
+        32,
+    ),
+    "specific_details": (
+        "State the specific details or impact of the issue in one short factual sentence; null if none.",
+        '{"specific_details": "... or null"}',
+        80,
+    ),
+}
+
+# Static parts of the prompts, built once and sent as the model's system
+# instruction; each turn only sends the conversation-specific suffix.
+EXTRACTION_SYSTEM_PROMPT = f"""You are an expert municipal complaint intake assistant.
+
+Goal:
+Extract and refine complaint details from the ongoing conversation.
+Ask focused follow-up questions until ALL required fields are collected.
+
+Allowed department values only: {json.dumps(DEPARTMENT_OPTIONS)}
+Required fields (must be non-empty): {json.dumps(REQUIRED_FIELDS)}
+All fields: {json.dumps(DATA_KEYS)}
+
+Each message gives the current complaint data JSON, the conversation so far,
+the latest user message and awaiting_field. If awaiting_field is set,
+prioritize filling it first.
+
+Return ONLY valid JSON with this schema, keys in this order:
+{{
+  "assistant_ack": "one short polite sentence acknowledging user input",
+  "extracted_data": {{
+    "department": "... or null",
+    "description": "... or null",
+    "address": "... or null",
+    "timing": "... or null",
+    "specific_details": "... or null",
+    "title": "... or null"
+  }},
+  "next_question": "single direct question to gather next missing field, or 'confirmation_ready'",
+  "missing_fields": ["department", "description"]
+}}
+
+Rules:
+- Department must be one of allowed values; else set null.
+- If user updates/corrects old information, overwrite with latest info.
+- Keep description concise and factual.
+- next_question must target only one field at a time.
+- If all required fields are present, set next_question to "confirmation_ready".
+- Never include markdown or extra text outside JSON.
+"""
+
+FIELD_SYSTEM_PROMPTS: Dict[str, str] = {
+    field: (
+        f"Municipal complaint intake. The citizen was asked for the {field.replace('_', ' ')} of their complaint.\n"
+        f"{instruction}\n"
+        f"Return ONLY JSON: {schema}"
+    )
+    for field, (instruction, schema, _) in FIELD_PROMPTS.items()
+}
+
 _gemini_error = None
+_gemini_configured = False
+# held while a model is built, so warm-up and a background build do not both
+# build it; request paths never wait on it
+_gemini_lock = threading.Lock()
+# system instruction -> (model, monotonic time after which it must be rebuilt)
+_gemini_models: Dict[Optional[str], Tuple[Any, float]] = {}
+# system instructions whose model is being built on llm_executor for a request
+_gemini_builds: Dict[Optional[str], "asyncio.Future[Any]"] = {}
+_gemini_model_factory: Optional[Callable[[str, Optional[str]], Any]] = None
+
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+# Put static system instructions in provider-side cached content. Gemini only
+# caches contexts above a minimum size; below it the instruction is sent with
+# each request instead.
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "0") == "1"
+GEMINI_CONTEXT_CACHE_TTL_SECONDS = float(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+
+# Stream Gemini output and stop reading once these keys have been parsed.
+GEMINI_STREAMING = os.getenv("GEMINI_STREAMING", "1") == "1"
+GEMINI_STREAM_STOP_KEYS = ("extracted_data", "next_question")
+
+# Admission control for Gemini calls; rejected or timed-out turns use local extraction.
+llm_scheduler = LLMScheduler(
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.getenv("LLM_MAX_QUEUE", "32")),
+    deadline_seconds=float(os.getenv("LLM_DEADLINE_SECONDS", "12")),
+    max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", "3")),
+    backoff_base_seconds=float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.25")),
+    backoff_max_seconds=float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "2")),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+        reset_seconds=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+    ),
+)
+
+# Use the client's asyncio API when available; otherwise blocking calls run on
+# llm_executor, sized by LLM_EXECUTOR_WORKERS rather than the default pool.
+GEMINI_ASYNC = os.getenv("GEMINI_ASYNC", "1") == "1"
+llm_executor = BlockingCallExecutor(
+    max_workers=int(os.getenv("LLM_EXECUTOR_WORKERS", str(llm_scheduler.max_concurrency)))
+)
+
+# History older than PROMPT_HISTORY_WINDOW entries is folded into a rolling
+# summary; each prompt is then held to about PROMPT_TOKEN_BUDGET tokens.
+# The budget covers the per-turn part of the prompt, not the static system instruction.
+PROMPT_HISTORY_WINDOW = int(os.getenv("PROMPT_HISTORY_WINDOW", "6"))
+prompt_budget = PromptBudget(max_tokens=int(os.getenv("PROMPT_TOKEN_BUDGET", "800")))
+
+# LLM_HEDGE_MODE: "off", "request" (send a second request) or "local" (answer
+# from local extraction and merge the late LLM result on the next turn) once
+# the LLM_HEDGE_PERCENTILE latency, capped at LLM_LATENCY_SLO_SECONDS, passes.
+hedge_policy = HedgePolicy(
+    mode=os.getenv("LLM_HEDGE_MODE", "off"),
+    percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+    slo_seconds=float(os.getenv("LLM_LATENCY_SLO_SECONDS", "4")),
+    min_delay_seconds=float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0.3")),
+)
+_late_merges: Set["asyncio.Task[None]"] = set()
+
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "600"))
+
+llm_cache: ResponseCache[Dict[str, Any]] = ResponseCache(
+    max_entries=LLM_CACHE_MAX_ENTRIES, ttl_seconds=LLM_CACHE_TTL_SECONDS
+)
+
+# Served at /metrics. Each worker process reports its own values.
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    "chat_stage_seconds", "Time spent in each chat pipeline stage", labelnames=("stage",)
+)
+chat_turns = metrics.counter("chat_turns_total", "Chat turns by detected intent and action", ("intent", "action"))
+history_folded = metrics.counter(
+    "chat_history_folded_total", "History entries folded into the rolling prompt summary"
+)
+llm_attempts = metrics.counter("llm_attempts_total", "Gemini attempts by outcome", ("outcome",))
+llm_unavailable = metrics.counter(
+    "llm_unavailable_total", "Gemini requests given up by the scheduler, by reason", ("reason",)
+)
+# set after the analysis step of a turn, to time building the response
+_analysis_finished: ContextVar[Optional[float]] = ContextVar("analysis_finished", default=None)
+# stage durations of the current turn in ms, for its log record
+_turn_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("turn_stages", default=None)
+
+# Span trees of turns slower than TRACE_SLOW_TURN_MS are kept for /debug/traces.
+# TRACE_SAMPLE_RATE keeps a share of all turns and PROFILE_SAMPLE_RATE runs a
+# share under cProfile; the X-Chat-Trace and X-Chat-Profile request headers
+# do the same for one request. All are off by default. /debug/traces and the
+# two headers need DEBUG_TOKEN to be set and sent as X-Debug-Token.
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN", "")
+tracer = Tracer(
+    slow_seconds=float(os.getenv("TRACE_SLOW_TURN_MS", "0")) / 1000,
+    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0")),
+    profile_sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    keep=int(os.getenv("TRACE_KEEP", "100")),
+)
+
+
+def _observe_stage(stage: str, seconds: float) -> None:
+    stage_seconds.observe(seconds, stage)
+    stages = _turn_stages.get()
+    if stages is not None:
+        stages[stage] = round(stages.get(stage, 0.0) + seconds * 1000, 3)
+
+
+# spans name a session by a keyed hash: the session id is what lets a client continue a conversation
+_SESSION_REF_KEY = secrets.token_bytes(16)
+
+
+def _session_ref(session_id: str) -> str:
+    return hashlib.blake2b(session_id.encode("utf-8"), key=_SESSION_REF_KEY, digest_size=8).hexdigest()
+
+
+def _debug_allowed(token: Optional[str]) -> bool:
+    return bool(DEBUG_TOKEN) and token is not None and secrets.compare_digest(token, DEBUG_TOKEN)
+
+
+def _record_stage(stage: str, started: float, finished: float) -> None:
+    _observe_stage(stage, finished - started)
+    add_span(stage, started, finished)
 
 
 def _safe_lower(text: str) -> str:
@@ -120,6 +561,7 @@ def _meaningful(value: Optional[str]) -> bool:
     return cleaned not in INVALID_VALUES
 
 
+@lru_cache(maxsize=1024)
 def _normalize_department(value: Optional[str]) -> Optional[str]:
     if not _meaningful(value):
         return None
@@ -131,163 +573,131 @@ def _normalize_department(value: Optional[str]) -> Optional[str]:
         if candidate.lower() == option.lower():
             return option
 
-    lowered = candidate.lower()
-    keyword_map = {
-        "electric": "Electricity",
-        "power": "Electricity",
-        "water": "Water",
-        "sewage": "Water",
-        "road": "Roads",
-        "street": "Roads",
-        "garbage": "Sanitation",
-        "waste": "Sanitation",
-        "park": "Parks",
-        "tree": "Parks",
-    }
-    for keyword, department in keyword_map.items():
-        if keyword in lowered:
-            return department
+    return department_router.route(candidate).department or "Other"
 
-    return "Other"
 
+@contextmanager
+def use_language(code: Optional[str]) -> Iterator[LanguagePack]:
+    """Run the local pipeline (spelling, intents, extraction, questions) with the pack for ``code``."""
+    language = language_packs.get(code)
+    token = _turn_language.set(language)
+    try:
+        yield language
+    finally:
+        _turn_language.reset(token)
 
-def correct_spelling(text: str) -> str:
-    def replace_word(match: re.Match) -> str:
-        word = match.group(0)
-        replacement = SPELLING_CORRECTIONS.get(word.lower())
-        if not replacement:
-            return word
-        if word.isupper():
-            return replacement.upper()
-        if word[0].isupper():
-            return replacement.capitalize()
-        return replacement
 
-    return re.sub(r"[A-Za-z]+", replace_word, text)
+def correct_spelling(text: str) -> str:
+    if not _turn_language.get().spell_check:
+        return text
+    return spelling_corrector.correct(text)
 
 
 def recognize_intent(text: str) -> str:
-    lowered = _safe_lower(text)
-    for intent, patterns in STATUS_PATTERNS.items():
-        for pattern in patterns:
-            if re.search(pattern, lowered):
-                return intent
-
-    if is_confirmation_yes(lowered):
-        return "confirmation_yes"
-    if is_confirmation_no(lowered):
-        return "confirmation_no"
-
-    yes_match = bool(YES_PATTERN.search(lowered))
-    no_match = bool(NO_PATTERN.search(lowered))
-    if yes_match and not no_match:
-        if len(lowered.split()) <= 4:
-            return "confirmation_yes"
-    if no_match and not yes_match:
-        if len(lowered.split()) <= 4:
-            return "confirmation_no"
-
-    return "unknown"
-
-
-def is_confirmation_yes(lowered_text: str) -> bool:
-    explicit = {
-        "yes",
-        "yes submit",
-        "y",
-        "ok",
-        "okay",
-        "confirm",
-        "submit",
-        "proceed",
-        "go ahead",
-        "correct",
-    }
-    if lowered_text in explicit:
-        return True
-    if re.match(r"^(yes|yup|yeah)\s*(,|$)", lowered_text):
-        return True
-    if re.search(r"\b(yes,?\s*submit|confirm and submit)\b", lowered_text):
-        return True
-    return False
-
-
-def is_confirmation_no(lowered_text: str) -> bool:
-    explicit = {
-        "no",
-        "nope",
-        "wrong",
-        "incorrect",
-        "change",
-        "edit",
-        "not correct",
-        "no change this",
-    }
-    if lowered_text in explicit:
-        return True
-    if re.match(r"^(no|nope)\s*(,|$)", lowered_text):
-        return True
-    if re.search(r"\b(no,?\s*change details|change details)\b", lowered_text):
-        return True
-    return False
-
-
-def get_session(session_id: str) -> Dict[str, Any]:
-    if session_id not in sessions:
-        logger.info("Creating new session: %s", session_id)
-        sessions[session_id] = {
-            "data": {
-                "department": None,
-                "description": None,
-                "address": None,
-                "timing": None,
-                "specific_details": None,
-                "title": None,
-            },
-            "conversation_history": [],
-            "last_bot_action": "gather_info",
-            "awaiting_field": None,
-            "complaint_data_prepared": None,
-            "warned_missing_key": False,
-        }
-        welcome = (
-            "Hello! I can register your complaint. Please describe your issue, location, and when it started."
-        )
-        sessions[session_id]["conversation_history"].append({"role": "bot", "text": welcome})
+    return _turn_language.get().classify(text)
+
+
+def _field_question(field: Optional[str], default: str = "Please share the missing detail.") -> str:
+    if field is None:
+        return default
+    return _turn_language.get().question(field) or FIELD_QUESTIONS.get(field, default)
+
+
+def _find_timing(lowered: str) -> Optional[str]:
+    timing_match = TIMING_PATTERN.search(lowered)
+    if timing_match:
+        return _clean_text(timing_match.group(1))
+    return _clean_text(_turn_language.get().find_timing(lowered))
+
+
+async def _store_call(func: Callable[..., T], *args: Any) -> T:
+    """Call a session store method, off the event loop when the store can block."""
+    if not sessions.blocking:
+        return func(*args)
+    return await store_executor.run(func, *args)
+
+
+@asynccontextmanager
+async def session_turn(session_id: str) -> AsyncIterator[None]:
+    """Load ``session_id`` before the turn and write back what it changed afterwards.
+
+    Turn code reads and writes sessions through the turn's copy only, so the
+    store is called twice per turn at most, and a blocking store on a
+    thread of ``store_executor``.
+    """
+    token = _turn_sessions.set({session_id: await _store_call(sessions.get, session_id)})
+    completed = False
+    try:
+        yield
+        completed = True
+    finally:
+        loaded = _turn_sessions.get() or {}
+        _turn_sessions.reset(token)
+        if completed:
+            await _store_call(_write_back, loaded)
+
+
+def _write_back(loaded: Dict[str, Optional[ChatSession]]) -> None:
+    for session_id, session in loaded.items():
+        if session is None:
+            sessions.delete(session_id)
+        else:
+            sessions.put(session_id, session)
+
+
+def _load_session(session_id: str) -> Optional[ChatSession]:
+    turn = _turn_sessions.get()
+    if turn is not None and session_id in turn:
+        return turn[session_id]
+    session = sessions.get(session_id)
+    if turn is not None:
+        turn[session_id] = session
+    return session
 
-    session = sessions[session_id]
-    if "data" not in session:
-        session["data"] = {}
-    for key in DATA_KEYS:
-        if key not in session["data"]:
-            session["data"][key] = None
-    if "conversation_history" not in session:
-        session["conversation_history"] = []
-    if "last_bot_action" not in session:
-        session["last_bot_action"] = "gather_info"
-    if "awaiting_field" not in session:
-        session["awaiting_field"] = None
-    if "warned_missing_key" not in session:
-        session["warned_missing_key"] = False
 
+def _store_session(session_id: str, session: ChatSession) -> None:
+    turn = _turn_sessions.get()
+    if turn is None:
+        sessions.put(session_id, session)
+    else:
+        turn[session_id] = session
+
+
+WELCOME_MESSAGE = "Hello! I can register your complaint. Please describe your issue, location, and when it started."
+
+
+def get_session(session_id: str) -> ChatSession:
+    session = _load_session(session_id)
+    if session is None:
+        logger.info("Creating new session", extra={"category": "session", "session_id": session_id})
+        session = ChatSession.new(WELCOME_MESSAGE)
+        _store_session(session_id, session)
     return session
 
 
-def reset_session(session_id: str) -> Dict[str, Any]:
-    logger.info("Resetting session: %s", session_id)
-    if session_id in sessions:
-        del sessions[session_id]
+def reset_session(session_id: str) -> ChatSession:
+    logger.info("Resetting session", extra={"category": "session", "session_id": session_id})
+    turn = _turn_sessions.get()
+    if turn is None:
+        sessions.delete(session_id)
+    else:
+        turn[session_id] = None
     return get_session(session_id)
 
 
 def add_history(session_id: str, role: str, text: str) -> None:
-    if session_id not in sessions:
+    session = _load_session(session_id)
+    if session is None:
         return
 
-    history = sessions[session_id].get("conversation_history", [])
-    if len(history) >= 50:
-        sessions[session_id]["conversation_history"] = history[-49:]
-    sessions[session_id]["conversation_history"].append({"role": role, "text": text})
+    history = session.history
+    history.append(role, text)
+    if len(history) > PROMPT_HISTORY_WINDOW:
+        # the entry that just left the prompt window
+        left = history[-PROMPT_HISTORY_WINDOW - 1]
+        session.history_summary = fold_into_summary(session.history_summary, left.role, left.text)
+        history_folded.inc()
+    _store_session(session_id, session)
 
 
 def missing_fields(data: Dict[str, Any]) -> List[str]:
@@ -348,6 +758,14 @@ def build_complaint_data(data: Dict[str, Any]) -> Dict[str, Any]:
 def _extract_json_object(text: str) -> Optional[Dict[str, Any]]:
     if not text:
         return None
+    started = time.perf_counter()
+    try:
+        return _parse_json_object(text)
+    finally:
+        _record_stage("json_parse", started, time.perf_counter())
+
+
+def _parse_json_object(text: str) -> Optional[Dict[str, Any]]:
 
     stripped = text.strip()
     if stripped.startswith("```"):
@@ -375,14 +793,34 @@ def _extract_json_object(text: str) -> Optional[Dict[str, Any]]:
     return None
 
 
-def _format_history_for_prompt(history: List[Dict[str, str]], limit: int = 14) -> str:
-    recent = history[-limit:]
-    lines = []
-    for item in recent:
-        role = item.get("role", "user").capitalize()
-        text = item.get("text", "")
-        lines.append(f"{role}: {text}")
-    return "\n".join(lines)
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+
+def _compact_history_line(item: HistoryEntry) -> str:
+    """One prompt line per history entry, without bot boilerplate.
+
+    Bot replies are an acknowledgement followed by a question or the
+    confirmation summary; only the question matters to the model, and the
+    summary repeats the complaint data that the prompt already carries.
+    """
+    role = item.role
+    text = " ".join(item.text.split())
+    if role == ROLE_BOT:
+        if "Please confirm the details:" in text:
+            text = "(showed the complaint summary and asked for confirmation)"
+        else:
+            text = _SENTENCE_BREAK.split(text)[-1]
+    if len(text) > 240:
+        text = text[:237].rstrip() + "..."
+    return f"{role.capitalize()}: {text}"
+
+
+def _prompt_history_lines(history: HistoryRing, user_text: str) -> List[str]:
+    recent = history.last(PROMPT_HISTORY_WINDOW)
+    if recent and recent[-1].role == ROLE_USER and recent[-1].text == user_text:
+        # the latest message has its own section in the prompt
+        recent = recent[:-1]
+    return [_compact_history_line(item) for item in recent]
 
 
 def _gemini_api_key() -> Optional[str]:
@@ -393,7 +831,9 @@ def _gemini_api_key() -> Optional[str]:
     )
 
 
+@lru_cache(maxsize=1)
 def _load_api_key_from_env_files() -> None:
+    """Copy a Gemini API key from a ``.env`` file into the environment; the files are read once."""
     if _gemini_api_key():
         return
 
@@ -423,72 +863,325 @@ def _load_api_key_from_env_files() -> None:
             logger.exception("Failed reading env file: %s", env_file)
 
 
-def get_gemini_model():
-    global _gemini_model, _gemini_error
+def use_gemini_model_factory(factory: Optional[Callable[[str, Optional[str]], Any]]) -> None:
+    """Build models with ``factory(model_name, system_instruction)`` instead of the Gemini client.
 
-    if _gemini_model is not None:
-        return _gemini_model
+    Used to run the chat pipeline against a local stand-in model; ``None``
+    restores the real client.
+    """
+    global _gemini_model_factory
+    _gemini_model_factory = factory
+    _gemini_models.clear()
+
+
+def _create_gemini_model(genai: Any, model_name: str, system_instruction: Optional[str]) -> Tuple[Any, float]:
+    if system_instruction and GEMINI_CONTEXT_CACHE:
+        try:
+            cached = genai.caching.CachedContent.create(
+                model=model_name,
+                system_instruction=system_instruction,
+                ttl=timedelta(seconds=GEMINI_CONTEXT_CACHE_TTL_SECONDS),
+            )
+            # rebuild a little before the provider drops the cached content
+            expires_at = time.monotonic() + GEMINI_CONTEXT_CACHE_TTL_SECONDS * 0.9
+            return genai.GenerativeModel.from_cached_content(cached), expires_at
+        except Exception:
+            logger.warning(
+                "Context caching unavailable for %s; sending the system instruction per request",
+                model_name,
+                exc_info=True,
+            )
+    return genai.GenerativeModel(model_name, system_instruction=system_instruction), float("inf")
 
-    if genai is None:
-        _gemini_error = "google-generativeai package is not installed"
-        return None
 
+def _gemini_key_missing() -> bool:
+    global _gemini_error
+    if _gemini_configured:
+        return False
+    # checked before importing the client, so a missing key costs nothing
     _load_api_key_from_env_files()
-    api_key = _gemini_api_key()
-    if not api_key:
-        _gemini_error = "GEMINI_API_KEY is missing"
-        return None
+    if _gemini_api_key():
+        return False
+    _gemini_error = "GEMINI_API_KEY is missing"
+    return True
 
-    model_name = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
-    try:
-        genai.configure(api_key=api_key)
-        _gemini_model = genai.GenerativeModel(model_name)
-        logger.info("Gemini model initialized: %s", model_name)
-        return _gemini_model
-    except Exception as exc:
-        _gemini_error = str(exc)
-        logger.exception("Failed to initialize Gemini model")
+
+def get_gemini_model(system_instruction: Optional[str] = None):
+    """The model for ``system_instruction``, built here if needed.
+
+    Building imports the client and, with context caching, makes a network
+    call, so only warm-up and ``llm_executor`` threads call this;
+    request paths use ``current_gemini_model``.
+    """
+    global _gemini_error, _gemini_configured
+
+    entry = _gemini_models.get(system_instruction)
+    if entry is not None and entry[1] > time.monotonic():
+        return entry[0]
+
+    if _gemini_model_factory is not None:
+        model = _gemini_model_factory(GEMINI_MODEL_NAME, system_instruction)
+        _gemini_models[system_instruction] = (model, float("inf"))
+        return model
+
+    if _gemini_key_missing():
         return None
 
+    with _gemini_lock:
+        entry = _gemini_models.get(system_instruction)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
 
-async def _generate_gemini_json(prompt: str) -> Optional[Dict[str, Any]]:
-    model = get_gemini_model()
+        genai = load_genai()
+        if genai is None:
+            _gemini_error = genai_import_error()
+            return None
+        if not _gemini_configured:
+            genai.configure(api_key=_gemini_api_key())
+            _gemini_configured = True
+
+        try:
+            entry = _create_gemini_model(genai, GEMINI_MODEL_NAME, system_instruction)
+            _gemini_models[system_instruction] = entry
+            logger.info("Gemini model initialized: %s", GEMINI_MODEL_NAME)
+            return entry[0]
+        except Exception as exc:
+            _gemini_error = str(exc)
+            logger.exception("Failed to initialize Gemini model")
+            return None
+
+
+def current_gemini_model(system_instruction: Optional[str] = None):
+    """The model request paths use: never waits for one to be built.
+
+    A missing or expiring model is built on ``llm_executor``; until it is
+    ready the turn gets the expiring model, or None and local extraction.
+    Must be called on the event loop.
+    """
+    entry = _gemini_models.get(system_instruction)
+    if entry is not None and entry[1] > time.monotonic():
+        return entry[0]
+    if _gemini_model_factory is not None:
+        # stand-in models are built in memory
+        return get_gemini_model(system_instruction)
+    if _gemini_key_missing():
+        return None
+    if system_instruction not in _gemini_builds and not _gemini_lock.locked():
+        # with the lock held, warm-up or another build is already importing the client
+        build = asyncio.ensure_future(llm_executor.run(get_gemini_model, system_instruction))
+        _gemini_builds[system_instruction] = build
+        build.add_done_callback(lambda _: _gemini_builds.pop(system_instruction, None))
+    return entry[0] if entry is not None else None
+
+
+class _GeminiJsonReader:
+    """Parses streamed Gemini chunks and reports when reading can stop.
+
+    Each completed member is passed to ``on_member``. ``feed`` returns True
+    once every key in ``stop_keys`` is known; closing the stream then ends
+    generation early. ``result`` trusts the parsed members only if the object
+    closed or reading stopped that way; a stream that is malformed or cut
+    short is parsed again as a whole, and is unusable if that fails too.
+    """
+
+    def __init__(
+        self, on_member: Callable[[Tuple[str, ...], Any], None], stop_keys: Tuple[str, ...]
+    ) -> None:
+        self.parser = StreamingJsonObjectParser(expand=("extracted_data",))
+        self.received: List[str] = []
+        self.on_member = on_member
+        self.stop_keys = stop_keys
+        self.stopped_early = False
+        self.parse_seconds = 0.0
+
+    def feed(self, chunk: Any) -> bool:
+        try:
+            piece = chunk.text
+        except ValueError:
+            # chunks without text parts (e.g. only safety metadata)
+            return False
+        if not piece:
+            return False
+        self.received.append(piece)
+        started = time.perf_counter()
+        members = self.parser.feed(piece)
+        self.parse_seconds += time.perf_counter() - started
+        for path, value in members:
+            self.on_member(path, value)
+        if self.parser.malformed:
+            return False
+        if self.parser.has(*self.stop_keys):
+            self.stopped_early = True
+        return self.parser.done or self.stopped_early
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        parser = self.parser
+        _observe_stage("json_parse", self.parse_seconds)
+        annotate(json_parse_ms=round(self.parse_seconds * 1000, 3))
+        if not parser.malformed and (parser.complete or self.stopped_early) and parser.result:
+            return parser.result
+        return _extract_json_object("".join(self.received))
+
+
+def _stream_gemini_json(
+    model: Any,
+    prompt: str,
+    on_member: Callable[[Tuple[str, ...], Any], None],
+    stop_keys: Tuple[str, ...],
+    stop: threading.Event,
+    **kwargs: Any,
+) -> Optional[Dict[str, Any]]:
+    """Blocking streamed completion; also stops once ``stop`` is set because the caller gave up."""
+    reader = _GeminiJsonReader(on_member, stop_keys)
+    for chunk in model.generate_content(prompt, stream=True, **kwargs):
+        if stop.is_set():
+            return None
+        if reader.feed(chunk):
+            break
+    return reader.result()
+
+
+async def _stream_gemini_json_async(
+    model: Any,
+    prompt: str,
+    on_member: Callable[[Tuple[str, ...], Any], None],
+    stop_keys: Tuple[str, ...],
+    **kwargs: Any,
+) -> Optional[Dict[str, Any]]:
+    reader = _GeminiJsonReader(on_member, stop_keys)
+    response = await model.generate_content_async(prompt, stream=True, **kwargs)
+    async for chunk in response:
+        if reader.feed(chunk):
+            break
+    return reader.result()
+
+
+def _in_provider_span(func: Callable[..., Any], mode: str) -> Callable[..., Any]:
+    """Wrap a blocking provider call so its span shows how long it waited for an llm_executor thread."""
+    submitted = time.perf_counter()
+
+    def call(*args: Any, **kwargs: Any) -> Any:
+        waited = time.perf_counter() - submitted
+        with span("provider_call", mode=mode, executor_wait_ms=round(waited * 1000, 3)):
+            return func(*args, **kwargs)
+
+    return call
+
+
+async def _generate_gemini_json(
+    prompt: str,
+    on_member: Optional[Callable[[Tuple[str, ...], Any], None]] = None,
+    max_output_tokens: int = 600,
+    stop_keys: Tuple[str, ...] = GEMINI_STREAM_STOP_KEYS,
+    system_instruction: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    model = current_gemini_model(system_instruction)
     if not model:
         return None
 
-    safety_settings = None
-    if HarmCategory and HarmBlockThreshold:
-        safety_settings = {
-            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-        }
+    safety_settings = gemini_safety_settings()
+    generation_config = {
+        "temperature": 0.15,
+        "response_mime_type": "application/json",
+        "max_output_tokens": max_output_tokens,
+    }
 
-    for attempt in range(1, 4):
-        try:
-            response = await asyncio.to_thread(
-                model.generate_content,
+    notify = on_member or (lambda path, value: None)
+    use_async = GEMINI_ASYNC and hasattr(model, "generate_content_async")
+
+    async def attempt_once() -> Optional[Dict[str, Any]]:
+        if use_async and GEMINI_STREAMING:
+            with span("provider_call", mode="async_stream"):
+                return await _stream_gemini_json_async(
+                    model,
+                    prompt,
+                    notify,
+                    stop_keys,
+                    generation_config=generation_config,
+                    safety_settings=safety_settings,
+                ) or None
+        if use_async:
+            with span("provider_call", mode="async"):
+                response = await model.generate_content_async(
+                    prompt,
+                    generation_config=generation_config,
+                    safety_settings=safety_settings,
+                )
+            return _extract_json_object(getattr(response, "text", "")) or None
+        if not GEMINI_STREAMING:
+            response = await llm_executor.run(
+                _in_provider_span(model.generate_content, "executor"),
                 prompt,
-                generation_config={
-                    "temperature": 0.15,
-                    "response_mime_type": "application/json",
-                    "max_output_tokens": 600,
-                },
+                generation_config=generation_config,
                 safety_settings=safety_settings,
             )
-            text = getattr(response, "text", "")
-            parsed = _extract_json_object(text)
-            if parsed:
-                return parsed
-            logger.warning("Gemini JSON parse failed (attempt %s)", attempt)
-        except Exception:
-            logger.exception("Gemini request failed (attempt %s)", attempt)
+            return _extract_json_object(getattr(response, "text", "")) or None
 
-    return None
+        loop = asyncio.get_running_loop()
+        stop = threading.Event()
+        try:
+            return await llm_executor.run(
+                _in_provider_span(_stream_gemini_json, "executor_stream"),
+                model,
+                prompt,
+                lambda path, value: loop.call_soon_threadsafe(notify, path, value),
+                stop_keys,
+                stop,
+                generation_config=generation_config,
+                safety_settings=safety_settings,
+            ) or None
+        finally:
+            # after a deadline or cancellation the worker thread drops the stream
+            stop.set()
+
+    async def attempt() -> Optional[Dict[str, Any]]:
+        started = time.perf_counter()
+        outcome = "error"
+        with span("llm_attempt"):
+            try:
+                result = await attempt_once()
+                outcome = "ok" if result is not None else "unusable"
+                return result
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            finally:
+                annotate(outcome=outcome)
+                stage_seconds.observe(time.perf_counter() - started, "llm_attempt")
+                llm_attempts.inc(outcome)
+
+    started = time.perf_counter()
+    with span("llm", max_output_tokens=max_output_tokens):
+        try:
+            return await llm_scheduler.run(attempt)
+        except LLMUnavailable as exc:
+            llm_unavailable.inc(exc.reason)
+            annotate(unavailable=exc.reason)
+            logger.warning("Gemini unavailable (%s); using local extraction", exc.reason)
+            return None
+        finally:
+            _observe_stage("llm", time.perf_counter() - started)
+
+
+def _complete_analysis(updated: Dict[str, Any], ack: str) -> Dict[str, Any]:
+    updated["department"] = _normalize_department(updated.get("department"))
+    updated["title"] = generate_title(updated)
+
+    missing = missing_fields(updated)
+    next_field = missing[0] if missing else None
+    next_question = _field_question(next_field) if next_field else "confirmation_ready"
+
+    return {
+        "updated_data": updated,
+        "missing_fields": missing,
+        "next_question": next_question,
+        "assistant_ack": ack,
+    }
 
 
-def _fallback_extract(data: Dict[str, Any], user_text: str) -> Dict[str, Any]:
+def _fallback_extract(data: Dict[str, Any], user_text: str, corrected_text: Optional[str] = None) -> Dict[str, Any]:
+    """Keyword extraction; the department is routed on ``corrected_text``, values come from ``user_text``."""
+    started = time.perf_counter()
     updated = dict(data)
     text = _clean_text(user_text)
     lowered = _safe_lower(user_text)
@@ -497,111 +1190,225 @@ def _fallback_extract(data: Dict[str, Any], user_text: str) -> Dict[str, Any]:
         updated["description"] = text
 
     if not _meaningful(updated.get("department")):
-        fallback_keywords = {
-            "Electricity": ["electric", "power", "street light", "outage"],
-            "Water": ["water", "leak", "sewage", "drain"],
-            "Roads": ["pothole", "road", "street", "traffic signal"],
-            "Sanitation": ["garbage", "waste", "trash", "cleaning"],
-            "Parks": ["park", "playground", "tree", "garden"],
-        }
-        for dep, keys in fallback_keywords.items():
-            if any(k in lowered for k in keys):
-                updated["department"] = dep
-                break
+        routed = _turn_language.get().route(_safe_lower(corrected_text or user_text)).department
+        if routed:
+            updated["department"] = routed
 
     if not _meaningful(updated.get("address")):
-        address_match = re.search(
-            r"\b(?:at|in|near|on|around|beside|behind|opposite)\s+([a-z0-9][a-z0-9 ,/#\-.]{5,})",
-            lowered,
-            flags=re.IGNORECASE,
-        )
+        address_match = ADDRESS_PATTERN.search(lowered)
         if address_match:
             updated["address"] = _clean_text(address_match.group(1))
 
     if not _meaningful(updated.get("timing")):
-        timing_match = re.search(
-            r"\b(for\s+\d+\s+(?:hour|hours|day|days|week|weeks|month|months)|since\s+[a-z0-9 ,:-]+|today|yesterday|last\s+week)\b",
-            lowered,
-            flags=re.IGNORECASE,
-        )
-        if timing_match:
-            updated["timing"] = _clean_text(timing_match.group(1))
+        timing = _find_timing(lowered)
+        if timing:
+            updated["timing"] = timing
 
     if not _meaningful(updated.get("specific_details")) and _meaningful(text) and len(text.split()) >= 5:
         updated["specific_details"] = text
 
-    updated["department"] = _normalize_department(updated.get("department"))
-    updated["title"] = generate_title(updated)
+    analysis = _complete_analysis(updated, "Got it.")
+    _record_stage("fallback_extract", started, time.perf_counter())
+    return analysis
 
-    missing = missing_fields(updated)
-    next_field = missing[0] if missing else None
-    next_question = FIELD_QUESTIONS.get(next_field) if next_field else "confirmation_ready"
 
-    return {
-        "updated_data": updated,
-        "missing_fields": missing,
-        "next_question": next_question,
-        "assistant_ack": "Got it.",
-    }
+def _local_field_values(lowered: str) -> Dict[str, Tuple[str, float]]:
+    """Field values the deterministic extractors find in a message, with a confidence each."""
+    found: Dict[str, Tuple[str, float]] = {}
 
+    route = _turn_language.get().route(lowered)
+    for option in DEPARTMENT_OPTIONS:
+        if lowered == option.lower():
+            found["department"] = (option, 1.0)
+            break
+    else:
+        if route.department:
+            found["department"] = (route.department, route.confidence)
 
-async def analyze_with_gemini(
-    session: Dict[str, Any], user_text: str, corrected_text: str
-) -> Dict[str, Any]:
-    data = session.get("data", {})
-    history = session.get("conversation_history", [])
-    awaiting_field = session.get("awaiting_field")
+    timing = _find_timing(lowered)
+    if timing:
+        # the whole reply is the timing phrase, e.g. "yesterday"
+        found["timing"] = (timing, 1.0 if timing == _clean_text(lowered) else 0.85)
 
-    prompt = f"""
-You are an expert municipal complaint intake assistant.
+    address_match = ADDRESS_PATTERN.search(lowered)
+    if address_match:
+        found["address"] = (_clean_text(address_match.group(1)) or "", 0.9)
 
-Goal:
-Extract and refine complaint details from the ongoing conversation.
-Ask focused follow-up questions until ALL required fields are collected.
+    return found
 
-Allowed department values only: {json.dumps(DEPARTMENT_OPTIONS)}
-Required fields (must be non-empty): {json.dumps(REQUIRED_FIELDS)}
-All fields: {json.dumps(DATA_KEYS)}
 
-Current complaint data JSON:
-{json.dumps(data, ensure_ascii=True)}
+def _reply_field_values(awaiting_field: Optional[str], lowered: str) -> Dict[str, Tuple[str, float]]:
+    found = _local_field_values(lowered)
+    if awaiting_field == "address":
+        # road and market names in an address are not a department change
+        found.pop("department", None)
+    return found
 
-Conversation history (latest first):
-{_format_history_for_prompt(history)}
 
-Latest user message:
-{corrected_text}
+def _touches_other_fields(
+    data: Dict[str, Any], awaiting_field: Optional[str], found: Dict[str, Tuple[str, float]]
+) -> bool:
+    return any(field != awaiting_field and value != data.get(field) for field, (value, _) in found.items())
 
-If awaiting_field is set, prioritize filling it first.
-awaiting_field={awaiting_field}
 
-Return ONLY valid JSON with this schema:
-{{
-  "extracted_data": {{
-    "department": "... or null",
-    "description": "... or null",
-    "address": "... or null",
-    "timing": "... or null",
-    "specific_details": "... or null",
-    "title": "... or null"
-  }},
-  "missing_fields": ["department", "description"],
-  "next_question": "single direct question to gather next missing field, or 'confirmation_ready'",
-  "assistant_ack": "one short polite sentence acknowledging user input"
-}}
+def _rules_first_extract(
+    data: Dict[str, Any], awaiting_field: Optional[str], user_text: str, corrected_text: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Answer the awaited field locally when the reply clearly contains only that field.
 
-Rules:
-- Department must be one of allowed values; else set null.
-- If user updates/corrects old information, overwrite with latest info.
-- Keep description concise and factual.
-- next_question must target only one field at a time.
-- If all required fields are present, set next_question to "confirmation_ready".
-- Never include markdown or extra text outside JSON.
-"""
+    Returns the analysis with a "confidence" in [0, 1] for the awaited field,
+    or None when the reply carries other new fields and needs Gemini to sort
+    out. Addresses and free-text fields keep the whole reply; an address
+    without a preposition needs a number or an address word. Which fields
+    the reply holds is decided on ``corrected_text``; the values stored are
+    what the user typed, since the corrector can turn names into words.
+    """
+    if awaiting_field not in REQUIRED_FIELDS:
+        return None
+    text = _clean_text(user_text)
+    if not _meaningful(text):
+        return None
 
-    parsed = await _generate_gemini_json(prompt)
+    lowered = _safe_lower(corrected_text or user_text)
+    found = _reply_field_values(awaiting_field, lowered)
+    if _touches_other_fields(data, awaiting_field, found):
+        return None
+    typed = found
+    if corrected_text is not None and corrected_text != user_text:
+        typed = _reply_field_values(awaiting_field, _safe_lower(user_text))
+
+    if awaiting_field == "address":
+        if "address" in found:
+            value, confidence = text, found["address"][1]
+        else:
+            hinted = ADDRESS_HINT_PATTERN.search(lowered) or _turn_language.get().has_address_hint(lowered)
+            value, confidence = text, 0.85 if hinted else 0.0
+    elif awaiting_field in found:
+        value, confidence = found[awaiting_field]
+        if awaiting_field != "department":
+            # e.g. a timing phrase only recognised after correction: keep the reply as typed
+            value = typed[awaiting_field][0] if awaiting_field in typed else text
+    elif awaiting_field in {"description", "specific_details"}:
+        value, confidence = text, 0.85 if len(text.split()) >= 3 else 0.5
+    else:
+        value, confidence = text, 0.0
+
+    updated = dict(data)
+    updated[awaiting_field] = value
+    analysis = _complete_analysis(updated, "Got it.")
+    analysis["confidence"] = confidence
+    return analysis
+
+
+def extraction_tier_stats() -> Dict[str, float]:
+    total = sum(extraction_tier_counts.values())
+    stats: Dict[str, float] = dict(extraction_tier_counts)
+    for tier, count in extraction_tier_counts.items():
+        stats[f"{tier}_rate"] = count / total if total else 0.0
+    return stats
+
+
+def _emit_streamed_member(path: Tuple[str, ...], value: Any) -> None:
+    """Forward Gemini output to a streaming client as soon as each part is parsed."""
+    if path == ("assistant_ack",):
+        ack = _clean_text(value) if isinstance(value, str) else None
+        if ack:
+            emit_turn_event("ack", {"assistant_ack": ack})
+    elif len(path) == 2 and path[0] == "extracted_data" and path[1] in DATA_KEYS:
+        incoming = _clean_text(value) if isinstance(value, str) else None
+        if not _meaningful(incoming):
+            return
+        if path[1] == "department":
+            incoming = _normalize_department(incoming)
+        emit_turn_event("field", {"field": path[1], "value": incoming}, key=f"field:{path[1]}")
+
+
+def _field_prompt(data: Dict[str, Any], reply: str) -> str:
+    issue = _clean_text(data.get("description")) or "not described yet"
+    return f"Complaint: {issue}\nCitizen reply: {reply}"
+
+
+async def _analyze_awaited_field(
+    data: Dict[str, Any], field: str, user_text: str, cached: bool = True
+) -> Optional[Dict[str, Any]]:
+    """Extract only the awaited field with a small prompt; None when Gemini gave no answer.
+
+    The model gets the reply as typed: it copies values out of it, and
+    spelling correction can turn names into dictionary words.
+    """
+    prompt = _field_prompt(data, user_text)
+    prompt_budget.record(estimate_tokens(prompt))
+
+    def on_member(path: Tuple[str, ...], value: Any) -> None:
+        if path == (field,):
+            _emit_streamed_member(("extracted_data", field), value)
+
+    def load() -> Awaitable[Optional[Dict[str, Any]]]:
+        return _generate_gemini_json(
+            prompt,
+            on_member if streaming_turn() else None,
+            max_output_tokens=FIELD_PROMPTS[field][2],
+            stop_keys=(field,),
+            system_instruction=FIELD_SYSTEM_PROMPTS[field],
+        )
+
+    if cached:
+        cache_key = make_cache_key("field", field, data.get("description"), _safe_lower(user_text))
+        parsed = await llm_cache.get_or_load(cache_key, load)
+    else:
+        parsed = await load()
     if not parsed:
-        return _fallback_extract(data, user_text)
+        return None
+
+    updated = dict(data)
+    incoming = _clean_text(parsed.get(field)) if isinstance(parsed.get(field), str) else None
+    if not _meaningful(incoming):
+        # the field was asked for, so keep what the user said
+        incoming = _clean_text(user_text)
+    if _meaningful(incoming):
+        updated[field] = _normalize_department(incoming) if field == "department" else incoming
+    return _complete_analysis(updated, "Got it.")
+
+
+async def _analyze_full_prompt(
+    session: ChatSession, user_text: str, cached: bool = True
+) -> Optional[Dict[str, Any]]:
+    """Extract every field with the full prompt, from the message as typed; None when Gemini gave no answer."""
+    data = session.data.to_dict()
+    history = session.history
+    awaiting_field = session.awaiting_field
+
+    prompt_head = (
+        "Current complaint data JSON:\n"
+        f"{json.dumps(data, ensure_ascii=True, separators=(',', ':'))}\n\n"
+        "Conversation so far (oldest first):\n"
+    )
+    prompt_tail = f"\n\nLatest user message:\n{user_text}\n\nawaiting_field={awaiting_field}\n"
+    history_text, _ = prompt_budget.fit(
+        estimate_tokens(prompt_head) + estimate_tokens(prompt_tail),
+        render_summary(session.history_summary),
+        _prompt_history_lines(history, user_text),
+    )
+    prompt = prompt_head + history_text + prompt_tail
+    prompt_budget.record(estimate_tokens(prompt))
+
+    on_member = _emit_streamed_member if streaming_turn() else None
+
+    def load() -> Awaitable[Optional[Dict[str, Any]]]:
+        return _generate_gemini_json(prompt, on_member, system_instruction=EXTRACTION_SYSTEM_PROMPT)
+
+    if cached:
+        cache_key = make_cache_key(
+            data,
+            awaiting_field,
+            _safe_lower(user_text),
+            hashlib.sha256(history_text.encode("utf-8")).hexdigest(),
+        )
+        parsed = await llm_cache.get_or_load(cache_key, load)
+    else:
+        parsed = await load()
+    if not parsed:
+        return None
 
     extracted = parsed.get("extracted_data", {})
     if not isinstance(extracted, dict):
@@ -621,7 +1428,7 @@ Rules:
 
     # if field was explicitly requested and user gave content, keep it even when model misses
     if awaiting_field and not _meaningful(updated.get(awaiting_field)):
-        raw = _clean_text(corrected_text)
+        raw = _clean_text(user_text)
         if _meaningful(raw):
             if awaiting_field == "department":
                 updated["department"] = _normalize_department(raw)
@@ -645,7 +1452,7 @@ Rules:
     next_question = _clean_text(parsed.get("next_question"))
     if not next_question:
         field = final_missing[0] if final_missing else None
-        next_question = FIELD_QUESTIONS.get(field, "confirmation_ready")
+        next_question = _field_question(field, "confirmation_ready")
 
     ack = _clean_text(parsed.get("assistant_ack")) or "Understood."
 
@@ -657,26 +1464,239 @@ Rules:
     }
 
 
+def _timed_llm_task(
+    call: Callable[[bool], Awaitable[Optional[Dict[str, Any]]]], cached: bool
+) -> "asyncio.Task[Optional[Dict[str, Any]]]":
+    started = time.monotonic()
+    task = asyncio.ensure_future(call(cached))
+
+    def observe(done: "asyncio.Task[Optional[Dict[str, Any]]]") -> None:
+        if not done.cancelled() and done.exception() is None and done.result() is not None:
+            hedge_policy.observe(time.monotonic() - started)
+
+    task.add_done_callback(observe)
+    return task
+
+
+async def _first_usable(
+    tasks: List["asyncio.Task[Optional[Dict[str, Any]]]"],
+) -> Tuple[Optional[Dict[str, Any]], Optional["asyncio.Task[Optional[Dict[str, Any]]]"]]:
+    """Wait for the first task with a non-None result; cancel the rest."""
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None and task.result() is not None:
+                    return task.result(), task
+        return None, None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _store_late_analysis(
+    task: "asyncio.Task[Optional[Dict[str, Any]]]", session_id: str, baseline: Dict[str, Any]
+) -> None:
+    """Once the abandoned LLM call finishes, park its result in the session for the next turn."""
+
+    async def wait_and_store() -> None:
+        try:
+            analysis = await task
+        except Exception:
+            return
+        if analysis is None:
+            return
+        try:
+            async with session_locks.hold(session_id):
+                async with session_turn(session_id):
+                    session = _load_session(session_id)
+                    if session is None:
+                        return
+                    session.late_analysis = {"baseline": baseline, "data": analysis["updated_data"]}
+                    _store_session(session_id, session)
+                    hedge_policy.late_stored += 1
+        except SessionBusyError:
+            hedge_policy.late_dropped += 1
+
+    merge = asyncio.ensure_future(wait_and_store())
+    _late_merges.add(merge)
+    merge.add_done_callback(_late_merges.discard)
+
+
+def _apply_late_analysis(session: ChatSession) -> None:
+    """Merge an LLM result that arrived after its turn was answered locally.
+
+    A field takes the LLM value only if it still holds what the local answer
+    put there, so anything the user changed since wins. Nothing is merged once
+    the summary has been shown for confirmation, or into a different
+    complaint (the description changed, e.g. after a restart).
+    """
+    late, session.late_analysis = session.late_analysis, None
+    if not late:
+        return
+    data = session.data
+    if (
+        session.last_bot_action == "confirm_info"
+        or data.get("description") != late["baseline"].get("description")
+    ):
+        hedge_policy.late_dropped += 1
+        return
+    changed = False
+    for key in DATA_KEYS:
+        value = late["data"].get(key)
+        if _meaningful(value) and value != data.get(key) and data.get(key) == late["baseline"].get(key):
+            data[key] = value
+            changed = True
+    if changed:
+        hedge_policy.late_applied += 1
+
+
+async def _hedged_llm_analysis(
+    call: Callable[[bool], Awaitable[Optional[Dict[str, Any]]]],
+    local: Callable[[], Dict[str, Any]],
+    session_id: Optional[str],
+) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """Run an LLM analysis under the hedge policy; returns (analysis, answered_locally)."""
+    primary = _timed_llm_task(call, True)
+    if not hedge_policy.enabled:
+        return await primary, False
+
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=hedge_policy.delay())
+    except asyncio.CancelledError:
+        primary.cancel()
+        raise
+    if done:
+        return primary.result(), False
+
+    if hedge_policy.mode == "request":
+        if llm_scheduler.saturated:
+            # a second request would only queue behind the first and add load
+            hedge_policy.hedges_skipped += 1
+            return await primary, False
+        hedge_policy.hedged_requests += 1
+        annotate(hedge="request")
+        # bypass the cache, whose single-flight would just wait for the slow call
+        analysis, winner = await _first_usable([primary, _timed_llm_task(call, False)])
+        if winner is not None and winner is not primary:
+            hedge_policy.hedge_wins += 1
+        return analysis, False
+
+    hedge_policy.local_returns += 1
+    annotate(hedge="local")
+    analysis = local()
+    if session_id is None:
+        primary.cancel()
+    else:
+        _store_late_analysis(primary, session_id, analysis["updated_data"])
+    return analysis, True
+
+
+async def analyze_with_gemini(
+    session: ChatSession, user_text: str, corrected_text: str, session_id: Optional[str] = None
+) -> Dict[str, Any]:
+    data = session.data
+    awaiting_field = session.awaiting_field
+
+    started = time.perf_counter()
+    local = _rules_first_extract(data, awaiting_field, user_text, corrected_text)
+    _record_stage("rules_extract", started, time.perf_counter())
+    if local is not None and local["confidence"] >= RULES_CONFIDENCE_THRESHOLD:
+        extraction_tier_counts["rules"] += 1
+        annotate(tier="rules")
+        return local
+
+    call: Callable[[bool], Awaitable[Optional[Dict[str, Any]]]]
+    if awaiting_field in FIELD_PROMPTS and not _touches_other_fields(
+        data, awaiting_field, _reply_field_values(awaiting_field, _safe_lower(corrected_text))
+    ):
+        tier = "llm_field"
+        call = lambda cached: _analyze_awaited_field(data, awaiting_field, user_text, cached)
+    else:
+        tier = "llm"
+        call = lambda cached: _analyze_full_prompt(session, user_text, cached)
+
+    analysis, answered_locally = await _hedged_llm_analysis(
+        call, lambda: _fallback_extract(data, user_text, corrected_text), session_id
+    )
+    if analysis is None or answered_locally:
+        extraction_tier_counts["fallback"] += 1
+        annotate(tier="fallback")
+        return analysis or _fallback_extract(data, user_text, corrected_text)
+    extraction_tier_counts[tier] += 1
+    annotate(tier=tier)
+    return analysis
+
+
 def should_fast_track_submission(text: str) -> bool:
     lowered = _safe_lower(text)
     return "confirm all details now" in lowered or lowered == "skip"
 
 
-async def handle_conversation(session_id: str, user_text: str, user_language: str = "en") -> BotResponse:
-    del user_language
+async def handle_conversation(
+    session_id: str, user_text: str, user_language: str = "en", trace: bool = False, profile: bool = False
+) -> BotResponse:
+    """Run one chat turn; ``trace`` keeps its span tree and ``profile`` also runs it under cProfile."""
+    started = time.perf_counter()
+    _analysis_finished.set(None)
+    stages: Dict[str, float] = {}
+    _turn_stages.set(stages)
+    with use_language(user_language) as language, log_context(session_id=session_id, language=language.code):
+        language_turn_counts[language.code] = language_turn_counts.get(language.code, 0) + 1
+        with tracer.trace(
+            "chat_turn", force=trace, profile=profile, session=_session_ref(session_id), language=language.code
+        ):
+            async with session_locks.hold(session_id):
+                _record_stage("session_lock_wait", started, time.perf_counter())
+                async with session_turn(session_id):
+                    response = await _handle_turn(session_id, user_text)
+            finished = time.perf_counter()
+            analysis_finished = _analysis_finished.get()
+            if analysis_finished is not None:
+                _record_stage("response_build", analysis_finished, finished)
+            stage_seconds.observe(finished - started, "turn")
+            annotate(intent=response.detected_intent, action=response.action)
+        logger.info(
+            "Chat turn",
+            extra={
+                "category": "turn",
+                "intent": response.detected_intent,
+                "action": response.action,
+                "complaint_ready": response.complaint_ready,
+                "duration_ms": round((finished - started) * 1000, 3),
+                "stages_ms": dict(stages),
+            },
+        )
+    chat_turns.inc(response.detected_intent or "unknown", response.action or "none")
+    return response
+
 
+async def _handle_turn(session_id: str, user_text: str) -> BotResponse:
     session = get_session(session_id)
-    data = session["data"]
-    last_action = session.get("last_bot_action", "gather_info")
+    _apply_late_analysis(session)
+    data = session.data
+    last_action = session.last_bot_action
 
+    started = time.perf_counter()
     corrected_text = correct_spelling(user_text)
+    spelled = time.perf_counter()
     intent = recognize_intent(corrected_text)
-    add_history(session_id, "user", user_text)
+    _record_stage("spell_correction", started, spelled)
+    _record_stage("intent", spelled, time.perf_counter())
+    add_history(session_id, ROLE_USER, user_text)
+    emit_turn_event(
+        "intent",
+        {
+            "detected_intent": intent,
+            "corrected_text": corrected_text if corrected_text != user_text else None,
+        },
+    )
 
     if intent == "restart":
         refreshed = reset_session(session_id)
-        initial_message = refreshed["conversation_history"][0]["text"]
-        add_history(session_id, "bot", initial_message)
+        initial_message = refreshed.history[0].text
+        add_history(session_id, ROLE_BOT, initial_message)
         return BotResponse(
             reply=initial_message,
             action="reset",
@@ -688,7 +1708,7 @@ async def handle_conversation(session_id: str, user_text: str, user_language: st
     if intent == "cancel":
         reset_session(session_id)
         reply = "Okay, I cancelled this complaint registration. You can start a new one anytime."
-        add_history(session_id, "bot", reply)
+        add_history(session_id, ROLE_BOT, reply)
         return BotResponse(
             reply=reply,
             action="reset",
@@ -702,9 +1722,9 @@ async def handle_conversation(session_id: str, user_text: str, user_language: st
             "I will collect full complaint details step by step: department, issue, location, timing, and specific impact. "
             "Please describe your issue to begin."
         )
-        session["last_bot_action"] = "gather_info"
-        session["awaiting_field"] = None
-        add_history(session_id, "bot", reply)
+        session.last_bot_action = "gather_info"
+        session.awaiting_field = None
+        add_history(session_id, ROLE_BOT, reply)
         return BotResponse(
             reply=reply,
             action="gather_info",
@@ -716,7 +1736,7 @@ async def handle_conversation(session_id: str, user_text: str, user_language: st
 
     if intent == "status_check":
         reply = "This chatbot is for new complaint registration. To track status, use your complaint number on the tracking page."
-        add_history(session_id, "bot", reply)
+        add_history(session_id, ROLE_BOT, reply)
         return BotResponse(
             reply=reply,
             action="gather_info",
@@ -728,7 +1748,7 @@ async def handle_conversation(session_id: str, user_text: str, user_language: st
 
     if intent == "greeting" and not _meaningful(data.get("description")):
         reply = "Hello. Please describe your issue, location, and when it started."
-        add_history(session_id, "bot", reply)
+        add_history(session_id, ROLE_BOT, reply)
         return BotResponse(
             reply=reply,
             action="gather_info",
@@ -741,11 +1761,11 @@ async def handle_conversation(session_id: str, user_text: str, user_language: st
     if last_action == "confirm_info":
         if intent == "confirmation_yes":
             complaint = build_complaint_data(data)
-            session["complaint_data_prepared"] = complaint
-            session["last_bot_action"] = "trigger_registration"
-            session["awaiting_field"] = None
+            session.complaint_data_prepared = complaint
+            session.last_bot_action = "trigger_registration"
+            session.awaiting_field = None
             reply = "Okay, proceeding with registration."
-            add_history(session_id, "bot", reply)
+            add_history(session_id, ROLE_BOT, reply)
             return BotResponse(
                 reply=reply,
                 detected_intent=intent,
@@ -757,10 +1777,10 @@ async def handle_conversation(session_id: str, user_text: str, user_language: st
             )
 
         if intent == "confirmation_no":
-            session["last_bot_action"] = "gather_info"
-            session["awaiting_field"] = None
+            session.last_bot_action = "gather_info"
+            session.awaiting_field = None
             reply = "Sure, tell me exactly what you want to change."
-            add_history(session_id, "bot", reply)
+            add_history(session_id, ROLE_BOT, reply)
             return BotResponse(
                 reply=reply,
                 detected_intent=intent,
@@ -770,26 +1790,28 @@ async def handle_conversation(session_id: str, user_text: str, user_language: st
                 complaint_ready=False,
             )
 
-        session["last_bot_action"] = "gather_info"
+        session.last_bot_action = "gather_info"
 
-    analysis = await analyze_with_gemini(session, user_text, corrected_text)
-    session["data"] = analysis["updated_data"]
-    data = session["data"]
+    with span("analysis", awaiting_field=session.awaiting_field):
+        analysis = await analyze_with_gemini(session, user_text, corrected_text, session_id)
+    _analysis_finished.set(time.perf_counter())
+    data.update(analysis["updated_data"])
     missing = analysis["missing_fields"]
+    emit_turn_event("ack", {"assistant_ack": analysis["assistant_ack"]})
 
     # transparent hint for free-tier configuration if Gemini not active
-    if get_gemini_model() is None and not session.get("warned_missing_key"):
-        session["warned_missing_key"] = True
+    if current_gemini_model() is None and _gemini_error and not session.warned_missing_key:
+        session.warned_missing_key = True
         logger.warning("Gemini is not active: %s", _gemini_error)
 
     if should_fast_track_submission(corrected_text):
         if missing:
             field = missing[0]
-            question = FIELD_QUESTIONS.get(field, "Please share the missing detail.")
-            session["awaiting_field"] = field
-            session["last_bot_action"] = "gather_info"
+            question = _field_question(field)
+            session.awaiting_field = field
+            session.last_bot_action = "gather_info"
             reply = f"{analysis['assistant_ack']} {question}".strip()
-            add_history(session_id, "bot", reply)
+            add_history(session_id, ROLE_BOT, reply)
             return BotResponse(
                 reply=reply,
                 follow_up_question=question,
@@ -802,11 +1824,11 @@ async def handle_conversation(session_id: str, user_text: str, user_language: st
             )
 
         complaint = build_complaint_data(data)
-        session["complaint_data_prepared"] = complaint
-        session["last_bot_action"] = "trigger_registration"
-        session["awaiting_field"] = None
+        session.complaint_data_prepared = complaint
+        session.last_bot_action = "trigger_registration"
+        session.awaiting_field = None
         reply = "I will submit your complaint with the provided details. Proceeding with registration."
-        add_history(session_id, "bot", reply)
+        add_history(session_id, ROLE_BOT, reply)
         return BotResponse(
             reply=reply,
             detected_intent=intent,
@@ -821,10 +1843,11 @@ async def handle_conversation(session_id: str, user_text: str, user_language: st
         field = missing[0]
         next_question = analysis.get("next_question")
         if not _meaningful(next_question) or next_question == "confirmation_ready":
-            next_question = FIELD_QUESTIONS.get(field, "Please share the missing detail.")
+            next_question = _field_question(field)
 
-        session["awaiting_field"] = field
-        session["last_bot_action"] = "gather_info"
+        session.awaiting_field = field
+        session.last_bot_action = "gather_info"
+        emit_turn_event("question", {"follow_up_question": next_question, "awaiting_field": field})
         suggestions = None
         if field == "department":
             suggestions = DEPARTMENT_OPTIONS
@@ -832,7 +1855,7 @@ async def handle_conversation(session_id: str, user_text: str, user_language: st
             suggestions = ["Today", "Yesterday", "Since last week", "Not sure"]
 
         reply = f"{analysis['assistant_ack']} {next_question}".strip()
-        add_history(session_id, "bot", reply)
+        add_history(session_id, ROLE_BOT, reply)
         return BotResponse(
             reply=reply,
             follow_up_question=next_question,
@@ -845,10 +1868,11 @@ async def handle_conversation(session_id: str, user_text: str, user_language: st
         )
 
     summary = confirmation_summary(data)
-    session["awaiting_field"] = None
-    session["last_bot_action"] = "confirm_info"
+    emit_turn_event("summary", {"confirmation_summary": summary})
+    session.awaiting_field = None
+    session.last_bot_action = "confirm_info"
     reply = f"{analysis['assistant_ack']}\n\n{summary}".strip()
-    add_history(session_id, "bot", reply)
+    add_history(session_id, ROLE_BOT, reply)
     return BotResponse(
         reply=reply,
         follow_up_question="Is this information correct and complete?",
@@ -861,33 +1885,292 @@ async def handle_conversation(session_id: str, user_text: str, user_language: st
     )
 
 
+def _collect_runtime_metrics() -> Iterator[Family]:
+    """Values other components already track, read when /metrics is scraped."""
+    session_stats = sessions.stats()
+    yield "chat_sessions", "gauge", "Live chat sessions", [({}, session_stats["live_sessions"])]
+    yield (
+        "chat_session_store_bytes",
+        "gauge",
+        "Approximate encoded size of stored sessions",
+        [({}, sessions.approx_bytes())],
+    )
+    yield (
+        "chat_sessions_dropped_total",
+        "counter",
+        "Sessions removed by LRU eviction or idle expiry",
+        [({"reason": "evicted"}, session_stats["evictions"]), ({"reason": "expired"}, session_stats["expirations"])],
+    )
+    yield (
+        "chat_extractions_total",
+        "counter",
+        "Analysed turns by extraction tier (fallback = local extraction after the LLM gave no answer)",
+        [({"tier": tier}, count) for tier, count in extraction_tier_counts.items()],
+    )
+
+    spelling = spelling_corrector.stats()
+    yield (
+        "chat_spelling_tokens_total",
+        "counter",
+        "Words checked by the spelling corrector, by result",
+        [
+            ({"result": "corrected"}, spelling["tokens_corrected"]),
+            ({"result": "kept"}, spelling["tokens_checked"] - spelling["tokens_corrected"]),
+        ],
+    )
+
+    yield (
+        "chat_turns_by_language_total",
+        "counter",
+        "Chat turns by the language pack that handled them",
+        [({"language": code}, count) for code, count in language_turn_counts.items()],
+    )
+    yield "chat_ready", "gauge", "1 once startup warm-up has finished", [({}, int(startup_warmup.ready))]
+
+    locks = session_locks.stats()
+    yield "chat_session_locks", "gauge", "Sessions with a turn running or waiting", [({}, locks["locked_sessions"])]
+    yield (
+        "chat_session_lock_acquisitions_total",
+        "counter",
+        "Turns that took their session's lock, and those that had to wait for it",
+        [({"result": "acquired"}, locks["acquisitions"]), ({"result": "contended"}, locks["contended"])],
+    )
+    yield (
+        "chat_session_lock_rejected_total",
+        "counter",
+        "Turns refused because too many were already pending for the session",
+        [({}, locks["rejected"])],
+    )
+    yield (
+        "chat_session_lock_wait_seconds_total",
+        "counter",
+        "Time turns spent waiting for their session's lock",
+        [({}, locks["wait_seconds_total"])],
+    )
+
+    budget = prompt_budget.stats()
+    yield "chat_prompts_total", "counter", "Per-turn prompts built for Gemini", [({}, budget["prompts"])]
+    yield (
+        "chat_prompt_tokens",
+        "gauge",
+        "Estimated tokens of the per-turn prompt",
+        [({"stat": stat}, budget[key]) for stat, key in (("last", "last_tokens"), ("max", "max_tokens"), ("avg", "avg_tokens"))],
+    )
+    yield "chat_prompt_budget_tokens", "gauge", "Token budget of the per-turn prompt", [({}, budget["budget_tokens"])]
+    yield (
+        "chat_prompt_history_lines_dropped_total",
+        "counter",
+        "History lines left out of prompts to stay within the budget",
+        [({}, budget["history_lines_dropped"])],
+    )
+    yield (
+        "chat_prompts_over_budget_total",
+        "counter",
+        "Prompts still over the budget after trimming",
+        [({}, budget["over_budget"])],
+    )
+
+    if log_pipeline is not None:
+        logs = log_pipeline.stats()
+        yield "log_queue_depth", "gauge", "Log records waiting for the writer thread", [({}, logs["queue_depth"])]
+        yield "log_records_written_total", "counter", "Log records written", [({}, logs["written"])]
+        yield (
+            "log_records_dropped_total",
+            "counter",
+            "Log records not written, by reason",
+            [
+                ({"reason": "queue_full"}, sum(logs["dropped"].values())),
+                ({"reason": "sampled"}, logs["sampled_out"]),
+                ({"reason": "rate_limited"}, logs["rate_limited"]),
+            ],
+        )
+
+    scheduler = llm_scheduler.stats()
+    yield "llm_retries_total", "counter", "Gemini attempts that were retries", [({}, scheduler["retries"])]
+    yield "llm_queue_depth", "gauge", "Gemini requests waiting for a slot", [({}, scheduler["queue_depth"])]
+    yield "llm_in_flight", "gauge", "Gemini requests holding a slot", [({}, scheduler["in_flight"])]
+    yield (
+        "llm_circuit_breaker_state",
+        "gauge",
+        "1 for the current circuit breaker state",
+        [
+            ({"state": state}, int(state == scheduler["breaker_state"]))
+            for state in (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN)
+        ],
+    )
+    hedging = hedge_policy.stats()
+    yield "llm_hedge_delay_seconds", "gauge", "Current wait before hedging a Gemini request", [({}, hedging["delay_seconds"])]
+    yield (
+        "llm_hedges_total",
+        "counter",
+        "Gemini requests that passed the hedge delay, by what happened",
+        [
+            ({"result": "hedged"}, hedging["hedged_requests"]),
+            ({"result": "skipped"}, hedging["hedges_skipped"]),
+            ({"result": "hedge_won"}, hedging["hedge_wins"]),
+            ({"result": "answered_locally"}, hedging["local_returns"]),
+        ],
+    )
+    yield (
+        "llm_late_results_total",
+        "counter",
+        "Gemini answers that arrived after a turn was answered locally, by fate",
+        [
+            ({"result": "stored"}, hedging["late_stored"]),
+            ({"result": "applied"}, hedging["late_applied"]),
+            ({"result": "dropped"}, hedging["late_dropped"]),
+        ],
+    )
+
+    executor = llm_executor.stats()
+    yield "llm_executor_busy_threads", "gauge", "Blocking Gemini calls running", [({}, executor["busy"])]
+    yield "llm_executor_queued", "gauge", "Blocking Gemini calls waiting for a thread", [({}, executor["queued"])]
+    store_calls = store_executor.stats()
+    yield "session_store_queued", "gauge", "Session store calls waiting for a thread", [({}, store_calls["queued"])]
+
+    cache = llm_cache.stats()
+    yield (
+        "llm_cache_lookups_total",
+        "counter",
+        "Gemini response cache lookups by result",
+        [({"result": result}, cache[key]) for result, key in (("hit", "hits"), ("miss", "misses"), ("coalesced", "coalesced"))],
+    )
+
+
+metrics.collector(_collect_runtime_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    # the session figures query the store
+    return PlainTextResponse(await _store_call(metrics.render), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/debug/traces")
+async def traces_endpoint(
+    limit: int = 10,
+    format: Literal["json", "chrome"] = "json",
+    session_id: Optional[str] = None,
+    x_debug_token: Optional[str] = Header(None),
+) -> Dict[str, Any]:
+    """The slowest retained turn traces; ``format=chrome`` returns Chrome trace-event JSON."""
+    if not DEBUG_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not _debug_allowed(x_debug_token):
+        raise HTTPException(status_code=403, detail="X-Debug-Token required")
+    traces = tracer.slowest(len(tracer.recent()))
+    if session_id is not None:
+        session = _session_ref(session_id)
+        traces = [trace for trace in traces if trace.root.attributes.get("session") == session]
+    traces = traces[: max(0, limit)]
+    if format == "chrome":
+        return chrome_trace(traces)
+    return {"tracer": tracer.stats(), "traces": [trace.to_dict() for trace in traces]}
+
+
+def _header_flag(value: Optional[str]) -> bool:
+    return value is not None and value.strip().lower() in ("1", "true", "yes")
+
+
+WARMUP_MESSAGES = [
+    "Streetlight not working near sector 5 market since last week",
+    "garbage not colected at house 12 raj nagar from 3 days",
+    "yes",
+    "what is the status of my complaint",
+]
+
+
+def _warm_gemini_models() -> str:
+    for system_instruction in [None, EXTRACTION_SYSTEM_PROMPT, *FIELD_SYSTEM_PROMPTS.values()]:
+        if get_gemini_model(system_instruction) is None:
+            return f"inactive: {_gemini_error}"
+    return "active"
+
+
+def _warm_gemini_connection() -> str:
+    if not GEMINI_WARM_CONNECTION or _gemini_model_factory is not None:
+        return "skipped"
+    model = get_gemini_model()
+    if model is None:
+        return "skipped: Gemini inactive"
+    warm_connection(model, timeout=llm_scheduler.deadline_seconds)
+    return "connected"
+
+
+def _warm_local_pipeline() -> int:
+    """Run sample messages through the local steps so their caches and regexes are primed."""
+    for message in WARMUP_MESSAGES:
+        for word in re.findall(r"[A-Za-z]+", message):
+            spelling_corrector.suggest(word.lower())
+        lowered = _safe_lower(message)
+        recognize_intent(message)
+        values = {field: value for field, (value, _) in _local_field_values(lowered).items()}
+        build_complaint_data({"description": message, **values})
+    return len(WARMUP_MESSAGES)
+
+
+startup_warmup = StartupWarmup(
+    [
+        ("gemini_models", _warm_gemini_models),
+        ("gemini_connection", _warm_gemini_connection),
+        ("local_pipeline", _warm_local_pipeline),
+    ]
+)
+
+
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    """Readiness: 200 once startup warm-up has finished, 503 before."""
+    body = startup_warmup.stats()
+    if _gemini_models:
+        body["gemini"] = "active"
+    else:
+        body["gemini"] = f"inactive: {_gemini_error}" if _gemini_error else "not initialized"
+    return JSONResponse(body, status_code=200 if startup_warmup.ready else 503)
+
+
 @app.get("/")
 async def root() -> Dict[str, str]:
-    if get_gemini_model() is None:
+    if current_gemini_model() is None and _gemini_error:
         message = "Grievance Chatbot API is running (Gemini inactive: set GEMINI_API_KEY)"
+    elif not _gemini_models:
+        message = "Grievance Chatbot API is running (Gemini starting)"
     else:
         message = "Grievance Chatbot API is running"
     return {"message": message}
 
 
 @app.post("/chat", response_model=BotResponse)
-async def chat_endpoint_main(message: UserMessage) -> BotResponse:
+async def chat_endpoint_main(
+    message: UserMessage,
+    x_chat_trace: Optional[str] = Header(None),
+    x_chat_profile: Optional[str] = Header(None),
+    x_debug_token: Optional[str] = Header(None),
+) -> BotResponse:
+    # tracing and profiling a turn are operator tools, not something any client may switch on
+    debug = _debug_allowed(x_debug_token)
     try:
-        logger.info("Received chat message for session %s", message.session_id)
-        response = await handle_conversation(message.session_id, message.text, message.language)
-        logger.info(
-            "Sending response for session %s: action=%s ready=%s",
+        # the turn logs one record with its outcome and stage timings
+        return await handle_conversation(
             message.session_id,
-            response.action,
-            response.complaint_ready,
+            message.text,
+            message.language,
+            trace=debug and _header_flag(x_chat_trace),
+            profile=debug and _header_flag(x_chat_profile),
+        )
+    except SessionBusyError:
+        logger.warning("Too many pending messages", extra={"session_id": message.session_id})
+        return BotResponse(
+            reply="I am still working on your previous message. Please wait a moment and try again.",
+            complaint_ready=False,
         )
-        return response
     except Exception:
-        logger.exception("Error during chat handling for session %s", message.session_id)
+        logger.exception("Error during chat handling", extra={"session_id": message.session_id})
         try:
-            reset_session(message.session_id)
+            # the next message starts a new conversation
+            await _store_call(sessions.delete, message.session_id)
         except Exception:
-            logger.exception("Failed to reset session %s after error", message.session_id)
+            logger.exception("Failed to reset session after error", extra={"session_id": message.session_id})
         return BotResponse(
             reply="I encountered an unexpected issue and reset the conversation. Please start again.",
             action="reset",
@@ -895,8 +2178,55 @@ async def chat_endpoint_main(message: UserMessage) -> BotResponse:
         )
 
 
+async def _run_streamed_turn(
+    message: UserMessage,
+    events: TurnEventStream,
+    trace: Optional[str],
+    profile: Optional[str],
+    debug_token: Optional[str],
+) -> None:
+    current_turn_events.set(events)
+    try:
+        response = await chat_endpoint_main(message, trace, profile, debug_token)
+        events.emit("response", response.model_dump())
+    finally:
+        events.close()
+
+
+# keeps streamed turns alive (and referenced) when the client disconnects mid-turn
+_streamed_turns: Set["asyncio.Task[None]"] = set()
+
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(
+    message: UserMessage,
+    x_chat_trace: Optional[str] = Header(None),
+    x_chat_profile: Optional[str] = Header(None),
+    x_debug_token: Optional[str] = Header(None),
+) -> StreamingResponse:
+    events = TurnEventStream()
+    turn = asyncio.create_task(_run_streamed_turn(message, events, x_chat_trace, x_chat_profile, x_debug_token))
+    _streamed_turns.add(turn)
+    turn.add_done_callback(_streamed_turns.discard)
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
-    logger.info("Starting FastAPI server with Uvicorn")
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
+    workers = int(os.getenv("CHATBOT_WORKERS", "1"))
+    if workers > 1 and SESSION_BACKEND in ("memory", "snapshot"):
+        logger.warning("SESSION_BACKEND=%s cannot be shared between workers; starting 1 worker", SESSION_BACKEND)
+        workers = 1
+
+    logger.info("Starting FastAPI server with Uvicorn (%s worker(s))", workers)
+    if workers > 1:
+        uvicorn.run("app:app", host="0.0.0.0", port=8000, log_level="info", workers=workers, log_config=None)
+    else:
+        # log_config=None: uvicorn's loggers propagate to the log pipeline instead of writing themselves
+        uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info", log_config=None)
@@ -0,0 +1,12 @@
+"""Benchmarks for the grievance chatbot. Run from the ``Ml`` directory, e.g.
+``python -m benchmarks.bench_intent``.
+
+``bench_text`` times the text-processing steps, ``bench_spelling`` the
+spelling corrector, ``load_test`` drives whole conversations against the
+fake model in ``fake_gemini``, ``bench_session_memory`` measures bytes
+per live session, ``bench_snapshot`` the snapshot session backend, ``bench_startup``
+cold-start time, ``bench_language`` local handling of non-English
+turns through the language packs and ``bench_logging`` the cost of
+logging on the caller's thread; each can save results to ``baselines/``
+and compare later runs against them. Install ``requirements-dev.txt``
+first: the HTTP load test and the startup benchmark need ``httpx``."""
@@ -0,0 +1,47 @@
+"""Saving benchmark results as baselines and comparing later runs against them."""
+
+import json
+import os
+from typing import Dict, Iterable, List
+
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+def baseline_path(name: str) -> str:
+    return name if name.endswith(".json") else os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(name: str, results: Dict[str, float]) -> str:
+    path = baseline_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+    return path
+
+
+def compare_to_baseline(
+    name: str,
+    results: Dict[str, float],
+    tolerance: float = 0.2,
+    higher_is_better: Iterable[str] = (),
+) -> List[str]:
+    """Print each metric next to the baseline; return the ones worse by more than ``tolerance``."""
+    with open(baseline_path(name), "r", encoding="utf-8") as handle:
+        baseline = json.load(handle)
+
+    better_up = set(higher_is_better)
+    regressions: List[str] = []
+    for metric, value in results.items():
+        previous = baseline.get(metric)
+        if not isinstance(previous, (int, float)) or not previous:
+            continue
+        change = (value - previous) / previous
+        worse = -change if metric in better_up else change
+        flag = ""
+        if worse > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(metric)
+        print(f"  {metric:<34} {value:12.3f}  baseline {previous:12.3f}  {change:+7.1%}{flag}")
+    return regressions
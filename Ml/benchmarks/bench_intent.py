@@ -0,0 +1,161 @@
+"""Per-message cost of intent classification, before and after the IntentEngine.
+
+``legacy_recognize_intent`` is the previous implementation (per-call regex
+loops and rebuilt phrase sets), kept here as the baseline and to check that
+both give the same answer on every sample.
+"""
+
+import argparse
+import re
+import timeit
+
+from app import _safe_lower, recognize_intent
+
+
+STATUS_PATTERNS = {
+    "greeting": [r"\b(hi|hello|hey)\b"],
+    "farewell": [r"\b(bye|goodbye|thanks|thank you)\b"],
+    "status_check": [r"\b(status|update|tracking|track)\b"],
+    "restart": [r"\b(start over|restart|reset|new complaint)\b"],
+    "help": [r"\b(help|assist|support)\b"],
+    "cancel": [r"\b(cancel|stop|forget it|drop this)\b"],
+}
+
+YES_PATTERN = re.compile(
+    r"\b(yes|yup|yeah|ok|okay|confirm|submit|proceed|correct|right|go ahead)\b"
+)
+NO_PATTERN = re.compile(r"\b(no|nope|wrong|incorrect|change|edit|not correct)\b")
+
+SAMPLES = [
+    "hi",
+    "Hello, I want to report a problem",
+    "there is a water leak near MG road main market since yesterday",
+    "the street light outside my house has not worked for 3 days",
+    "yes",
+    "yes, submit",
+    "Yes submit",
+    "confirm and submit",
+    "no",
+    "no, change details",
+    "that's not correct",
+    "ok",
+    "looks right to me",
+    "please change the address",
+    "what is the status of my complaint",
+    "start over",
+    "cancel this",
+    "thank you so much",
+    "garbage has been piling up near the park gate for two weeks and it smells",
+    "it is near the bus stop opposite the temple",
+    "today",
+    "since last week",
+    "Roads",
+    "the pothole is about two feet wide and cars keep hitting it",
+    "yeah , that is it",
+    "nope, the address is wrong",
+    "yup",
+    "not correct ok",
+    "it's not correct",
+    "hi-fi shop street lamp broken",
+    "no, change details please",
+    "yes,submit now",
+]
+
+
+def legacy_is_confirmation_yes(lowered_text: str) -> bool:
+    explicit = {
+        "yes",
+        "yes submit",
+        "y",
+        "ok",
+        "okay",
+        "confirm",
+        "submit",
+        "proceed",
+        "go ahead",
+        "correct",
+    }
+    if lowered_text in explicit:
+        return True
+    if re.match(r"^(yes|yup|yeah)\s*(,|$)", lowered_text):
+        return True
+    if re.search(r"\b(yes,?\s*submit|confirm and submit)\b", lowered_text):
+        return True
+    return False
+
+
+def legacy_is_confirmation_no(lowered_text: str) -> bool:
+    explicit = {
+        "no",
+        "nope",
+        "wrong",
+        "incorrect",
+        "change",
+        "edit",
+        "not correct",
+        "no change this",
+    }
+    if lowered_text in explicit:
+        return True
+    if re.match(r"^(no|nope)\s*(,|$)", lowered_text):
+        return True
+    if re.search(r"\b(no,?\s*change details|change details)\b", lowered_text):
+        return True
+    return False
+
+
+def legacy_recognize_intent(text: str) -> str:
+    lowered = _safe_lower(text)
+    for intent, patterns in STATUS_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, lowered):
+                return intent
+
+    if legacy_is_confirmation_yes(lowered):
+        return "confirmation_yes"
+    if legacy_is_confirmation_no(lowered):
+        return "confirmation_no"
+
+    yes_match = bool(YES_PATTERN.search(lowered))
+    no_match = bool(NO_PATTERN.search(lowered))
+    if yes_match and not no_match:
+        if len(lowered.split()) <= 4:
+            return "confirmation_yes"
+    if no_match and not yes_match:
+        if len(lowered.split()) <= 4:
+            return "confirmation_no"
+
+    return "unknown"
+
+
+def check_equivalence() -> None:
+    for sample in SAMPLES:
+        before = legacy_recognize_intent(sample)
+        after = recognize_intent(sample)
+        if before != after:
+            raise SystemExit(f"Intent mismatch for {sample!r}: {before} != {after}")
+
+
+def per_message_us(func, number: int) -> float:
+    seconds = min(
+        timeit.repeat(lambda: [func(sample) for sample in SAMPLES], number=number, repeat=5)
+    )
+    return seconds / (number * len(SAMPLES)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    check_equivalence()
+    before = per_message_us(legacy_recognize_intent, args.number)
+    after = per_message_us(recognize_intent, args.number)
+    print(f"samples: {len(SAMPLES)}")
+    print(f"legacy recognize_intent:  {before:7.2f} us/message")
+    print(f"engine recognize_intent:  {after:7.2f} us/message")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
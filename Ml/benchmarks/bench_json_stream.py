@@ -0,0 +1,71 @@
+"""Replay recorded Gemini token streams through the incremental JSON parser.
+
+Each line of ``data/gemini_streams.jsonl`` holds the text chunks of one
+recorded streamed completion. For every recording this checks that the
+streamed parse matches ``json.loads`` of the full text for the keys the chat
+pipeline needs, and reports how much of the stream is read before the
+parser can stop. No network access is needed.
+"""
+
+import argparse
+import json
+import os
+import timeit
+
+from app import GEMINI_STREAM_STOP_KEYS, _extract_json_object
+from json_stream import StreamingJsonObjectParser
+
+
+RECORDINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gemini_streams.jsonl")
+
+
+def load_recordings(path: str):
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def replay(chunks):
+    """Feed chunks until the stop keys are known; return (parser, chunks read, chars read)."""
+    parser = StreamingJsonObjectParser(expand=("extracted_data",))
+    chars = 0
+    for count, chunk in enumerate(chunks, start=1):
+        chars += len(chunk)
+        parser.feed(chunk)
+        if parser.done or parser.has(*GEMINI_STREAM_STOP_KEYS):
+            return parser, count, chars
+    return parser, len(chunks), chars
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recordings", default=RECORDINGS)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    total_chars = read_chars = 0
+    for recording in load_recordings(args.recordings):
+        chunks = recording["chunks"]
+        full_text = "".join(chunks)
+        expected = _extract_json_object(full_text)
+        streamed, chunks_read, chars_read = replay(chunks)
+        for key in GEMINI_STREAM_STOP_KEYS:
+            if streamed.result.get(key) != expected.get(key):
+                raise SystemExit(f"{recording['name']}: streamed {key!r} differs from full parse")
+
+        streamed_us = timeit.timeit(lambda: replay(chunks), number=args.number) / args.number * 1e6
+        full_us = timeit.timeit(lambda: _extract_json_object(full_text), number=args.number) / args.number * 1e6
+        total_chars += len(full_text)
+        read_chars += chars_read
+        print(
+            f"{recording['name']:<16} read {chunks_read}/{len(chunks)} chunks, "
+            f"{chars_read}/{len(full_text)} chars; "
+            f"incremental {streamed_us:7.1f} us vs full parse {full_us:6.1f} us"
+        )
+
+    print(f"overall: stopped after {read_chars / total_chars:.0%} of the output text")
+
+
+if __name__ == "__main__":
+    main()
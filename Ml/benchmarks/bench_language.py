@@ -0,0 +1,94 @@
+"""Local handling of non-English turns through the language packs.
+
+Runs the labelled cases in ``data/language_cases.json`` (intents, and
+replies to an awaited field) through the local pipeline twice: with the
+pack for each case's language, and with the English pack every turn used
+before packs existed. Reports how many cases come out as labelled, the
+share of awaited-field replies answered without Gemini (rules confidence
+at or above ``RULES_CONFIDENCE_THRESHOLD``) and microseconds per message
+for intent classification and local extraction. ``--save`` stores the run
+as a baseline and ``--compare`` checks a run against one (non-zero exit on
+regression).
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Any, Dict, List, Optional
+
+import app
+from benchmarks.baseline import compare_to_baseline, save_baseline
+
+
+CASES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "language_cases.json")
+HIGHER_IS_BETTER = ("pack_accuracy", "pack_local_share", "english_accuracy", "english_local_share")
+
+
+def evaluate(case: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The local analysis of an awaited-field reply, or the intent for other cases."""
+    text = app.correct_spelling(case["text"])
+    if "awaiting" not in case:
+        return {"ok": app.recognize_intent(text) == case["intent"], "local": None}
+    analysis = app._rules_first_extract(app.ChatSession().data, case["awaiting"], case["text"], text)
+    local = analysis is not None and analysis["confidence"] >= app.RULES_CONFIDENCE_THRESHOLD
+    value = analysis["updated_data"].get(case["awaiting"]) if analysis else None
+    return {"ok": local and value == case["field"], "local": local}
+
+
+def run(cases: List[Dict[str, Any]], forced: Optional[str]) -> Dict[str, float]:
+    outcomes = []
+    for case in cases:
+        with app.use_language(forced or case["language"]):
+            outcome = evaluate(case)
+        outcomes.append(outcome)
+        if not outcome["ok"] and forced is None:
+            print(f"  {case['language']} {case['text']!r}: not handled as labelled")
+    awaited = [outcome for outcome in outcomes if outcome["local"] is not None]
+    return {
+        "accuracy": round(sum(outcome["ok"] for outcome in outcomes) / len(outcomes), 3),
+        "local_share": round(sum(outcome["local"] for outcome in awaited) / max(len(awaited), 1), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--save", metavar="BASELINE", help="save results as this baseline name or path")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare results with this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    with open(CASES, "r", encoding="utf-8") as handle:
+        cases = json.load(handle)
+
+    results: Dict[str, float] = {}
+    for name, forced in (("pack", None), ("english", "en")):
+        for key, value in run(cases, forced).items():
+            results[f"{name}_{key}"] = value
+        print(
+            f"{name:<8} {results[f'{name}_accuracy']:.0%} of cases as labelled, "
+            f"{results[f'{name}_local_share']:.0%} of awaited-field replies answered locally"
+        )
+
+    hindi = [case["text"] for case in cases if case["language"] == "hi"]
+    with app.use_language("hi"):
+        for name, step in (
+            ("intent", app.recognize_intent),
+            ("extract", lambda text: app._local_field_values(app._safe_lower(text))),
+        ):
+            best = min(timeit.repeat(lambda: [step(text) for text in hindi], number=args.number, repeat=3))
+            results[f"hi_{name}_us_per_message"] = round(best / args.number / len(hindi) * 1e6, 3)
+            print(f"hi {name:<8} {results[f'hi_{name}_us_per_message']:8.2f} us/message")
+
+    if args.save:
+        print(f"saved baseline {save_baseline(args.save, results)}")
+    if args.compare:
+        print(f"compared with {args.compare}:")
+        if compare_to_baseline(args.compare, results, args.tolerance, HIGHER_IS_BETTER):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Cost of logging on the caller's thread: a direct stream handler against the log pipeline.
+
+Logs ``--records`` records, and a burst of ``--exceptions`` identical
+exceptions with tracebacks, into a sink that takes ``--sink-ms`` per write
+(a busy pipe or log collector), first through a ``logging.StreamHandler``
+as ``logging.basicConfig`` sets up and then through ``LogPipeline``.
+Reports microseconds per call and the longest single call on the caller's
+side - the time a chat turn would stall the event loop - and what the
+pipeline wrote and dropped. ``--save`` stores the run as a baseline and
+``--compare`` checks a run against one (non-zero exit on regression).
+"""
+
+import argparse
+import io
+import logging
+import sys
+import time
+from typing import Callable, Dict, Tuple
+
+from benchmarks.baseline import compare_to_baseline, save_baseline
+from log_pipeline import LogPipeline, LogSampler, log_context
+
+
+class SlowSink(io.StringIO):
+    def __init__(self, seconds: float) -> None:
+        super().__init__()
+        self.seconds = seconds
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        self.writes += 1
+        time.sleep(self.seconds)
+        return super().write(text)
+
+
+def timed(calls: int, call: Callable[[int], None]) -> Tuple[float, float]:
+    """Mean and worst microseconds per call."""
+    worst = 0.0
+    started = time.perf_counter()
+    for number in range(calls):
+        before = time.perf_counter()
+        call(number)
+        worst = max(worst, time.perf_counter() - before)
+    return round((time.perf_counter() - started) / calls * 1e6, 3), round(worst * 1e6, 3)
+
+
+def run(name: str, handler: logging.Handler, records: int, exceptions: int, results: Dict[str, float]) -> None:
+    log = logging.getLogger(f"bench.{name}")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    log.addHandler(handler)
+
+    def info(number: int) -> None:
+        log.info("Chat turn", extra={"category": "turn", "intent": "unknown", "action": "gather_info", "n": number})
+
+    def failure(number: int) -> None:
+        try:
+            raise TimeoutError("deadline exceeded")
+        except TimeoutError:
+            log.exception("LLM request failed (attempt %s)", number % 3 + 1)
+
+    with log_context(session_id="bench", language="en"):
+        results[f"{name}_info_us"], results[f"{name}_info_worst_us"] = timed(records, info)
+        results[f"{name}_exception_us"], results[f"{name}_exception_worst_us"] = timed(exceptions, failure)
+    log.removeHandler(handler)
+    print(
+        f"{name:<9} info {results[f'{name}_info_us']:9.2f} us/call (worst {results[f'{name}_info_worst_us']:9.1f})  "
+        f"exception {results[f'{name}_exception_us']:9.2f} us/call (worst {results[f'{name}_exception_worst_us']:9.1f})"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--exceptions", type=int, default=200)
+    parser.add_argument("--sink-ms", type=float, default=0.5, help="time the sink takes per write")
+    parser.add_argument("--save", metavar="BASELINE", help="save results as this baseline name or path")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare results with this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    args = parser.parse_args()
+
+    results: Dict[str, float] = {}
+    direct = logging.StreamHandler(SlowSink(args.sink_ms / 1000))
+    direct.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    run("direct", direct, args.records, args.exceptions, results)
+
+    sink = SlowSink(args.sink_ms / 1000)
+    pipeline = LogPipeline(sink, sampler=LogSampler(window_seconds=60, burst=3)).start()
+    run("pipeline", pipeline.handler, args.records, args.exceptions, results)
+    pipeline.close()
+    stats = pipeline.stats()
+    print(
+        f"pipeline wrote {stats['written']} records in {sink.writes} writes, "
+        f"dropped {sum(stats['dropped'].values())} (queue full) and {stats['rate_limited']} repeated exceptions"
+    )
+
+    if args.save:
+        print(f"saved baseline {save_baseline(args.save, results)}")
+    if args.compare:
+        print(f"compared with {args.compare}:")
+        if compare_to_baseline(args.compare, results, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measure what each chat turn sends to the model now that the static prompt is a system instruction.
+
+Runs scripted conversations through ``handle_conversation`` against the
+local stand-in model, checks that every call reuses one of the prebuilt
+system instructions unchanged (only the per-turn contents vary), and
+reports bytes sent per call against sending the whole prompt every time.
+No network access is needed.
+"""
+
+import argparse
+import asyncio
+import statistics
+
+import app
+from benchmarks.fake_gemini import FakeGemini
+
+
+CONVERSATIONS = [
+    [
+        "there is a big garbage pile near my house and it smells a lot",
+        "sanitation",
+        "house 12 behind the old temple, sector 5",
+        "since last week",
+        "stray dogs spread it on the road and kids fall sick",
+        "yes",
+    ],
+    [
+        "water pipe leaking on MG road since yesterday and the street is flooded",
+        "water is wasted all day and shops cannot open",
+        "no",
+        "actually it started 3 days ago",
+        "yes",
+    ],
+    [
+        "street light not working",
+        "it is near the bus stand in raj nagar",
+        "for 5 days",
+        "whole lane is dark at night and women feel unsafe",
+        "yes",
+    ],
+]
+
+
+async def run(rounds: int) -> FakeGemini:
+    fake = FakeGemini()
+    app.use_gemini_model_factory(fake.model)
+    app.llm_cache.max_entries = 0
+    # force every turn through the model so each prompt shape is measured
+    app.RULES_CONFIDENCE_THRESHOLD = 2.0
+    for round_number in range(rounds):
+        for index, conversation in enumerate(CONVERSATIONS):
+            session_id = f"prefix-{round_number}-{index}"
+            for message in conversation:
+                await app.handle_conversation(session_id, message)
+    return fake
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    fake = asyncio.run(run(args.rounds))
+    allowed = {app.EXTRACTION_SYSTEM_PROMPT, *app.FIELD_SYSTEM_PROMPTS.values()}
+    instructions = {call["system_instruction"] for call in fake.calls}
+    if not instructions <= allowed:
+        raise SystemExit("a call sent a system instruction that was not one of the prebuilt prefixes")
+
+    suffix_bytes = [call["bytes"] for call in fake.calls]
+    full_bytes = [
+        call["bytes"] + len(call["system_instruction"].encode("utf-8")) for call in fake.calls
+    ]
+    print(f"calls: {len(fake.calls)} using {len(instructions)} distinct system instructions (all prebuilt)")
+    for instruction in sorted(instructions, key=len):
+        name = "extraction" if instruction == app.EXTRACTION_SYSTEM_PROMPT else instruction.split(" the ")[1].split(" of ")[0]
+        count = sum(1 for call in fake.calls if call["system_instruction"] == instruction)
+        print(f"  {name:<18} {len(instruction.encode('utf-8')):5d} bytes, used by {count} calls")
+    print(
+        f"per-call bytes sent: suffix mean {statistics.mean(suffix_bytes):.0f}, max {max(suffix_bytes)}; "
+        f"with the prefix inlined mean {statistics.mean(full_bytes):.0f}, max {max(full_bytes)}"
+    )
+    print(f"prompt budget: {app.prompt_budget.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Memory taken per live session, typed session records against the old dict layout.
+
+Fills an in-memory session store with ``--sessions`` conversations of
+``--turns`` user/bot exchanges each (100k by default) and reports traced
+bytes per session for ``ChatSession`` and for the nested dicts sessions used
+to be. Message texts are unique per session, as in real traffic, so both
+layouts pay for the same strings. ``--save`` stores the run as a baseline
+and ``--compare`` checks a run against one (non-zero exit on regression).
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.baseline import compare_to_baseline, save_baseline
+from prompt_budget import fold_into_summary
+from session_model import ROLE_BOT, ROLE_USER, ChatSession
+from session_store import InMemorySessionStore
+
+
+WELCOME = "Hello! I can register your complaint. Please describe your issue, location, and when it started."
+PROMPT_HISTORY_WINDOW = 6
+
+USER_LINES = [
+    "garbage pile near the school gate number {n}",
+    "house {n} sector 5 raj nagar",
+    "since last week",
+    "dogs spread it and kids fall sick, ticket {n}",
+    "sanitation",
+    "yes",
+]
+BOT_LINES = [
+    "Thanks, noted. Which department should handle this?",
+    "Got it. Where exactly is the problem?",
+    "Got it. When did it start?",
+    "Thanks. Any specific details that will help the team?",
+    "Got it. Please confirm the details.",
+    "Okay, proceeding with registration.",
+]
+FIELD_VALUES = [
+    ("description", "garbage pile near the school gate number {n}"),
+    ("address", "house {n} sector 5 raj nagar"),
+    ("timing", "since last week"),
+    ("department", "Sanitation"),
+]
+
+
+def legacy_session(n: int, turns: int) -> Dict[str, Any]:
+    """A session as the nested-dict layout stored it, including its history trimming."""
+    session: Dict[str, Any] = {
+        "data": {
+            "department": None,
+            "description": None,
+            "address": None,
+            "timing": None,
+            "specific_details": None,
+            "title": None,
+        },
+        "conversation_history": [{"role": "bot", "text": WELCOME}],
+        "history_summary": None,
+        "last_bot_action": "gather_info",
+        "awaiting_field": None,
+        "complaint_data_prepared": None,
+        "warned_missing_key": False,
+    }
+    for turn in range(turns):
+        for role, text in (
+            ("user", USER_LINES[turn % len(USER_LINES)].format(n=n)),
+            ("bot", BOT_LINES[turn % len(BOT_LINES)]),
+        ):
+            history = session["conversation_history"]
+            if len(history) >= 50:
+                session["conversation_history"] = history[-49:]
+            session["conversation_history"].append({"role": role, "text": text})
+            if len(session["conversation_history"]) > PROMPT_HISTORY_WINDOW:
+                left = session["conversation_history"][-PROMPT_HISTORY_WINDOW - 1]
+                session["history_summary"] = fold_into_summary(session["history_summary"], left["role"], left["text"])
+        if turn < len(FIELD_VALUES):
+            key, value = FIELD_VALUES[turn]
+            session["data"][key] = value.format(n=n)
+        session["awaiting_field"] = "address"
+    return session
+
+
+def typed_session(n: int, turns: int) -> ChatSession:
+    session = ChatSession.new(WELCOME)
+    for turn in range(turns):
+        for role, text in (
+            (ROLE_USER, USER_LINES[turn % len(USER_LINES)].format(n=n)),
+            (ROLE_BOT, BOT_LINES[turn % len(BOT_LINES)]),
+        ):
+            session.history.append(role, text)
+            if len(session.history) > PROMPT_HISTORY_WINDOW:
+                left = session.history[-PROMPT_HISTORY_WINDOW - 1]
+                session.history_summary = fold_into_summary(session.history_summary, left.role, left.text)
+        if turn < len(FIELD_VALUES):
+            key, value = FIELD_VALUES[turn]
+            session.data[key] = value.format(n=n)
+        session.awaiting_field = "address"
+    return session
+
+
+def bytes_per_session(build: Callable[[int, int], Any], sessions: int, turns: int) -> float:
+    store = InMemorySessionStore(ttl_seconds=0, max_sessions=0)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for n in range(sessions):
+        store.put(f"session-{n}", build(n, turns))
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(store) == sessions
+    return (after - before) / sessions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--turns", type=int, default=6, help="user/bot exchanges per session")
+    parser.add_argument("--save", metavar="BASELINE", help="save results as this baseline name or path")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare results with this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results: Dict[str, float] = {}
+    layouts: List[Tuple[str, Callable[[int, int], Any]]] = [("typed", typed_session), ("dict", legacy_session)]
+    for name, build in layouts:
+        started = time.perf_counter()
+        per_session = bytes_per_session(build, args.sessions, args.turns)
+        elapsed = time.perf_counter() - started
+        results[f"{name}_bytes_per_session"] = round(per_session, 1)
+        print(
+            f"{name:<6} {per_session:10.1f} bytes/session  "
+            f"{per_session * args.sessions / 2**20:8.1f} MiB for {args.sessions} sessions  ({elapsed:.1f}s)"
+        )
+    results["typed_to_dict_ratio"] = round(results["typed_bytes_per_session"] / results["dict_bytes_per_session"], 3)
+    print(f"typed sessions take {results['typed_to_dict_ratio']:.0%} of the dict layout")
+
+    if args.save:
+        print(f"saved baseline {save_baseline(args.save, results)}")
+    if args.compare:
+        print(f"compared with {args.compare}:")
+        if compare_to_baseline(args.compare, results, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Cost of the snapshot session backend: writes, snapshots, restarts and lazy loads.
+
+Fills a ``SnapshotSessionStore`` in a temporary directory with sessions of
+``--turns`` exchanges and reports:
+
+* ``put`` time against the plain in-memory store (the request-path cost),
+* one flush of every pending session to the change log, and a snapshot,
+* restart time (open the snapshot, replay the log) for each ``--sizes``
+  entry - it should stay flat as the session count grows,
+* the first ``get`` of a stored session after a restart (decode on demand).
+
+``--save`` stores the run as a baseline and ``--compare`` checks a run
+against one (non-zero exit on regression).
+"""
+
+import argparse
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.baseline import compare_to_baseline, save_baseline
+from benchmarks.bench_session_memory import typed_session
+from session_snapshot import SnapshotSessionStore
+from session_store import InMemorySessionStore
+
+
+def per_call_us(elapsed: float, calls: int) -> float:
+    return round(elapsed / calls * 1e6, 3)
+
+
+def open_store(directory: str, max_sessions: int) -> SnapshotSessionStore:
+    # the benchmark flushes explicitly; a long interval keeps the writer idle
+    return SnapshotSessionStore(directory, ttl_seconds=0, max_sessions=max_sessions, flush_interval=3600)
+
+
+def run_size(sessions: int, turns: int, lookups: int, results: Dict[str, float]) -> None:
+    built = [typed_session(n, turns) for n in range(sessions)]
+    ids = [f"session-{n}" for n in range(sessions)]
+    directory = tempfile.mkdtemp(prefix="bench-snapshot-")
+    try:
+        memory = InMemorySessionStore(ttl_seconds=0, max_sessions=0)
+        started = time.perf_counter()
+        for session_id, session in zip(ids, built):
+            memory.put(session_id, session)
+        memory_put = time.perf_counter() - started
+
+        store = open_store(directory, max_sessions=0)
+        started = time.perf_counter()
+        for session_id, session in zip(ids, built):
+            store.put(session_id, session)
+        snapshot_put = time.perf_counter() - started
+
+        started = time.perf_counter()
+        store.flush()
+        flush = time.perf_counter() - started
+        started = time.perf_counter()
+        store.snapshot()
+        snapshot = time.perf_counter() - started
+        store.close()
+        snapshot_bytes = os.path.getsize(store.snapshot_path)
+        # a restart is a fresh process: nothing left for the collector to walk
+        del memory, store
+        gc.collect()
+
+        started = time.perf_counter()
+        store = open_store(directory, max_sessions=0)
+        restart = time.perf_counter() - started
+
+        sample = random.Random(7).sample(ids, min(lookups, sessions))
+        started = time.perf_counter()
+        for session_id in sample:
+            assert store.get(session_id) is not None
+        first_get = time.perf_counter() - started
+        store.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    row = {
+        "memory_put_us": per_call_us(memory_put, sessions),
+        "snapshot_put_us": per_call_us(snapshot_put, sessions),
+        "flush_us_per_session": per_call_us(flush, sessions),
+        "snapshot_us_per_session": per_call_us(snapshot, sessions),
+        "snapshot_bytes_per_session": round(snapshot_bytes / sessions, 1),
+        "restart_ms": round(restart * 1000, 3),
+        "first_get_us": per_call_us(first_get, len(sample)),
+    }
+    print(
+        f"{sessions:>7} sessions  put {row['snapshot_put_us']:.2f} us (memory {row['memory_put_us']:.2f})  "
+        f"flush {flush * 1000:.0f} ms  snapshot {snapshot * 1000:.0f} ms "
+        f"({snapshot_bytes / 2**20:.1f} MiB)  restart {row['restart_ms']:.2f} ms  "
+        f"first get {row['first_get_us']:.1f} us"
+    )
+    for key, value in row.items():
+        results[f"{key}_{sessions}"] = value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--turns", type=int, default=6, help="user/bot exchanges per session")
+    parser.add_argument("--lookups", type=int, default=1000, help="sessions read back after the restart")
+    parser.add_argument("--save", metavar="BASELINE", help="save results as this baseline name or path")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare results with this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results: Dict[str, float] = {}
+    sizes: List[int] = sorted(args.sizes)
+    for sessions in sizes:
+        run_size(sessions, args.turns, args.lookups, results)
+    if len(sizes) > 1:
+        smallest, largest = sizes[0], sizes[-1]
+        growth = results[f"restart_ms_{largest}"] / max(results[f"restart_ms_{smallest}"], 1e-6)
+        print(f"restart time x{growth:.1f} for x{largest / smallest:.0f} sessions")
+
+    if args.save:
+        print(f"saved baseline {save_baseline(args.save, results)}")
+    if args.compare:
+        print(f"compared with {args.compare}:")
+        if compare_to_baseline(args.compare, results, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Speed and accuracy of the spelling corrector.
+
+Reports microseconds per message for the corpus and the labelled cases in
+``data/spelling_cases.json``, both cold (no token cache) and warm, the time
+to build the symmetric-delete index, and how many labelled cases come out
+exactly as expected. Runs with ``GRIEVANCE_CITY`` set to ``--city`` so that
+city place names are in the vocabulary. ``--save`` stores the run as a
+baseline and ``--compare`` checks a run against one (non-zero exit on
+regression).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import timeit
+from typing import Dict, List
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CORPUS = os.path.join(DATA_DIR, "conversations.json")
+CASES = os.path.join(DATA_DIR, "spelling_cases.json")
+HIGHER_IS_BETTER = ("case_accuracy",)
+
+
+def load_messages(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as handle:
+        conversations = json.load(handle)
+    return [turn["say"] for conversation in conversations for turn in conversation["turns"]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--city", default="ghaziabad")
+    parser.add_argument("--number", type=int, default=50)
+    parser.add_argument("--save", metavar="BASELINE", help="save results as this baseline name or path")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare results with this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    os.environ["GRIEVANCE_CITY"] = args.city
+    import app
+    from benchmarks.baseline import compare_to_baseline, save_baseline
+    from spelling import SpellingCorrector
+
+    with open(CASES, "r", encoding="utf-8") as handle:
+        cases = json.load(handle)
+    messages = load_messages(CORPUS) + [case["text"] for case in cases]
+    warm = app.spelling_corrector
+
+    started = time.perf_counter()
+    cold = SpellingCorrector(
+        app._spelling_words,
+        protected=app._protected_words,
+        corrections=app.SPELLING_CORRECTIONS,
+        cache_size=0,
+        known=app._known_words,
+    )
+    build_ms = (time.perf_counter() - started) * 1000
+
+    results: Dict[str, float] = {"index_build_ms": round(build_ms, 3)}
+    for name, corrector in (("cold", cold), ("warm", warm)):
+        run = lambda: [corrector.correct(message) for message in messages]
+        run()
+        best = min(timeit.repeat(run, number=args.number, repeat=3))
+        results[f"{name}_us_per_message"] = round(best / args.number / len(messages) * 1e6, 3)
+
+    wrong = [case for case in cases if warm.correct(case["text"]) != case["expect"]]
+    results["case_accuracy"] = round(1 - len(wrong) / len(cases), 3)
+
+    stats = warm.stats()
+    print(
+        f"vocabulary {stats['vocabulary']} words (+{stats['known_words']} known), "
+        f"{stats['index_keys']} index keys, built in {build_ms:.1f} ms"
+    )
+    print(f"cold  {results['cold_us_per_message']:9.3f} us/message")
+    print(f"warm  {results['warm_us_per_message']:9.3f} us/message")
+    print(f"cases {len(cases) - len(wrong)}/{len(cases)} corrected as expected")
+    for case in wrong:
+        print(f"  {case['text']!r} -> {warm.correct(case['text'])!r}, expected {case['expect']!r}")
+
+    if args.save:
+        print(f"saved baseline {save_baseline(args.save, results)}")
+    if args.compare:
+        print(f"compared with {args.compare}:")
+        if compare_to_baseline(args.compare, results, args.tolerance, HIGHER_IS_BETTER):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Cold-start cost: importing the app and the time to the first successful chat.
+
+Every run starts a fresh interpreter, so nothing is cached between runs,
+and reports the median over ``--runs``:
+
+* ``import_app_ms``: ``import app``,
+* ``ready_ms``: from interpreter start of the import to ``/ready`` answering 200
+  (startup warm-up finished),
+* ``first_chat_ms``: from the start of the import to the first ``/chat``
+  answer, sent as soon as the server starts, against the fake model in
+  ``fake_gemini``,
+* ``import_provider_ms``: ``import google.generativeai`` on its own, the
+  import the app no longer pays up front (skipped when not installed).
+
+``--save`` stores the run as a baseline and ``--compare`` checks a run
+against one (non-zero exit on regression).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+from benchmarks.baseline import compare_to_baseline, save_baseline
+
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_FIRST_CHAT = """
+import asyncio, json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+import httpx
+from benchmarks.fake_gemini import FakeGemini
+
+app.use_gemini_model_factory(FakeGemini().model)
+
+
+async def main():
+    async with app.lifespan(app.app):
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://bench")
+        response = await client.post("/chat", json={"session_id": "cold", "text": "streetlight broken near sector 5"})
+        response.raise_for_status()
+        chatted = time.perf_counter()
+        while (await client.get("/ready")).status_code != 200:
+            await asyncio.sleep(0.001)
+        ready = time.perf_counter()
+        await client.aclose()
+    return chatted, ready
+
+
+chatted, ready = asyncio.run(main())
+print(json.dumps({
+    "import_app_ms": (imported - started) * 1000,
+    "first_chat_ms": (chatted - started) * 1000,
+    "ready_ms": (ready - started) * 1000,
+}))
+"""
+
+_IMPORT_PROVIDER = """
+import json, time
+started = time.perf_counter()
+try:
+    import google.generativeai
+except Exception:
+    print("{}")
+else:
+    print(json.dumps({"import_provider_ms": (time.perf_counter() - started) * 1000}))
+"""
+
+
+def run_child(code: str) -> Dict[str, float]:
+    env = dict(os.environ, GEMINI_API_KEY="", SESSION_BACKEND="memory")
+    done = subprocess.run(
+        [sys.executable, "-c", code], cwd=ML_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--save", metavar="BASELINE", help="save results as this baseline name or path")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare results with this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    samples: Dict[str, List[float]] = {}
+    for _ in range(args.runs):
+        for code in (_FIRST_CHAT, _IMPORT_PROVIDER):
+            for key, value in run_child(code).items():
+                samples.setdefault(key, []).append(value)
+
+    results = {key: round(statistics.median(values), 1) for key, values in samples.items()}
+    for key, value in results.items():
+        print(f"{key:<20} {value:8.1f}  (min {min(samples[key]):.1f}, max {max(samples[key]):.1f})")
+
+    if args.save:
+        print(f"saved baseline {save_baseline(args.save, results)}")
+    if args.compare:
+        print(f"compared with {args.compare}:")
+        if compare_to_baseline(args.compare, results, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
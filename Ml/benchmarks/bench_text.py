@@ -0,0 +1,98 @@
+"""Micro-benchmarks for the pure text-processing steps of a chat turn.
+
+Times each function over the user messages of the conversation corpus and
+reports microseconds per call. ``--save`` stores the run as a baseline and
+``--compare`` checks a run against one (non-zero exit on regression).
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+import app
+from benchmarks.baseline import compare_to_baseline, save_baseline
+
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "conversations.json")
+
+PARTIAL_DATA = {
+    "department": "Sanitation",
+    "description": "garbage pile near the school",
+    "address": None,
+    "timing": None,
+    "specific_details": None,
+    "title": None,
+}
+
+COMPLETE_DATA = {
+    "department": "Water",
+    "description": "pipe leaking on mg road and the street is flooded",
+    "address": "near shop 4, mg road market",
+    "timing": "since yesterday evening",
+    "specific_details": "shops cannot open",
+    "title": None,
+}
+
+
+def load_messages(path: str):
+    with open(path, "r", encoding="utf-8") as handle:
+        conversations = json.load(handle)
+    return [turn["say"] for conversation in conversations for turn in conversation["turns"]]
+
+
+def cases(messages):
+    corrected = [app.correct_spelling(message) for message in messages]
+    departments = ["sanitation", "Water", "street light", "potholes on road", "unknown thing"]
+    return {
+        "correct_spelling": lambda: [app.correct_spelling(message) for message in messages],
+        "recognize_intent": lambda: [app.recognize_intent(message) for message in corrected],
+        "fallback_extract": lambda: [app._fallback_extract(PARTIAL_DATA, message) for message in messages],
+        "rules_first_extract": lambda: [
+            app._rules_first_extract(PARTIAL_DATA, "address", message, fixed) for message, fixed in zip(messages, corrected)
+        ],
+        # bypass the lru_cache so routing itself is measured
+        "normalize_department": lambda: [
+            app._normalize_department.__wrapped__(value) for value in departments
+        ],
+        "confirmation_summary": lambda: app.confirmation_summary(COMPLETE_DATA),
+        "build_complaint_data": lambda: app.build_complaint_data(COMPLETE_DATA),
+    }, {
+        "correct_spelling": len(messages),
+        "recognize_intent": len(messages),
+        "fallback_extract": len(messages),
+        "rules_first_extract": len(messages),
+        "normalize_department": len(departments),
+        "confirmation_summary": 1,
+        "build_complaint_data": 1,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--number", type=int, default=300)
+    parser.add_argument("--save", metavar="BASELINE", help="save results as this baseline name or path")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare results with this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    functions, calls = cases(load_messages(args.corpus))
+    results = {}
+    for name, function in functions.items():
+        function()  # warm caches and the department router's token memo
+        best = min(timeit.repeat(function, number=args.number, repeat=3))
+        results[f"{name}_us"] = round(best / args.number / calls[name] * 1e6, 3)
+        print(f"{name:<22} {results[f'{name}_us']:9.3f} us/call")
+
+    if args.save:
+        print(f"saved baseline {save_baseline(args.save, results)}")
+    if args.compare:
+        print(f"compared with {args.compare}:")
+        if compare_to_baseline(args.compare, results, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Local stand-in for ``google.generativeai.GenerativeModel``.
+
+``FakeGemini.model`` has the signature expected by
+``app.use_gemini_model_factory``. Every model it builds records what each
+call sends (system instruction and per-turn contents) in the shared
+``calls`` list, and answers with JSON that follows the schema in its system
+instruction, so the whole chat pipeline runs without network access.
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+Responder = Callable[[Optional[str], str], Dict[str, Any]]
+
+_FIELD_SCHEMA = re.compile(r'Return ONLY JSON: \{"(\w+)"')
+_LATEST_MESSAGE = re.compile(r"Latest user message:\n(.*?)\n\nawaiting_field=(\w+)", re.S)
+
+
+def echo_responder(system_instruction: Optional[str], contents: str) -> Dict[str, Any]:
+    """Answer like a cooperative model: the latest message fills the field being asked for."""
+    field_match = _FIELD_SCHEMA.search(system_instruction or "")
+    if field_match:
+        reply = contents.split("Citizen reply:", 1)[-1].strip()
+        return {field_match.group(1): reply or None}
+
+    message, awaiting = "", "None"
+    latest = _LATEST_MESSAGE.search(contents)
+    if latest:
+        message, awaiting = latest.group(1).strip(), latest.group(2)
+    field = awaiting if awaiting != "None" else "description"
+    return {
+        "assistant_ack": "Thank you, noted.",
+        "extracted_data": {field: message or None},
+        "next_question": "Could you share the next detail?",
+        "missing_fields": [],
+    }
+
+
+class _Text:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class _AsyncStream:
+    def __init__(self, pieces: List[str]) -> None:
+        self.pieces = pieces
+        self.text = "".join(pieces)
+
+    async def __aiter__(self):
+        for piece in self.pieces:
+            await asyncio.sleep(0)
+            yield _Text(piece)
+
+
+class FakeGeminiModel:
+    def __init__(self, owner: "FakeGemini", model_name: str, system_instruction: Optional[str]) -> None:
+        self.owner = owner
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+
+    def _answer(self, contents: Any) -> str:
+        owner = self.owner
+        text = contents if isinstance(contents, str) else json.dumps(contents)
+        owner.call_count += 1
+        if owner.record_calls:
+            owner.calls.append(
+                {
+                    "system_instruction": self.system_instruction,
+                    "contents": text,
+                    "bytes": len(text.encode("utf-8")),
+                }
+            )
+        if owner.error_rate and owner.random.random() < owner.error_rate:
+            raise RuntimeError("fake Gemini error")
+        return json.dumps(owner.responder(self.system_instruction, text))
+
+    def _pieces(self, text: str) -> List[str]:
+        size = self.owner.chunk_chars
+        return [text[index : index + size] for index in range(0, len(text), size)]
+
+    def generate_content(self, contents: Any, stream: bool = False, **_: Any):
+        text = self._answer(contents)
+        time.sleep(self.owner.latency())
+        return iter([_Text(piece) for piece in self._pieces(text)]) if stream else _Text(text)
+
+    async def generate_content_async(self, contents: Any, stream: bool = False, **_: Any):
+        text = self._answer(contents)
+        await asyncio.sleep(self.owner.latency())
+        return _AsyncStream(self._pieces(text)) if stream else _Text(text)
+
+
+class FakeGemini:
+    """Factory of stand-in models sharing one call log and behaviour.
+
+    ``latency_seconds`` is the median response time; ``latency_jitter``
+    spreads it log-normally so a few calls are much slower, like the real
+    provider. A share ``error_rate`` of calls raises. ``call_count`` counts
+    every call; ``calls`` keeps their details unless ``record_calls`` is off.
+    """
+
+    def __init__(
+        self,
+        responder: Responder = echo_responder,
+        latency_seconds: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        chunk_chars: int = 24,
+        seed: Optional[int] = None,
+        record_calls: bool = True,
+    ) -> None:
+        self.responder = responder
+        self.latency_seconds = latency_seconds
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.chunk_chars = chunk_chars
+        self.random = random.Random(seed)
+        self.record_calls = record_calls
+        self.call_count = 0
+        self.calls: List[Dict[str, Any]] = []
+
+    def latency(self) -> float:
+        if not self.latency_seconds:
+            return 0.0
+        if not self.latency_jitter:
+            return self.latency_seconds
+        return self.latency_seconds * self.random.lognormvariate(0.0, self.latency_jitter)
+
+    def model(self, model_name: str, system_instruction: Optional[str] = None) -> FakeGeminiModel:
+        return FakeGeminiModel(self, model_name, system_instruction)
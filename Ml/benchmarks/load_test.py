@@ -0,0 +1,205 @@
+"""End-to-end load test of the chat pipeline against the fake Gemini model.
+
+Replays the scripted conversations of ``data/conversations.json`` many
+times concurrently, either through ``handle_conversation`` directly or
+through the FastAPI app over an in-process ASGI transport (``--target
+http``). The fake model's latency, jitter and error rate are configurable
+and seeded, so runs are repeatable.
+
+Reports throughput, turn latency percentiles, memory per live session, LLM
+calls per completed complaint and which ``action`` values were reached.
+``--save`` stores the run as a baseline and ``--compare`` checks a run
+against one (non-zero exit on regression).
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List
+
+import app
+from benchmarks.baseline import compare_to_baseline, save_baseline
+from benchmarks.fake_gemini import FakeGemini
+
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "conversations.json")
+ACTIONS = {"gather_info", "confirm_info", "trigger_registration", "reset"}
+HIGHER_IS_BETTER = ("turns_per_second", "conversations_per_second")
+
+Send = Callable[[str, str], Awaitable[str]]
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def percentile(ordered: List[float], share: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+async def direct_sender() -> Send:
+    async def send(session_id: str, text: str) -> str:
+        return (await app.handle_conversation(session_id, text)).action
+
+    return send
+
+
+async def http_sender(stack: List[Any]) -> Send:
+    import httpx
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://bench")
+    stack.append(client)
+
+    async def send(session_id: str, text: str) -> str:
+        response = await client.post("/chat", json={"session_id": session_id, "text": text})
+        response.raise_for_status()
+        return response.json()["action"]
+
+    return send
+
+
+async def run_load(
+    send: Send, corpus: List[Dict[str, Any]], conversations: int, concurrency: int, tag: str
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    actions: Dict[str, int] = {}
+    mismatches = 0
+    failures = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def converse(index: int) -> None:
+        nonlocal mismatches, failures
+        script = corpus[index % len(corpus)]
+        session_id = f"{tag}-{index}"
+        async with slots:
+            for turn in script["turns"]:
+                started = time.perf_counter()
+                try:
+                    action = await send(session_id, turn["say"])
+                except Exception:
+                    failures += 1
+                    return
+                latencies.append(time.perf_counter() - started)
+                actions[action] = actions.get(action, 0) + 1
+                if action != turn.get("expect", action):
+                    mismatches += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(converse(index) for index in range(conversations)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "latencies": latencies,
+        "actions": actions,
+        "mismatches": mismatches,
+        "failures": failures,
+    }
+
+
+async def memory_per_session(send: Send, corpus: List[Dict[str, Any]], sessions: int) -> float:
+    """Traced bytes retained per session for conversations left half-way through."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for index in range(sessions):
+        script = corpus[index % len(corpus)]
+        for turn in script["turns"][: max(1, len(script["turns"]) // 2)]:
+            await send(f"memory-{index}", turn["say"])
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / sessions
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, float]:
+    corpus = load_corpus(args.corpus)
+    fake = FakeGemini(
+        latency_seconds=args.latency,
+        latency_jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        record_calls=False,
+    )
+    app.use_gemini_model_factory(fake.model)
+    if not args.cache:
+        app.llm_cache.max_entries = 0
+
+    stack: List[Any] = []
+    send = await (http_sender(stack) if args.target == "http" else direct_sender())
+    try:
+        run = await run_load(send, corpus, args.conversations, args.concurrency, "load")
+        calls = fake.call_count
+        # the memory phase runs without model latency; only retained bytes matter
+        fake.latency_seconds = 0.0
+        memory = await memory_per_session(send, corpus, args.memory_sessions)
+    finally:
+        for client in stack:
+            await client.aclose()
+
+    latencies = run["latencies"]
+    turns = len(latencies)
+    completed = run["actions"].get("trigger_registration", 0)
+    results = {
+        "turns_per_second": turns / run["elapsed"],
+        "conversations_per_second": args.conversations / run["elapsed"],
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "memory_per_session_kb": memory / 1024,
+        "llm_calls_per_complaint": calls / completed if completed else 0.0,
+    }
+
+    print(
+        f"{args.target}: {args.conversations} conversations, {turns} turns, concurrency {args.concurrency}, "
+        f"fake latency {args.latency}s jitter {args.jitter} error rate {args.error_rate}"
+    )
+    for metric, value in results.items():
+        print(f"  {metric:<26} {value:10.3f}")
+    print(f"  actions: {dict(sorted(run['actions'].items()))}")
+    missing = ACTIONS - set(run["actions"])
+    if missing:
+        print(f"  actions never reached: {sorted(missing)}")
+    print(f"  turns with an unexpected action: {run['mismatches']}, failed conversations: {run['failures']}")
+    print(f"  extraction tiers: {app.extraction_tier_stats()}")
+    print(f"  scheduler: {app.llm_scheduler.stats()}")
+    return {metric: round(value, 3) for metric, value in results.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=("direct", "http"), default="direct")
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--conversations", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.05, help="median fake LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="log-normal sigma of the fake latency")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--cache", action="store_true", help="keep the LLM response cache enabled")
+    parser.add_argument("--memory-sessions", type=int, default=500)
+    parser.add_argument("--save", metavar="BASELINE", help="save results as this baseline name or path")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare results with this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.save:
+        print(f"saved baseline {save_baseline(args.save, results)}")
+    if args.compare:
+        print(f"compared with {args.compare}:")
+        if compare_to_baseline(args.compare, results, args.tolerance, HIGHER_IS_BETTER):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import asyncio
+import json
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+
+_CLOSE = object()
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class TurnEventStream:
+    """Events produced while one chat turn runs, delivered as Server-Sent Events.
+
+    Stages emit events as soon as their part of the answer is known; each
+    event (or ``key``, for events sent once per item such as "field") is sent
+    at most once per turn. Iterating the stream yields
+    formatted SSE frames until ``close`` is called; later events are dropped.
+    """
+
+    def __init__(self) -> None:
+        self._queue: "asyncio.Queue[Any]" = asyncio.Queue()
+        self._sent: Set[str] = set()
+        self._closed = False
+
+    def emit(self, event: str, data: Dict[str, Any], key: Optional[str] = None) -> None:
+        dedupe_key = key or event
+        if self._closed or dedupe_key in self._sent:
+            return
+        self._sent.add(dedupe_key)
+        self._queue.put_nowait((event, data))
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._queue.put_nowait(_CLOSE)
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        while True:
+            item = await self._queue.get()
+            if item is _CLOSE:
+                return
+            event, data = item
+            yield format_sse(event, data)
+
+
+current_turn_events: ContextVar[Optional[TurnEventStream]] = ContextVar(
+    "current_turn_events", default=None
+)
+
+
+def emit_turn_event(event: str, data: Dict[str, Any], key: Optional[str] = None) -> None:
+    """Send an event to the streaming client of the current turn, if there is one."""
+    stream = current_turn_events.get()
+    if stream is not None:
+        stream.emit(event, data, key)
+
+
+def streaming_turn() -> bool:
+    return current_turn_events.get() is not None
+
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+
+
+class DepartmentRoute(NamedTuple):
+    department: Optional[str]
+    score: float
+    confidence: float
+
+
+class _Keyword:
+    __slots__ = ("words", "department", "rank")
+
+    def __init__(self, words: Tuple[str, ...], department: str) -> None:
+        self.words = words
+        self.department = department
+        # more words first, then more characters: the more specific keyword wins
+        self.rank = (len(words), sum(len(word) for word in words))
+
+
+class DepartmentRouter:
+    """Keyword index mapping free text to a department in one pass.
+
+    Keywords are word stems: every word of a keyword must be a prefix of the
+    matching word in the text ("electric" matches "electricity", "street
+    light" matches "street lights"). At each position the longest keyword
+    wins and its words are consumed, so "street light" does not also count
+    as "street".
+
+    Each match adds its word count to its department's score. The route is
+    the highest-scoring department; ties go to the department matched
+    earliest in the text. ``confidence`` is the winner's share of the total
+    score, so 1.0 means no other department was mentioned.
+    """
+
+    def __init__(self, keywords: Mapping[str, Iterable[str]], token_cache_size: int = 50000) -> None:
+        self._index: Dict[str, List[_Keyword]] = {}
+        for department, phrases in keywords.items():
+            for phrase in phrases:
+                words = tuple(_WORD.findall(phrase.lower()))
+                if words:
+                    self._index.setdefault(words[0], []).append(_Keyword(words, department))
+        for candidates in self._index.values():
+            candidates.sort(key=lambda keyword: keyword.rank, reverse=True)
+        self._stem_lengths = sorted({len(stem) for stem in self._index}, reverse=True)
+        # token -> keywords whose first word is a prefix of it, most specific first
+        self._token_cache: Dict[str, Tuple[_Keyword, ...]] = {}
+        self._token_cache_size = token_cache_size
+
+    def _candidates(self, token: str) -> Tuple[_Keyword, ...]:
+        cached = self._token_cache.get(token)
+        if cached is not None:
+            return cached
+
+        found: List[_Keyword] = []
+        for length in self._stem_lengths:
+            if length <= len(token):
+                found.extend(self._index.get(token[:length], ()))
+        found.sort(key=lambda keyword: keyword.rank, reverse=True)
+        candidates = tuple(found)
+        if len(self._token_cache) >= self._token_cache_size:
+            self._token_cache.clear()
+        self._token_cache[token] = candidates
+        return candidates
+
+    @staticmethod
+    def _match_at(
+        candidates: Sequence[_Keyword], tokens: Sequence[str], index: int
+    ) -> Optional[_Keyword]:
+        for keyword in candidates:
+            if len(keyword.words) == 1:
+                return keyword
+            if index + len(keyword.words) > len(tokens):
+                continue
+            if all(
+                tokens[index + offset].startswith(word)
+                for offset, word in enumerate(keyword.words[1:], start=1)
+            ):
+                return keyword
+        return None
+
+    def route(self, text: str) -> DepartmentRoute:
+        tokens = _WORD.findall(text.lower())
+        token_cache = self._token_cache
+        # dicts keep insertion order, which is the order of first mention
+        scores: Dict[str, float] = {}
+        index = 0
+        while index < len(tokens):
+            candidates = token_cache.get(tokens[index])
+            if candidates is None:
+                candidates = self._candidates(tokens[index])
+            keyword = self._match_at(candidates, tokens, index) if candidates else None
+            if keyword is None:
+                index += 1
+                continue
+            scores[keyword.department] = scores.get(keyword.department, 0.0) + len(keyword.words)
+            index += len(keyword.words)
+
+        if not scores:
+            return DepartmentRoute(None, 0.0, 0.0)
+        department = max(scores, key=scores.__getitem__)
+        score = scores[department]
+        return DepartmentRoute(department, score, score / sum(scores.values()))
+
+
+def load_keyword_table(
+    base: Mapping[str, Sequence[str]],
+    path: Optional[str],
+    city: Optional[str],
+    departments: Sequence[str],
+) -> Dict[str, List[str]]:
+    """Merge ``base`` with the "common" and per-city sections of a JSON keyword file.
+
+    The file looks like ``{"common": {"Water": ["tap", ...]}, "cities":
+    {"ghaziabad": {...}}}``. Keywords for departments outside ``departments``
+    are ignored with a warning; a missing file just leaves ``base``.
+    """
+    table: Dict[str, List[str]] = {department: list(words) for department, words in base.items()}
+    if not path or not os.path.exists(path):
+        if path:
+            logger.warning("Department keyword file not found: %s", path)
+        return table
+
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except Exception:
+        logger.exception("Failed reading department keyword file: %s", path)
+        return table
+
+    sections = [payload.get("common", {})]
+    if city:
+        city_table = payload.get("cities", {}).get(city.strip().lower())
+        if city_table is None:
+            logger.warning("No department keywords for city %s in %s", city, path)
+        else:
+            sections.append(city_table)
+
+    for section in sections:
+        for department, words in section.items():
+            if department not in departments:
+                logger.warning("Ignoring keywords for unknown department %s", department)
+                continue
+            table.setdefault(department, []).extend(words)
+    return table
@@ -0,0 +1,139 @@
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+_WORD = re.compile(r"\w+")
+
+
+class IntentRule:
+    """One declarative intent rule over normalized (lowercased, single-spaced) text.
+
+    A rule matches when the whole message is one of ``exact``, when the
+    message starts with one of ``prefixes``, or when one of ``phrases``
+    appears anywhere on word boundaries (like ``\\bphrase\\b``). Weak rules
+    only decide the intent when no strong rule matched, exactly one weak
+    intent matched and the message has at most ``max_words`` words.
+    """
+
+    __slots__ = ("intent", "phrases", "exact", "prefixes", "weak", "max_words")
+
+    def __init__(
+        self,
+        intent: str,
+        phrases: Iterable[str] = (),
+        exact: Iterable[str] = (),
+        prefixes: Iterable[str] = (),
+        weak: bool = False,
+        max_words: Optional[int] = None,
+    ) -> None:
+        self.intent = intent
+        self.phrases = tuple(phrases)
+        self.exact = frozenset(exact)
+        self.prefixes = tuple(prefixes)
+        if not (self.phrases or self.exact or self.prefixes):
+            raise ValueError(f"Intent rule for {intent!r} has nothing to match")
+        self.weak = weak
+        self.max_words = max_words
+
+
+class _Phrase:
+    __slots__ = ("words", "gaps", "priority", "weak")
+
+    def __init__(self, words: Tuple[str, ...], gaps: Tuple[str, ...], priority: int, weak: bool) -> None:
+        self.words = words
+        self.gaps = gaps
+        self.priority = priority
+        self.weak = weak
+
+
+def _split_phrase(phrase: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    matches = list(_WORD.finditer(phrase))
+    if not matches or matches[0].start() != 0 or matches[-1].end() != len(phrase):
+        raise ValueError(f"Intent phrase must start and end with a word character: {phrase!r}")
+    words = tuple(m.group() for m in matches)
+    gaps = tuple(phrase[a.end() : b.start()] for a, b in zip(matches, matches[1:]))
+    return words, gaps
+
+
+class IntentEngine:
+    """Classifies normalized text against an ordered list of ``IntentRule``.
+
+    Rules are listed in priority order and the first matching rule wins. All
+    phrases are indexed once by their first word, so classifying a message is
+    one tokenizing pass plus a dict lookup per word; multi-word phrases are
+    then confirmed word by word, including the exact separators between them.
+    """
+
+    def __init__(self, rules: Sequence[IntentRule], default: str = "unknown") -> None:
+        self.rules: List[IntentRule] = list(rules)
+        self.default = default
+        self._unmatched = len(self.rules)
+
+        self._exact: Dict[str, int] = {}
+        self._prefixes: List[Tuple[int, Tuple[str, ...]]] = []
+        self._by_first_word: Dict[str, List[_Phrase]] = {}
+        seen_weak = False
+        for priority, rule in enumerate(self.rules):
+            if seen_weak and not rule.weak:
+                raise ValueError(f"Strong intent rule {rule.intent!r} listed after a weak rule")
+            seen_weak = seen_weak or rule.weak
+            for text in rule.exact:
+                self._exact.setdefault(text, priority)
+            if rule.prefixes:
+                self._prefixes.append((priority, rule.prefixes))
+            for phrase in rule.phrases:
+                words, gaps = _split_phrase(phrase)
+                self._by_first_word.setdefault(words[0], []).append(
+                    _Phrase(words, gaps, priority, rule.weak)
+                )
+
+    def classify(self, lowered: str) -> str:
+        best = self._exact.get(lowered, self._unmatched)
+        for priority, prefixes in self._prefixes:
+            if priority >= best:
+                break
+            if lowered.startswith(prefixes):
+                best = priority
+                break
+
+        # weak rules come after every strong rule, so once a strong rule has
+        # matched the ``priority >= best`` check below skips them as well
+        weak: Set[int] = set()
+        tokens = list(_WORD.finditer(lowered))
+        by_first_word = self._by_first_word
+        for index, token in enumerate(tokens):
+            candidates = by_first_word.get(token.group())
+            if not candidates:
+                continue
+            for phrase in candidates:
+                if phrase.priority >= best:
+                    continue
+                if len(phrase.words) > 1 and not self._matches_at(lowered, tokens, index, phrase):
+                    continue
+                if phrase.weak:
+                    weak.add(phrase.priority)
+                else:
+                    best = phrase.priority
+
+        if best < self._unmatched:
+            return self.rules[best].intent
+
+        weak_intents = {self.rules[priority].intent for priority in weak}
+        if len(weak_intents) == 1:
+            word_count = len(lowered.split())
+            limits = [self.rules[p].max_words for p in weak if self.rules[p].max_words is not None]
+            if all(word_count <= limit for limit in limits):
+                return weak_intents.pop()
+        return self.default
+
+    @staticmethod
+    def _matches_at(lowered: str, tokens: List["re.Match[str]"], index: int, phrase: _Phrase) -> bool:
+        if index + len(phrase.words) > len(tokens):
+            return False
+        for offset in range(1, len(phrase.words)):
+            previous, current = tokens[index + offset - 1], tokens[index + offset]
+            if current.group() != phrase.words[offset]:
+                return False
+            if lowered[previous.end() : current.start()] != phrase.gaps[offset - 1]:
+                return False
+        return True
@@ -0,0 +1,171 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+Member = Tuple[Tuple[str, ...], Any]
+
+_WHITESPACE = " \t\r\n"
+_NUMBER_END = frozenset(",}] \t\r\n")
+_INCOMPLETE = object()
+
+
+class StreamingJsonObjectParser:
+    """Incremental parser for one JSON object arriving in arbitrary text chunks.
+
+    ``feed`` returns the members completed by that chunk as ``(path, value)``
+    pairs, in document order. Top-level members have a one-element path.
+    Objects whose key is listed in ``expand`` are also reported member by
+    member (``("extracted_data", "address")``) before the whole object is
+    reported under its own key. Text before the first ``{`` (such as a
+    markdown fence) is skipped.
+
+    Parsing only moves forward: completed values are never decoded again, and
+    an unfinished string is not retried until a new quote character arrives.
+    Malformed input simply stops producing members and sets ``malformed``;
+    ``complete`` is only set once the top-level object has closed, so callers
+    can tell a whole object from one cut short.
+    """
+
+    def __init__(self, expand: Iterable[str] = ()) -> None:
+        self.expand = frozenset(expand)
+        self.result: Dict[str, Any] = {}
+        self.done = False
+        self.complete = False
+        self.malformed = False
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        # where to look for the closing quote of an unfinished string
+        self._quote_search_from = 0
+        self._state = "start"
+        self._key: Optional[str] = None
+        # (key, object) of the expanded object being filled, if any
+        self._nested: Optional[Tuple[str, Dict[str, Any]]] = None
+
+    def has(self, *keys: str) -> bool:
+        return all(key in self.result for key in keys)
+
+    def feed(self, chunk: str) -> List[Member]:
+        self._buffer += chunk
+        members: List[Member] = []
+        while not self.done and self._step(members):
+            pass
+        return members
+
+    def _skip_whitespace(self) -> bool:
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return pos < len(buffer)
+
+    def _step(self, members: List[Member]) -> bool:
+        """Advance one token; False means more input is needed."""
+        if self._state == "start":
+            start = self._buffer.find("{", self._pos)
+            if start == -1:
+                self._pos = len(self._buffer)
+                return False
+            self._pos = start + 1
+            self._state = "key"
+            return True
+
+        if not self._skip_whitespace():
+            return False
+        char = self._buffer[self._pos]
+
+        if self._state == "next":
+            # after a member: another one, or the end of the object
+            if char == ",":
+                self._pos += 1
+                self._state = "key"
+                return True
+            if char == "}":
+                self._pos += 1
+                self._close_object(members)
+                self._state = "next"
+                return True
+            self._stop_malformed()
+            return False
+
+        if self._state == "key":
+            if char == "}":
+                self._pos += 1
+                self._close_object(members)
+                self._state = "next"
+                return True
+            if char != '"':
+                self._stop_malformed()
+                return False
+            decoded = self._decode()
+            if decoded is _INCOMPLETE:
+                return False
+            self._key = decoded
+            self._state = "colon"
+            return True
+
+        if self._state == "colon":
+            if char != ":":
+                self._stop_malformed()
+                return False
+            self._pos += 1
+            self._state = "value"
+            return True
+
+        # state == "value"
+        key = self._key or ""
+        if char == "{" and self._nested is None and key in self.expand:
+            self._pos += 1
+            self._nested = (key, {})
+            self._state = "key"
+            return True
+        value = self._decode()
+        if value is _INCOMPLETE:
+            return False
+        self._add_member(key, value, members)
+        self._state = "next"
+        return True
+
+    def _stop_malformed(self) -> None:
+        self.done = True
+        self.malformed = True
+
+    def _decode(self) -> Any:
+        """Decode the value at the current position, or return ``_INCOMPLETE`` if it is not all here yet."""
+        if self._buffer[self._pos] == '"':
+            search_from = max(self._pos + 1, self._quote_search_from)
+            if self._buffer.find('"', search_from) == -1:
+                self._quote_search_from = len(self._buffer)
+                return _INCOMPLETE
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            # for a string, every quote received so far was escaped
+            self._quote_search_from = len(self._buffer)
+            return _INCOMPLETE
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            # a number is only complete once a delimiter follows it ("1" -> "1.5e3")
+            if end == len(self._buffer) or self._buffer[end] not in _NUMBER_END:
+                return _INCOMPLETE
+        self._pos = end
+        self._quote_search_from = end
+        return value
+
+    def _add_member(self, key: str, value: Any, members: List[Member]) -> None:
+        if self._nested is not None:
+            parent_key, nested = self._nested
+            nested[key] = value
+            members.append(((parent_key, key), value))
+        else:
+            self.result[key] = value
+            members.append(((key,), value))
+
+    def _close_object(self, members: List[Member]) -> None:
+        if self._nested is None:
+            self.done = True
+            self.complete = True
+            return
+        parent_key, nested = self._nested
+        self._nested = None
+        self.result[parent_key] = nested
+        members.append(((parent_key,), nested))
@@ -0,0 +1,368 @@
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from department_routing import DepartmentRoute, DepartmentRouter
+from intents import IntentEngine, IntentRule
+
+
+logger = logging.getLogger(__name__)
+
+_SPACES = re.compile(r"\s+")
+# Devanagari runs, Latin words and numbers, on lower-cased text
+_TOKEN = re.compile(r"[\u0900-\u097f]+|[a-z]+|[0-9]+")
+
+_VIRAMA = "्"
+_NUKTA = "़"
+_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "ळ": "l", "व": "v",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+    "क़": "k", "ख़": "kh", "ग़": "g", "ज़": "z", "ड़": "d", "ढ़": "dh", "फ़": "f", "य़": "y",
+}
+_VOWELS = {
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ii", "उ": "u", "ऊ": "uu", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au", "ऑ": "o", "ऍ": "e",
+}
+_MATRAS = {
+    "ा": "aa", "ि": "i", "ी": "ii", "ु": "u", "ू": "uu", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॉ": "o", "ॅ": "e",
+}
+_SIGNS = {"ं": "n", "ँ": "n", "ः": "h"}
+_DIGITS = {chr(0x0966 + value): str(value) for value in range(10)}
+
+# spelling variants of romanized Hindi, folded onto one form
+_FOLDS = (
+    ("chh", "ch"), ("ee", "i"), ("oo", "u"), ("w", "v"), ("z", "j"), ("q", "k"), ("ph", "f"),
+    ("kh", "k"), ("gh", "g"), ("ch", "c"), ("jh", "j"), ("th", "t"), ("dh", "d"), ("bh", "b"), ("sh", "s"),
+    # a nasal before b or p is written "m" in Latin but comes out "n" from the anusvara
+    ("mb", "nb"), ("mp", "np"),
+)
+_REPEATS = re.compile(r"([a-z])\1+")
+
+
+def transliterate(word: str) -> str:
+    """Latin spelling of a Devanagari word, with the usual dropped inherent vowels.
+
+    The inherent "a" of a consonant is dropped at the end of the word and
+    between a vowel and a consonant that carries its own vowel, so "बिजली"
+    gives "bijlii" and "सड़क" gives "sadak".
+    """
+    # (consonant, vowel) units; vowel None means the inherent "a"
+    units: List[List[Optional[str]]] = []
+    extra: Dict[int, str] = {}
+    for char in word:
+        if char in _CONSONANTS:
+            units.append([_CONSONANTS[char], None])
+        elif char in _MATRAS and units:
+            units[-1][1] = _MATRAS[char]
+        elif char == _VIRAMA and units:
+            units[-1][1] = ""
+        elif char in _VOWELS:
+            units.append(["", _VOWELS[char]])
+        elif char in _SIGNS and units:
+            extra[len(units) - 1] = extra.get(len(units) - 1, "") + _SIGNS[char]
+        elif char in _DIGITS:
+            units.append([_DIGITS[char], ""])
+        elif char == _NUKTA:
+            continue
+
+    def has_vowel(unit: List[Optional[str]]) -> bool:
+        return unit[1] is None or bool(unit[1])
+
+    if len(units) > 1 and units[-1][1] is None and units[-1][0]:
+        units[-1][1] = ""
+    for index in range(1, len(units) - 1):
+        unit = units[index]
+        if unit[1] is None and unit[0] and index not in extra:
+            following = units[index + 1]
+            if has_vowel(units[index - 1]) and following[0] and following[1]:
+                unit[1] = ""
+    return "".join(
+        consonant + ("a" if vowel is None else vowel) + extra.get(index, "")
+        for index, (consonant, vowel) in enumerate(units)
+    )
+
+
+def romanized_key(word: str) -> str:
+    """One spelling for the variants of a romanized word: "paani", "pani" -> "pani"."""
+    if not word.isascii():
+        word = transliterate(word)
+    for variant, folded in _FOLDS:
+        if variant in word:
+            word = word.replace(variant, folded)
+    return _REPEATS.sub(r"\1", word)
+
+
+class Token(NamedTuple):
+    key: str
+    start: int
+    end: int
+
+
+def tokenize(lowered: str) -> List[Token]:
+    return [Token(romanized_key(match.group()), match.start(), match.end()) for match in _TOKEN.finditer(lowered)]
+
+
+def normalize_key_text(text: str) -> str:
+    """``text`` as space-separated word keys, so either script and any spelling compare equal."""
+    return " ".join(token.key for token in tokenize(text.lower()))
+
+
+class PhraseMatch(NamedTuple):
+    label: str
+    start: int
+    end: int
+
+
+class PhraseMatcher:
+    """Finds listed phrases in text by word key, with their position in the text.
+
+    Phrases are compared after ``romanized_key``, so Devanagari and the
+    usual romanized spellings all match. A ``#`` word in a phrase matches a
+    number, in digits or as one of ``numbers`` ("do din se", "2 din se").
+    The leftmost match wins, and the longest phrase among those.
+    """
+
+    NUMBER = "#"
+
+    def __init__(self, phrases: Mapping[str, Iterable[str]], numbers: Iterable[str] = ()) -> None:
+        self._numbers = frozenset(romanized_key(word.lower()) for word in numbers)
+        self._index: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+        for label, items in phrases.items():
+            for phrase in items:
+                keys = tuple(
+                    self.NUMBER if word == self.NUMBER else normalize_key_text(word) for word in phrase.split()
+                )
+                if keys and all(keys):
+                    self._index.setdefault(keys[0], []).append((keys, label))
+        for candidates in self._index.values():
+            candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+
+    def __len__(self) -> int:
+        return sum(len(candidates) for candidates in self._index.values())
+
+    def _word_matches(self, key: str, token: Token) -> bool:
+        if key == self.NUMBER:
+            return token.key.isdigit() or token.key in self._numbers
+        return key == token.key
+
+    def find(self, lowered: str) -> Optional[PhraseMatch]:
+        tokens = tokenize(lowered)
+        for index, token in enumerate(tokens):
+            candidates = list(self._index.get(token.key, ()))
+            if token.key.isdigit() or token.key in self._numbers:
+                candidates.extend(self._index.get(self.NUMBER, ()))
+                candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+            for keys, label in candidates:
+                if index + len(keys) > len(tokens):
+                    continue
+                if all(self._word_matches(key, tokens[index + offset]) for offset, key in enumerate(keys)):
+                    return PhraseMatch(label, token.start, tokens[index + len(keys) - 1].end)
+        return None
+
+
+class LanguagePack:
+    """The local intent, confirmation, department, timing and question resources of one language.
+
+    A pack that ``transliterates`` compares text by word key (see
+    ``romanized_key``), so romanized and native-script input take the same
+    fast paths; other packs compare lower-cased text as is. ``questions``
+    maps a complaint field to its follow-up question. ``spell_check`` says
+    whether the (English) spelling corrector should touch the text.
+    """
+
+    __slots__ = (
+        "code",
+        "name",
+        "intent_engine",
+        "department_router",
+        "timing",
+        "address_hints",
+        "questions",
+        "spell_check",
+        "transliterates",
+    )
+
+    def __init__(
+        self,
+        code: str,
+        name: str,
+        intent_engine: IntentEngine,
+        department_router: DepartmentRouter,
+        timing: Optional[PhraseMatcher] = None,
+        address_hints: Optional[PhraseMatcher] = None,
+        questions: Optional[Mapping[str, str]] = None,
+        spell_check: bool = True,
+        transliterates: bool = False,
+    ) -> None:
+        self.code = code
+        self.name = name
+        self.intent_engine = intent_engine
+        self.department_router = department_router
+        self.timing = timing
+        self.address_hints = address_hints
+        self.questions = dict(questions or {})
+        self.spell_check = spell_check
+        self.transliterates = transliterates
+
+    def normalize(self, text: str) -> str:
+        if self.transliterates:
+            return normalize_key_text(text)
+        return _SPACES.sub(" ", text.strip().lower())
+
+    def classify(self, text: str) -> str:
+        return self.intent_engine.classify(self.normalize(text))
+
+    def route(self, text: str) -> DepartmentRoute:
+        return self.department_router.route(self.normalize(text))
+
+    def find_timing(self, lowered: str) -> Optional[str]:
+        """The timing phrase in lower-cased ``lowered``, as written there."""
+        if self.timing is None:
+            return None
+        match = self.timing.find(lowered)
+        return lowered[match.start : match.end] if match else None
+
+    def has_address_hint(self, lowered: str) -> bool:
+        return self.address_hints is not None and self.address_hints.find(lowered) is not None
+
+    def question(self, field: str) -> Optional[str]:
+        return self.questions.get(field)
+
+
+class LanguagePacks:
+    """Language packs by code, with ``default`` for codes that have none.
+
+    ``get`` accepts tags as clients send them ("hi", "hi-IN", "HI_in") and
+    remembers each one it has resolved, so a lookup is one dict access.
+    """
+
+    def __init__(self, default: LanguagePack, max_aliases: int = 1024) -> None:
+        self.default = default
+        self._packs: Dict[str, LanguagePack] = {default.code: default}
+        self._resolved: Dict[Optional[str], LanguagePack] = {}
+        self._max_aliases = max_aliases
+
+    def add(self, pack: LanguagePack) -> None:
+        self._packs[pack.code] = pack
+        self._resolved.clear()
+
+    def get(self, code: Optional[str]) -> LanguagePack:
+        pack = self._resolved.get(code)
+        if pack is not None:
+            return pack
+        tag = (code or "").strip().lower().replace("_", "-")
+        pack = self._packs.get(tag) or self._packs.get(tag.split("-", 1)[0]) or self.default
+        if len(self._resolved) < self._max_aliases:
+            self._resolved[code] = pack
+        return pack
+
+    def codes(self) -> List[str]:
+        return sorted(self._packs)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._packs
+
+
+def _keys(phrases: Iterable[str]) -> List[str]:
+    return [key for key in (normalize_key_text(phrase) for phrase in phrases) if key]
+
+
+def build_language_pack(
+    code: str, payload: Mapping[str, Any], base: Mapping[str, Any], departments: Sequence[str]
+) -> LanguagePack:
+    """A transliterating pack from a JSON payload, merged with the ``base`` (English) resources.
+
+    Both use the keys ``intents`` ({intent: [phrase, ...]}), ``confirm_yes``
+    and ``confirm_no`` (whole-message confirmations), ``yes_words`` and
+    ``no_words`` (confirmation words in short replies) and ``departments``
+    ({department: [keyword, ...]}); the payload may add ``timing`` phrases,
+    ``numbers`` (number words for ``#`` in timing phrases),
+    ``address_hints``, ``questions``, ``name``, ``spell_check`` and
+    ``exclude``. The base resources are kept because replies mix languages
+    ("haan, submit"), except the phrases in ``exclude``: English words that
+    are also common words of the pack's language, such as "hi" and the
+    Hindi particle "ही", which would otherwise read as a greeting.
+    """
+    excluded = frozenset(_keys(payload.get("exclude", [])))
+
+    def inherited(phrases: Iterable[str]) -> List[str]:
+        return [phrase for phrase in phrases if normalize_key_text(phrase) not in excluded]
+
+    def merged(key: str) -> List[str]:
+        return [*inherited(base.get(key, [])), *payload.get(key, [])]
+
+    intents: Dict[str, List[str]] = {
+        intent: inherited(phrases) for intent, phrases in base.get("intents", {}).items()
+    }
+    for intent, phrases in payload.get("intents", {}).items():
+        intents.setdefault(intent, []).extend(phrases)
+    rules = [IntentRule(intent, _keys(phrases)) for intent, phrases in intents.items() if _keys(phrases)]
+    # an exclusion may leave a list empty; a rule needs something to match
+    for intent, key in (("confirmation_yes", "confirm_yes"), ("confirmation_no", "confirm_no")):
+        keys = _keys(merged(key))
+        if keys:
+            rules.append(IntentRule(intent, exact=keys))
+    for intent, key in (("confirmation_yes", "yes_words"), ("confirmation_no", "no_words")):
+        keys = _keys(merged(key))
+        if keys:
+            rules.append(IntentRule(intent, keys, weak=True, max_words=4))
+
+    keywords: Dict[str, List[str]] = {name: inherited(words) for name, words in base.get("departments", {}).items()}
+    for department, words in payload.get("departments", {}).items():
+        if department not in departments:
+            logger.warning("Ignoring keywords for unknown department %s in language pack %s", department, code)
+            continue
+        keywords.setdefault(department, []).extend(words)
+
+    timing = payload.get("timing", [])
+    hints = payload.get("address_hints", [])
+    return LanguagePack(
+        code,
+        payload.get("name", code),
+        IntentEngine(rules),
+        DepartmentRouter({department: _keys(words) for department, words in keywords.items()}),
+        timing=PhraseMatcher({"timing": timing}, payload.get("numbers", [])) if timing else None,
+        address_hints=PhraseMatcher({"address": hints}) if hints else None,
+        questions=payload.get("questions", {}),
+        spell_check=bool(payload.get("spell_check", False)),
+        transliterates=True,
+    )
+
+
+def load_language_packs(
+    directory: Optional[str],
+    default: LanguagePack,
+    base: Mapping[str, Any],
+    departments: Sequence[str],
+) -> LanguagePacks:
+    """``default`` plus one pack per ``<code>.json`` file in ``directory``.
+
+    A missing directory or an unreadable file is logged and skipped; those
+    languages then use ``default``.
+    """
+    packs = LanguagePacks(default)
+    if not directory or not os.path.isdir(directory):
+        if directory:
+            logger.warning("Language pack directory not found: %s", directory)
+        return packs
+
+    for filename in sorted(os.listdir(directory)):
+        code, extension = os.path.splitext(filename)
+        if extension != ".json" or code.lower() == default.code:
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+            packs.add(build_language_pack(code.lower(), payload, base, departments))
+        except Exception:
+            logger.exception("Failed loading language pack: %s", path)
+    return packs
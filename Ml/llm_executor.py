@@ -0,0 +1,93 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar, Union
+
+
+T = TypeVar("T")
+
+
+class BlockingCallExecutor:
+    """Dedicated, sized thread pool for blocking provider calls.
+
+    Keeps LLM requests off the event loop's default executor, so they neither
+    wait behind nor starve other ``to_thread`` users. ``stats`` reports how
+    saturated the pool is: calls running, calls waiting for a thread, and the
+    time spent waiting. The pool is started on first use and may be started
+    again after ``shutdown``.
+    """
+
+    def __init__(self, max_workers: int = 8, thread_name_prefix: str = "llm") -> None:
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.submitted = 0
+        self.saturated = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+            if self.busy + self.queued >= self.max_workers:
+                self.saturated += 1
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        def call() -> T:
+            waited = time.perf_counter() - submitted_at
+            with self._lock:
+                self.queued -= 1
+                self.busy += 1
+                self.wait_seconds_total += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=self.thread_name_prefix
+            )
+        # like asyncio.to_thread, run in a copy of the caller's context
+        future = self._pool.submit(contextvars.copy_context().run, call)
+        future.add_done_callback(self._forget_cancelled)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    def _forget_cancelled(self, future: "Future[Any]") -> None:
+        # a call cancelled before it started (by its caller or by shutdown)
+        # never runs call(), so it leaves the queue here
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def shutdown(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "busy": self.busy,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "submitted": self.submitted,
+                "saturated": self.saturated,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "max_wait_seconds": round(self.max_wait_seconds, 6),
+            }
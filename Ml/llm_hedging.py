@@ -0,0 +1,78 @@
+from collections import deque
+from typing import Deque, Dict, Optional, Union
+
+
+HEDGE_MODES = ("off", "request", "local")
+
+
+class HedgePolicy:
+    """When to stop waiting for a slow LLM answer.
+
+    The hedge delay is the ``percentile`` of recently observed LLM latencies,
+    kept between ``min_delay_seconds`` and ``slo_seconds``; until
+    ``min_samples`` latencies are known it is the SLO itself. In "request"
+    mode a second request is sent once the delay passes, unless the LLM
+    scheduler is saturated, and the first usable answer wins. In "local"
+    mode the local extraction is returned instead and the late LLM answer is
+    merged into the session for the next turn.
+    """
+
+    def __init__(
+        self,
+        mode: str = "off",
+        percentile: float = 95.0,
+        slo_seconds: float = 4.0,
+        min_delay_seconds: float = 0.3,
+        window: int = 200,
+        min_samples: int = 20,
+    ) -> None:
+        if mode not in HEDGE_MODES:
+            raise ValueError(f"hedge mode must be one of {HEDGE_MODES}, not {mode!r}")
+        self.mode = mode
+        self.percentile = percentile
+        self.slo_seconds = slo_seconds
+        self.min_delay_seconds = min_delay_seconds
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self.hedged_requests = 0
+        self.hedges_skipped = 0
+        self.hedge_wins = 0
+        self.local_returns = 0
+        self.late_stored = 0
+        self.late_applied = 0
+        self.late_dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def observe(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+
+    def latency_quantile(self) -> Optional[float]:
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100.0))
+        return ordered[index]
+
+    def delay(self) -> float:
+        quantile = self.latency_quantile()
+        if quantile is None:
+            return self.slo_seconds
+        return min(self.slo_seconds, max(self.min_delay_seconds, quantile))
+
+    def stats(self) -> Dict[str, Union[int, float, str, None]]:
+        return {
+            "mode": self.mode,
+            "delay_seconds": round(self.delay(), 4),
+            "latency_quantile_seconds": self.latency_quantile(),
+            "samples": len(self._latencies),
+            "hedged_requests": self.hedged_requests,
+            "hedges_skipped": self.hedges_skipped,
+            "hedge_wins": self.hedge_wins,
+            "local_returns": self.local_returns,
+            "late_stored": self.late_stored,
+            "late_applied": self.late_applied,
+            "late_dropped": self.late_dropped,
+        }
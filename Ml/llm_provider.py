@@ -0,0 +1,59 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Any, Dict, Optional
+
+
+# Importing the Gemini client pulls in gRPC, protobuf and the generated API
+# types, which is most of the service's import time. It is imported on first
+# use instead, normally by the startup warm-up rather than a chat request.
+_lock = threading.Lock()
+_genai: Optional[ModuleType] = None
+_safety_settings: Optional[Dict[Any, Any]] = None
+_import_error: Optional[str] = None
+
+
+def load_genai() -> Optional[ModuleType]:
+    """The ``google.generativeai`` module, imported once; None if it is not installed."""
+    global _genai, _safety_settings, _import_error
+    if _genai is not None or _import_error is not None:
+        return _genai
+    with _lock:
+        if _genai is not None or _import_error is not None:
+            return _genai
+        try:
+            genai = importlib.import_module("google.generativeai")
+            types = importlib.import_module("google.generativeai.types")
+        except Exception as exc:
+            _import_error = f"google-generativeai package is not installed ({exc})"
+            return None
+        block = types.HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE
+        _safety_settings = {
+            types.HarmCategory.HARM_CATEGORY_HARASSMENT: block,
+            types.HarmCategory.HARM_CATEGORY_HATE_SPEECH: block,
+            types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: block,
+            types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: block,
+        }
+        _genai = genai
+        return genai
+
+
+def genai_import_error() -> Optional[str]:
+    return _import_error
+
+
+def gemini_safety_settings() -> Optional[Dict[Any, Any]]:
+    """Gemini safety settings, or None while the client has not been imported.
+
+    Never imports the client itself: a stand-in model does not need it.
+    """
+    return _safety_settings
+
+
+def warm_connection(model: Any, timeout: float) -> None:
+    """Make one cheap authenticated call so the client opens its channel now.
+
+    Retries stop at ``timeout`` too, instead of the client's default minute.
+    """
+    retry = importlib.import_module("google.api_core.retry")
+    model.count_tokens("ping", request_options={"timeout": timeout, "retry": retry.Retry(timeout=timeout)})
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar, Union
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LLMUnavailable(Exception):
+    """The scheduler did not get a result; ``reason`` says why."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """Stops calling a failing provider for a while.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects calls for ``reset_seconds``. It then lets a single probe call
+    through (half-open): success closes it again, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self._clock() - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning("LLM circuit breaker opened after %s failures", self.consecutive_failures)
+            self.state = self.OPEN
+            self.opened_at = self._clock()
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Forget an unfinished probe (e.g. it was cancelled) so another one may run."""
+        self._probe_in_flight = False
+
+
+class LLMScheduler:
+    """Admission control and retries for LLM calls.
+
+    At most ``max_concurrency`` calls run at once and at most ``max_queue``
+    more may wait for a slot; beyond that calls are rejected immediately. A
+    request, including queueing, retries and backoff, must finish within
+    ``deadline_seconds``. Failed attempts are retried up to ``max_attempts``
+    times with full-jitter exponential backoff. Every rejection raises
+    ``LLMUnavailable`` so the caller can fall back to local extraction.
+
+    An attempt returning ``None`` (unusable output) is retried, but the
+    provider did answer, so the circuit breaker counts it as healthy; only
+    exceptions and deadline overruns count as failures.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_queue: int = 32,
+        deadline_seconds: float = 12.0,
+        max_attempts: int = 3,
+        backoff_base_seconds: float = 0.25,
+        backoff_max_seconds: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.deadline_seconds = deadline_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.queued = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.rejected: Dict[str, int] = {"circuit_open": 0, "queue_full": 0, "deadline": 0, "exhausted": 0}
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new call would have to wait for a slot."""
+        return self.queued > 0 or self.in_flight >= self.max_concurrency
+
+    def backoff_seconds(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** (attempt - 1)))
+
+    def _reject(self, reason: str) -> LLMUnavailable:
+        self.rejected[reason] += 1
+        return LLMUnavailable(reason)
+
+    async def run(self, attempt: Callable[[], Awaitable[Optional[T]]]) -> T:
+        if not self.breaker.allow():
+            raise self._reject("circuit_open")
+        if self.queued >= self.max_queue and self._slots.locked():
+            self.breaker.release_probe()
+            raise self._reject("queue_full")
+
+        self.requests += 1
+        try:
+            return await asyncio.wait_for(self._run_with_retries(attempt), self.deadline_seconds)
+        except asyncio.TimeoutError:
+            self.breaker.record_failure()
+            raise self._reject("deadline") from None
+        except asyncio.CancelledError:
+            self.breaker.release_probe()
+            raise
+
+    async def _run_with_retries(self, attempt: Callable[[], Awaitable[Optional[T]]]) -> T:
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        try:
+            for number in range(1, self.max_attempts + 1):
+                if number > 1:
+                    self.retries += 1
+                    await asyncio.sleep(self.backoff_seconds(number - 1))
+                self.attempts += 1
+                try:
+                    result = await attempt()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("LLM request failed (attempt %s)", number)
+                    self.breaker.record_failure()
+                    if not self.breaker.allow():
+                        raise self._reject("circuit_open") from None
+                    continue
+                self.breaker.record_success()
+                if result is not None:
+                    return result
+                logger.warning("LLM returned unusable output (attempt %s)", number)
+            raise self._reject("exhausted")
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Union[int, str]]:
+        stats: Dict[str, Union[int, str]] = {
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened,
+        }
+        for reason, count in self.rejected.items():
+            stats[f"rejected_{reason}"] = count
+        return stats
@@ -0,0 +1,338 @@
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+
+# Fields attached to every record logged in the current context (a chat turn
+# sets session_id and language), so messages need not repeat them.
+_log_fields: ContextVar[Dict[str, Any]] = ContextVar("log_fields", default={})
+
+# attributes every LogRecord has; anything else on a record came from ``extra``
+_RECORD_ATTRIBUTES = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """Attach ``fields`` to every record logged inside the block."""
+    token = _log_fields.set({**_log_fields.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_fields.reset(token)
+
+
+def record_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    """The structured fields of a record: its ``extra`` values and the log context."""
+    return {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, fields and traceback."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        item: Dict[str, Any] = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        item.update(record_fields(record))
+        if record.exc_info:
+            item["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            item["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(item, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """``logging.basicConfig``'s layout with the structured fields appended as key=value."""
+
+    def __init__(self) -> None:
+        super().__init__(logging.BASIC_FORMAT)
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        text = super().formatMessage(record)
+        fields = record_fields(record)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class LogSampler:
+    """Decides, on the caller's thread, whether a record is written at all.
+
+    Records below WARNING are kept with the rate configured for their
+    category (the ``category`` extra, else the logger name; 1.0 when not
+    configured). Records with a traceback are rate limited per logger,
+    message and exception type: ``burst`` of them per ``window_seconds``
+    keep their traceback, later ones in the window are dropped and counted,
+    and the first one after the window reports how many were dropped.
+    """
+
+    def __init__(
+        self,
+        sample_rates: Optional[Dict[str, float]] = None,
+        window_seconds: float = 60.0,
+        burst: int = 3,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.sample_rates = dict(sample_rates or {})
+        self.window_seconds = window_seconds
+        self.burst = burst
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # (logger, message template, exception type) -> [window start, seen in window, dropped]
+        self._exceptions: Dict[Tuple[str, Any, str], List[Any]] = {}
+        self.sampled_out = 0
+        self.rate_limited = 0
+
+    def allow(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING and self.sample_rates:
+            rate = self.sample_rates.get(getattr(record, "category", record.name), 1.0)
+            if rate < 1.0 and self._random.random() >= rate:
+                self.sampled_out += 1
+                return False
+        if record.exc_info and self.window_seconds > 0:
+            exc_type = record.exc_info[0]
+            key = (record.name, record.msg, exc_type.__name__ if exc_type else "")
+            now = time.monotonic()
+            with self._lock:
+                entry = self._exceptions.get(key)
+                if entry is None or now - entry[0] >= self.window_seconds:
+                    if entry is not None and entry[2]:
+                        record.repeats_suppressed = entry[2]
+                    if len(self._exceptions) >= 1024 and entry is None:
+                        self._forget_expired(now)
+                    self._exceptions[key] = [now, 1, 0]
+                    return True
+                entry[1] += 1
+                if entry[1] > self.burst:
+                    entry[2] += 1
+                    self.rate_limited += 1
+                    return False
+        return True
+
+    def _forget_expired(self, now: float) -> None:
+        for key, entry in list(self._exceptions.items()):
+            if now - entry[0] >= self.window_seconds:
+                del self._exceptions[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sampled_out": self.sampled_out, "rate_limited": self.rate_limited}
+
+
+class _PipelineHandler(QueueHandler):
+    """The handler loggers see: prepares a record on the caller's thread and queues it.
+
+    Only the cheap part happens here - merging the message arguments and the
+    log context, and the sampling decision. Tracebacks are formatted and
+    output written by the pipeline's writer thread. A full queue drops the
+    record instead of waiting.
+    """
+
+    def __init__(self, pipeline: "LogPipeline") -> None:
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        for key, value in _log_fields.get().items():
+            if key not in record.__dict__:
+                setattr(record, key, value)
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        pipeline = self.pipeline
+        if not pipeline.sampler.allow(record):
+            return
+        # the template is the rate limiter's key, so merge the arguments only now
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            pipeline._dropped(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        # called by logging.shutdown at exit: write what is still queued
+        self.pipeline.close()
+        super().close()
+
+
+class LogPipeline:
+    """Non-blocking log output: a bounded queue in front of a batching writer thread.
+
+    Loggers hand records to a ``QueueHandler``; the writer thread takes
+    everything queued (up to ``batch_size`` records), formats it and writes
+    it to ``stream`` with one write and one flush. When the stream cannot
+    keep up and ``queue_size`` records are waiting, new records are dropped
+    and counted rather than blocking the caller; the writer reports the
+    count in the output once it catches up.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        formatter: Optional[logging.Formatter] = None,
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        sampler: Optional[LogSampler] = None,
+    ) -> None:
+        self.stream = stream if stream is not None else sys.stderr
+        self.formatter = formatter or JsonFormatter()
+        self.queue: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue(maxsize=max(queue_size, 1))
+        self.batch_size = max(batch_size, 1)
+        self.sampler = sampler or LogSampler()
+        self.handler = _PipelineHandler(self)
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.dropped: Dict[str, int] = {}
+        self._dropped_reported = 0
+
+    def start(self) -> "LogPipeline":
+        with self._lock:
+            if self._writer is None and not self._closed:
+                self._writer = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._writer.start()
+        return self
+
+    def install(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> "LogPipeline":
+        """Start the writer and make the pipeline ``logger``'s (default: root) only handler."""
+        target = logger or logging.getLogger()
+        for handler in list(target.handlers):
+            target.removeHandler(handler)
+        target.addHandler(self.handler)
+        target.setLevel(level)
+        return self.start()
+
+    def _dropped(self, record: logging.LogRecord) -> None:
+        self.dropped[record.levelname] = self.dropped.get(record.levelname, 0) + 1
+
+    def _run(self) -> None:
+        while True:
+            record = self.queue.get()
+            batch = [record]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            self._write([item for item in batch if item is not None])
+            if stop:
+                return
+
+    def _write(self, batch: List[logging.LogRecord]) -> None:
+        lines: List[str] = []
+        for number, record in enumerate(batch, start=1):
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                self.write_errors += 1
+            if number % 16 == 0:
+                # hand the GIL back now and then, so formatting a large batch
+                # does not hold up the event loop for a whole switch interval
+                time.sleep(0)
+        dropped = sum(self.dropped.values())
+        if dropped > self._dropped_reported:
+            lines.append(self._drop_notice(dropped - self._dropped_reported))
+            self._dropped_reported = dropped
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:
+            self.write_errors += 1
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    def _drop_notice(self, count: int) -> str:
+        record = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0, "Log queue full: dropped %s records", (count,), None
+        )
+        record.dropped = count
+        return self.formatter.format(record)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait up to ``timeout`` seconds for the queue to drain (the last batch may still be writing)."""
+        deadline = time.monotonic() + timeout
+        while not self.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is queued and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            writer = self._writer
+        if writer is None:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        writer.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": dict(self.dropped),
+            "write_errors": self.write_errors,
+            **self.sampler.stats(),
+        }
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """``"turn=0.1,session=0"`` -> ``{"turn": 0.1, "session": 0.0}``."""
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        category, _, rate = item.partition("=")
+        if category.strip() and rate.strip():
+            rates[category.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def configure_logging(
+    level: str = "INFO",
+    format: str = "json",
+    queue_size: int = 10000,
+    batch_size: int = 256,
+    sample_rates: Optional[Dict[str, float]] = None,
+    exception_window_seconds: float = 60.0,
+    exception_burst: int = 3,
+) -> Optional[LogPipeline]:
+    """Route the root logger through a ``LogPipeline``.
+
+    Like ``logging.basicConfig`` it leaves an already configured root logger
+    alone (returning None), so a host application keeps its own handlers.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+    pipeline = LogPipeline(
+        formatter=TextFormatter() if format == "text" else JsonFormatter(),
+        queue_size=queue_size,
+        batch_size=batch_size,
+        sampler=LogSampler(sample_rates, exception_window_seconds, exception_burst),
+    )
+    return pipeline.install(root, logging.getLevelName(level.upper()))
@@ -0,0 +1,99 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token), cheap enough to call per turn."""
+    return (len(text) + 3) // 4
+
+
+def fold_into_summary(
+    summary: Optional[Dict[str, Any]],
+    role: str,
+    text: str,
+    max_notes: int = 4,
+    note_chars: int = 80,
+) -> Dict[str, Any]:
+    """Add one history entry that left the prompt window to the rolling summary.
+
+    The complaint data already records the facts, so the summary only counts
+    earlier turns and keeps short notes of the latest user messages among
+    them. It stays small however long the conversation gets.
+    """
+    summary = dict(summary or {"user_turns": 0, "bot_turns": 0, "notes": []})
+    if role == "user":
+        summary["user_turns"] += 1
+        note = " ".join(text.split())
+        if len(note) > note_chars:
+            note = note[: note_chars - 3].rstrip() + "..."
+        if note:
+            summary["notes"] = (list(summary["notes"]) + [note])[-max_notes:]
+    else:
+        summary["bot_turns"] += 1
+    return summary
+
+
+def render_summary(summary: Optional[Dict[str, Any]]) -> str:
+    if not summary or not (summary["user_turns"] or summary["bot_turns"]):
+        return ""
+    line = (
+        f"Earlier: {summary['user_turns']} user and {summary['bot_turns']} assistant messages, "
+        "already reflected in the complaint data."
+    )
+    if summary["notes"]:
+        line += " Last earlier user notes: " + " | ".join(summary["notes"])
+    return line
+
+
+class PromptBudget:
+    """Fits conversation history into a per-prompt token budget.
+
+    The fixed part of a prompt (instructions, complaint data, latest message)
+    is always sent. The summary line and the most recent history lines are
+    added while they fit; older lines are dropped first. ``stats`` reports
+    prompt sizes for the turns built so far.
+    """
+
+    def __init__(self, max_tokens: int = 1200) -> None:
+        self.max_tokens = max_tokens
+        self.prompts = 0
+        self.tokens_total = 0
+        self.last_tokens = 0
+        self.max_seen_tokens = 0
+        self.lines_dropped = 0
+        self.over_budget = 0
+
+    def fit(self, fixed_tokens: int, summary: str, lines: Sequence[str]) -> Tuple[str, int]:
+        """Return the history text to send and its token estimate."""
+        remaining = self.max_tokens - fixed_tokens
+        kept: List[str] = []
+        for line in reversed(lines):
+            cost = estimate_tokens(line) + 1
+            if cost > remaining:
+                break
+            kept.append(line)
+            remaining -= cost
+        self.lines_dropped += len(lines) - len(kept)
+        kept.reverse()
+        if summary and estimate_tokens(summary) + 1 <= remaining:
+            kept.insert(0, summary)
+        text = "\n".join(kept)
+        return text, estimate_tokens(text)
+
+    def record(self, prompt_tokens: int) -> None:
+        self.prompts += 1
+        self.tokens_total += prompt_tokens
+        self.last_tokens = prompt_tokens
+        self.max_seen_tokens = max(self.max_seen_tokens, prompt_tokens)
+        if prompt_tokens > self.max_tokens:
+            self.over_budget += 1
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return {
+            "budget_tokens": self.max_tokens,
+            "prompts": self.prompts,
+            "last_tokens": self.last_tokens,
+            "max_tokens": self.max_seen_tokens,
+            "avg_tokens": round(self.tokens_total / self.prompts, 1) if self.prompts else 0.0,
+            "history_lines_dropped": self.lines_dropped,
+            "over_budget": self.over_budget,
+        }
@@ -0,0 +1,442 @@
+"""Replay exported chat transcripts through the chat pipeline, offline and in bulk.
+
+Reads a JSONL corpus, one conversation per line, and runs every user message
+through the same turn handling as ``/chat`` (spelling correction, intent,
+extraction, the confirmation flow and ``build_complaint_data``). The
+conversations are spread over a pool of worker processes. Output is one
+JSONL line per conversation, written in input order as results arrive;
+a throughput report goes to stderr. Useful to re-route departments after a
+keyword change or to score extraction against labelled transcripts.
+
+A conversation line is a complaint export (``chatMessages`` with
+``senderType``), a scripted conversation (``turns`` with ``say``, optionally
+``expect`` for the action) or ``messages`` (strings, or objects with
+``text``/``message`` and an optional ``role``); a line that is a JSON list
+is taken as its ``messages``. ``expected`` may map complaint fields to
+their correct values. Lines that are not valid JSON, or neither an object
+nor a list, are reported as errors.
+
+The LLM is pluggable: ``--llm local`` never calls one (rules and keyword
+extraction only), ``--llm fake`` answers with the stand-in model from
+``benchmarks.fake_gemini`` and ``--llm gemini`` calls Gemini. ``--llm-cache``
+keeps every answer in a SQLite file, keyed by the request, so a re-run
+replays recorded answers instead of calling the model again.
+
+    python replay.py transcripts.jsonl -o replayed.jsonl --workers 4 --llm gemini --llm-cache replay_llm.db
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: the summary has no memory figures
+    resource = None  # type: ignore[assignment]
+
+
+ID_KEYS = ("id", "session_id", "complaintNumber", "name")
+
+Chunk = List[Tuple[int, str]]
+
+
+def conversation_messages(record: Dict[str, Any]) -> List[str]:
+    """The user's messages of one exported conversation, in order."""
+    if "chatMessages" in record:
+        return [
+            str(item.get("message") or "")
+            for item in record["chatMessages"]
+            if item.get("senderType") == "user" and item.get("messageType", "message") == "message"
+        ]
+    if "turns" in record:
+        return [
+            turn if isinstance(turn, str) else str(turn.get("say") or turn.get("text") or "")
+            for turn in record["turns"]
+        ]
+    messages: List[str] = []
+    for item in record.get("messages") or []:
+        if isinstance(item, str):
+            messages.append(item)
+        elif item.get("role", item.get("senderType", "user")) == "user":
+            messages.append(str(item.get("text") or item.get("message") or ""))
+    return messages
+
+
+def conversation_id(record: Dict[str, Any], line_number: int) -> str:
+    for key in ID_KEYS:
+        if record.get(key):
+            return str(record[key])
+    return f"line-{line_number}"
+
+
+class _CachedResponse:
+    """A recorded answer, usable both as a response and as a one-chunk stream."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def __iter__(self) -> Iterator["_CachedResponse"]:
+        yield self
+
+
+class LLMResponseCache:
+    """Model answers in SQLite, keyed by model, system instruction and request.
+
+    Shared by every worker process of a run and kept between runs.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, text TEXT NOT NULL)")
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model_name: str, system_instruction: Optional[str], contents: Any, options: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            [model_name, system_instruction, contents, options.get("generation_config")],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses (key, text) VALUES (?, ?)", (key, text))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CachedModel:
+    """Answers from the cache; a miss asks ``model`` and records the answer.
+
+    Only offers the blocking ``generate_content``, so the app calls it from
+    its LLM thread pool. A streamed miss is read to the end before it is
+    recorded.
+    """
+
+    def __init__(self, cache: LLMResponseCache, model_name: str, system_instruction: Optional[str], model: Any) -> None:
+        self.cache = cache
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.model = model
+
+    def generate_content(self, contents: Any, stream: bool = False, **options: Any) -> _CachedResponse:
+        key = self.cache.key(self.model_name, self.system_instruction, contents, options)
+        text = self.cache.get(key)
+        if text is None:
+            response = self.model.generate_content(contents, stream=stream, **options)
+            text = "".join(chunk.text for chunk in response) if stream else response.text
+            self.cache.put(key, text)
+        return _CachedResponse(text)
+
+
+ModelFactory = Callable[[str, Optional[str]], Any]
+
+
+def model_factory(llm: str, cache_path: Optional[str]) -> Tuple[ModelFactory, Optional[LLMResponseCache]]:
+    """A factory for ``app.use_gemini_model_factory`` for the ``--llm`` choice."""
+    factory: ModelFactory
+    if llm == "local":
+        factory = lambda model_name, system_instruction: None  # noqa: E731
+    elif llm == "fake":
+        from benchmarks.fake_gemini import FakeGemini
+
+        factory = FakeGemini(record_calls=False).model
+    else:
+        factory = _gemini_factory()
+    if cache_path is None or llm == "local":
+        return factory, None
+    cache = LLMResponseCache(cache_path)
+    inner = factory
+
+    def cached(model_name: str, system_instruction: Optional[str]) -> CachedModel:
+        return CachedModel(cache, model_name, system_instruction, inner(model_name, system_instruction))
+
+    return cached, cache
+
+
+def _gemini_factory() -> ModelFactory:
+    import app
+    from llm_provider import genai_import_error, load_genai
+
+    app._load_api_key_from_env_files()
+    api_key = app._gemini_api_key()
+    if not api_key:
+        raise RuntimeError("--llm gemini needs GEMINI_API_KEY")
+    genai = load_genai()
+    if genai is None:
+        raise RuntimeError(genai_import_error())
+    genai.configure(api_key=api_key)
+    # no context caching: cached contents would expire during a long run
+    return lambda model_name, system_instruction: genai.GenerativeModel(
+        model_name, system_instruction=system_instruction
+    )
+
+
+# per worker process, set by _start_worker
+_worker: Dict[str, Any] = {}
+
+
+def _start_worker(llm: str, cache_path: Optional[str], concurrency: int) -> None:
+    # per-turn records would dwarf the output; without a model every
+    # conversation would also warn that Gemini is not active
+    os.environ.setdefault("LOG_LEVEL", "ERROR" if llm == "local" else "WARNING")
+    os.environ["SESSION_BACKEND"] = "memory"
+    import app
+
+    factory, cache = model_factory(llm, cache_path)
+    app.use_gemini_model_factory(factory)
+    _worker.update(app=app, cache=cache, loop=asyncio.new_event_loop(), limit=asyncio.Semaphore(concurrency))
+
+
+def replay_chunk(chunk: Chunk) -> Tuple[List[str], Dict[str, Any]]:
+    """Replay the conversations of ``chunk``; returns their output lines and counts."""
+    stats: Dict[str, Any] = {"conversations": 0, "turns": 0, "errors": 0, "fields": {}}
+    lines = _worker["loop"].run_until_complete(_replay_lines(chunk, stats))
+    cache = _worker["cache"]
+    if cache is not None:
+        stats["llm_cache_hits"], stats["llm_cache_misses"] = cache.hits, cache.misses
+        cache.hits = cache.misses = 0
+    return lines, stats
+
+
+async def _replay_lines(chunk: Chunk, stats: Dict[str, Any]) -> List[str]:
+    return list(await asyncio.gather(*(_replay_line(line_number, line, stats) for line_number, line in chunk)))
+
+
+async def _replay_line(line_number: int, line: str, stats: Dict[str, Any]) -> str:
+    try:
+        record = json.loads(line)
+    except ValueError as exc:
+        stats["errors"] += 1
+        return json.dumps({"line": line_number, "error": f"invalid JSON: {exc}"})
+    if isinstance(record, list):
+        record = {"messages": record}
+    elif not isinstance(record, dict):
+        stats["errors"] += 1
+        return json.dumps({"line": line_number, "error": f"not a conversation: a JSON {type(record).__name__}"})
+    async with _worker["limit"]:
+        result = await replay_conversation(record, line_number, stats)
+    return json.dumps(result, ensure_ascii=False, default=str)
+
+
+async def replay_conversation(record: Dict[str, Any], line_number: int, stats: Dict[str, Any]) -> Dict[str, Any]:
+    app = _worker["app"]
+    # a worker replays many conversations; keep their sessions apart from any real ones
+    session_id = f"replay-{os.getpid()}-{line_number}"
+    language = record.get("language") or "en"
+    expected_actions = [turn.get("expect") if isinstance(turn, dict) else None for turn in record.get("turns") or []]
+    result: Dict[str, Any] = {"id": conversation_id(record, line_number), "line": line_number, "language": language}
+    turns: List[Dict[str, Any]] = []
+    complaint_ready = False
+    started = time.perf_counter()
+    stats["conversations"] += 1
+    try:
+        for number, text in enumerate(conversation_messages(record)):
+            response = await app.handle_conversation(session_id, text, language)
+            turn: Dict[str, Any] = {"text": text, "intent": response.detected_intent, "action": response.action}
+            if response.corrected_text:
+                turn["corrected_text"] = response.corrected_text
+            if number < len(expected_actions) and expected_actions[number]:
+                turn["expected_action"] = expected_actions[number]
+            turns.append(turn)
+            complaint_ready = bool(response.complaint_ready)
+            stats["turns"] += 1
+        session = app.sessions.get(session_id)
+        data = dict(session.data) if session is not None else {}
+        result["complaint_ready"] = complaint_ready
+        result["data"] = data
+        result["complaint"] = app.build_complaint_data(data)
+        expected = record.get("expected")
+        if expected:
+            result["mismatches"] = _score_fields(result["complaint"], data, expected, stats["fields"])
+    except Exception as exc:
+        stats["errors"] += 1
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    finally:
+        app.sessions.delete(session_id)
+    result["turns"] = turns
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def _score_fields(
+    complaint: Dict[str, Any], data: Dict[str, Any], expected: Dict[str, Any], fields: Dict[str, List[int]]
+) -> Dict[str, Any]:
+    """Compare replayed fields with the labels; counts [correct, labelled] per field into ``fields``."""
+    mismatches: Dict[str, Any] = {}
+    for field, want in expected.items():
+        got = complaint.get(field, data.get(field))
+        correct = str(got or "").strip().lower() == str(want or "").strip().lower()
+        counts = fields.setdefault(field, [0, 0])
+        counts[0] += int(correct)
+        counts[1] += 1
+        if not correct:
+            mismatches[field] = {"expected": want, "got": got}
+    return mismatches
+
+
+def read_chunks(handle: TextIO, size: int) -> Iterator[Chunk]:
+    """Non-blank lines of ``handle`` with their line numbers, ``size`` at a time."""
+    numbered = ((number, line) for number, line in enumerate(handle, start=1) if line.strip())
+    while True:
+        chunk = list(itertools.islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def replay(
+    chunks: Iterable[Chunk],
+    out: TextIO,
+    workers: int,
+    llm: str,
+    cache_path: Optional[str],
+    concurrency: int,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Replay every chunk on a process pool and write the results in input order.
+
+    At most two chunks per worker are read ahead, so memory does not grow
+    with the size of the corpus.
+    """
+    totals: Dict[str, Any] = {"conversations": 0, "turns": 0, "errors": 0, "fields": {}}
+    pending: Deque["Future[Tuple[List[str], Dict[str, Any]]]"] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_start_worker, initargs=(llm, cache_path, concurrency)
+    ) as pool:
+
+        def write_oldest() -> None:
+            lines, stats = pending.popleft().result()
+            out.write("".join(line + "\n" for line in lines))
+            _add_stats(totals, stats)
+            if on_progress is not None:
+                on_progress(totals)
+
+        for chunk in chunks:
+            pending.append(pool.submit(replay_chunk, chunk))
+            if len(pending) >= workers * 2:
+                write_oldest()
+        while pending:
+            write_oldest()
+    out.flush()
+    return totals
+
+
+def _add_stats(totals: Dict[str, Any], stats: Dict[str, Any]) -> None:
+    for key, value in stats.items():
+        if key == "fields":
+            for field, (correct, labelled) in value.items():
+                counts = totals["fields"].setdefault(field, [0, 0])
+                counts[0] += correct
+                counts[1] += labelled
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+
+def _peak_rss_mib() -> Optional[Tuple[float, float]]:
+    """Peak RSS of this process and of the largest worker, or None where it cannot be read."""
+    if resource is None:
+        return None
+    # ru_maxrss is in bytes on macOS and in KiB on Linux and the BSDs
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(workers, 1)
+
+
+def report(totals: Dict[str, Any], seconds: float) -> Dict[str, Any]:
+    summary = {
+        "conversations": totals["conversations"],
+        "turns": totals["turns"],
+        "errors": totals["errors"],
+        "seconds": round(seconds, 3),
+        "conversations_per_second": round(totals["conversations"] / max(seconds, 1e-9), 1),
+        "turns_per_second": round(totals["turns"] / max(seconds, 1e-9), 1),
+    }
+    peak_rss = _peak_rss_mib()
+    if peak_rss is not None:
+        summary["peak_rss_mib"], summary["peak_worker_rss_mib"] = peak_rss
+    if "llm_cache_hits" in totals:
+        summary["llm_cache_hits"] = totals["llm_cache_hits"]
+        summary["llm_cache_misses"] = totals["llm_cache_misses"]
+    if totals["fields"]:
+        summary["field_accuracy"] = {
+            field: round(correct / labelled, 3) for field, (correct, labelled) in sorted(totals["fields"].items())
+        }
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", help="JSONL file of conversations, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file, or - for stdout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=32, help="conversations sent to a worker at a time")
+    parser.add_argument("--concurrency", type=int, default=8, help="conversations a worker runs at once")
+    parser.add_argument("--llm", choices=("local", "fake", "gemini"), default="local")
+    parser.add_argument("--llm-cache", metavar="PATH", help="SQLite file of recorded model answers")
+    parser.add_argument("--progress-seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    if args.llm_cache and args.llm == "local":
+        parser.error("--llm-cache needs --llm fake or gemini")
+
+    started = time.perf_counter()
+    last_progress = [started]
+
+    def progress(totals: Dict[str, Any]) -> None:
+        now = time.perf_counter()
+        if args.progress_seconds and now - last_progress[0] >= args.progress_seconds:
+            last_progress[0] = now
+            rate = totals["conversations"] / (now - started)
+            print(f"{totals['conversations']} conversations, {rate:.1f}/s", file=sys.stderr, flush=True)
+
+    source = sys.stdin if args.corpus == "-" else open(args.corpus, "r", encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        totals = replay(
+            read_chunks(source, max(args.chunk_size, 1)),
+            out,
+            workers=max(args.workers, 1),
+            llm=args.llm,
+            cache_path=args.llm_cache,
+            concurrency=max(args.concurrency, 1),
+            on_progress=progress,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(report(totals, time.perf_counter() - started)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
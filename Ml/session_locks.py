@@ -0,0 +1,72 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Union
+
+
+class SessionBusyError(Exception):
+    """Raised when too many turns are already queued for one session."""
+
+
+class _SessionLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class SessionLockTable:
+    """Runs turns for the same session one at a time, in arrival order.
+
+    Each session gets its own ``asyncio.Lock`` (FIFO for waiters), created on
+    first use and dropped once nobody holds or waits on it, so different
+    sessions never contend. At most ``max_pending`` turns may wait behind the
+    running one; further turns are rejected with ``SessionBusyError``.
+    """
+
+    def __init__(self, max_pending: int = 4) -> None:
+        self.max_pending = max_pending
+        self._locks: Dict[str, _SessionLock] = {}
+        self.acquisitions = 0
+        self.contended = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def hold(self, session_id: str) -> AsyncIterator[None]:
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = _SessionLock()
+        if entry.users > self.max_pending:
+            self.rejected += 1
+            raise SessionBusyError(session_id)
+
+        entry.users += 1
+        contended = entry.lock.locked()
+        started = time.perf_counter()
+        try:
+            async with entry.lock:
+                waited = time.perf_counter() - started
+                self.acquisitions += 1
+                if contended:
+                    self.contended += 1
+                self.wait_seconds_total += waited
+                if waited > self.max_wait_seconds:
+                    self.max_wait_seconds = waited
+                yield
+        finally:
+            entry.users -= 1
+            if entry.users == 0 and self._locks.get(session_id) is entry:
+                del self._locks[session_id]
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return {
+            "locked_sessions": len(self._locks),
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "rejected": self.rejected,
+            "wait_seconds_total": self.wait_seconds_total,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
@@ -0,0 +1,233 @@
+import sys
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+
+ROLE_USER = "user"
+ROLE_BOT = "bot"
+_ROLES = {ROLE_USER: ROLE_USER, ROLE_BOT: ROLE_BOT}
+
+COMPLAINT_FIELDS = ("department", "description", "address", "timing", "specific_details", "title")
+_COMPLAINT_FIELD_SET = frozenset(COMPLAINT_FIELDS)
+
+HISTORY_CAPACITY = 50
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def intern_role(role: str) -> str:
+    """The shared string object for a role, so history entries do not each hold a copy."""
+    return _ROLES.get(role) or sys.intern(role)
+
+
+class ComplaintData:
+    """The complaint fields collected so far; missing fields are None.
+
+    Reads like a dict (``get``, ``[]``, ``keys``, ``dict(data)``) so the
+    extraction helpers can take either this or a plain dict of field values.
+    Unknown keys raise ``KeyError`` on write.
+    """
+
+    __slots__ = COMPLAINT_FIELDS
+
+    def __init__(
+        self,
+        department: Optional[str] = None,
+        description: Optional[str] = None,
+        address: Optional[str] = None,
+        timing: Optional[str] = None,
+        specific_details: Optional[str] = None,
+        title: Optional[str] = None,
+    ) -> None:
+        self.department = department
+        self.description = description
+        self.address = address
+        self.timing = timing
+        self.specific_details = specific_details
+        self.title = title
+
+    @classmethod
+    def from_mapping(cls, values: Mapping[str, Any]) -> "ComplaintData":
+        return cls(**{key: values.get(key) for key in COMPLAINT_FIELDS})
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in _COMPLAINT_FIELD_SET:
+            return default
+        return getattr(self, key)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _COMPLAINT_FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in _COMPLAINT_FIELD_SET:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _COMPLAINT_FIELD_SET
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(COMPLAINT_FIELDS)
+
+    def __len__(self) -> int:
+        return len(COMPLAINT_FIELDS)
+
+    def keys(self) -> Tuple[str, ...]:
+        return COMPLAINT_FIELDS
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for key in COMPLAINT_FIELDS:
+            yield key, getattr(self, key)
+
+    def update(self, values: Mapping[str, Any]) -> None:
+        for key in COMPLAINT_FIELDS:
+            if key in values:
+                setattr(self, key, values[key])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in COMPLAINT_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"ComplaintData({self.to_dict()!r})"
+
+
+class HistoryEntry(NamedTuple):
+    role: str
+    text: str
+
+
+class HistoryRing:
+    """The last ``capacity`` conversation entries, oldest first.
+
+    Roles and texts live in two parallel lists that grow to ``capacity`` and
+    are then overwritten in place, so appending never copies the history.
+    Indexing (negative indexes too) and iteration are in conversation order.
+    """
+
+    __slots__ = ("capacity", "_roles", "_texts", "_start")
+
+    def __init__(self, capacity: int = HISTORY_CAPACITY) -> None:
+        self.capacity = capacity
+        self._roles: List[str] = []
+        self._texts: List[str] = []
+        # position of the oldest entry once the lists are full
+        self._start = 0
+
+    def append(self, role: str, text: str) -> None:
+        role = intern_role(role)
+        if len(self._roles) < self.capacity:
+            self._roles.append(role)
+            self._texts.append(text)
+            return
+        start = self._start
+        self._roles[start] = role
+        self._texts[start] = text
+        self._start = (start + 1) % self.capacity
+
+    def __len__(self) -> int:
+        return len(self._roles)
+
+    def __getitem__(self, index: int) -> HistoryEntry:
+        size = len(self._roles)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("history index out of range")
+        position = (self._start + index) % size
+        return HistoryEntry(self._roles[position], self._texts[position])
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        for index in range(len(self._roles)):
+            yield self[index]
+
+    def last(self, count: int) -> List[HistoryEntry]:
+        size = len(self._roles)
+        return [self[index] for index in range(max(0, size - count), size)]
+
+    def to_list(self) -> List[Dict[str, str]]:
+        return [{"role": entry.role, "text": entry.text} for entry in self]
+
+    @classmethod
+    def from_list(cls, entries: List[Mapping[str, Any]], capacity: int = HISTORY_CAPACITY) -> "HistoryRing":
+        ring = cls(capacity)
+        for entry in entries[-capacity:]:
+            ring.append(str(entry.get("role", ROLE_USER)), str(entry.get("text", "")))
+        return ring
+
+
+class ChatSession:
+    """State of one conversation.
+
+    Built complete by ``new`` or, for stored records, by ``from_record``,
+    which fills in anything an older record lacks; readers can rely on every
+    attribute being present. ``to_record`` gives the JSON-ready form.
+    """
+
+    __slots__ = (
+        "data",
+        "history",
+        "history_summary",
+        "last_bot_action",
+        "awaiting_field",
+        "complaint_data_prepared",
+        "warned_missing_key",
+        "late_analysis",
+    )
+
+    def __init__(
+        self,
+        data: Optional[ComplaintData] = None,
+        history: Optional[HistoryRing] = None,
+        history_summary: Optional[Dict[str, Any]] = None,
+        last_bot_action: str = "gather_info",
+        awaiting_field: Optional[str] = None,
+        complaint_data_prepared: Optional[Dict[str, Any]] = None,
+        warned_missing_key: bool = False,
+        late_analysis: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.data = data if data is not None else ComplaintData()
+        self.history = history if history is not None else HistoryRing()
+        self.history_summary = history_summary
+        self.last_bot_action = last_bot_action
+        self.awaiting_field = awaiting_field
+        self.complaint_data_prepared = complaint_data_prepared
+        self.warned_missing_key = warned_missing_key
+        self.late_analysis = late_analysis
+
+    @classmethod
+    def new(cls, welcome: str) -> "ChatSession":
+        session = cls()
+        session.history.append(ROLE_BOT, welcome)
+        return session
+
+    @classmethod
+    def from_record(cls, record: Mapping[str, Any]) -> "ChatSession":
+        data = record.get("data")
+        history = record.get("conversation_history")
+        return cls(
+            data=ComplaintData.from_mapping(data if isinstance(data, Mapping) else {}),
+            history=HistoryRing.from_list(history if isinstance(history, list) else []),
+            history_summary=record.get("history_summary"),
+            last_bot_action=_intern(record.get("last_bot_action")) or "gather_info",
+            awaiting_field=_intern(record.get("awaiting_field")),
+            complaint_data_prepared=record.get("complaint_data_prepared"),
+            warned_missing_key=bool(record.get("warned_missing_key", False)),
+            late_analysis=record.get("late_analysis"),
+        )
+
+    def to_record(self) -> Dict[str, Any]:
+        record = {
+            "data": self.data.to_dict(),
+            "conversation_history": self.history.to_list(),
+            "history_summary": self.history_summary,
+            "last_bot_action": self.last_bot_action,
+            "awaiting_field": self.awaiting_field,
+            "complaint_data_prepared": self.complaint_data_prepared,
+            "warned_missing_key": self.warned_missing_key,
+        }
+        if self.late_analysis is not None:
+            record["late_analysis"] = self.late_analysis
+        return record
@@ -0,0 +1,398 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from session_store import InMemorySessionStore, Session, decode_session, encode_session
+
+
+logger = logging.getLogger(__name__)
+
+# Snapshot file: header, then records, then an index of fixed-size entries
+# sorted by key hash, so a lookup is a binary search in the mapped file.
+_SNAPSHOT_MAGIC = b"GRSNAP1\n"
+_SNAPSHOT_HEADER = struct.Struct("<8sQQ")  # magic, record count, index offset
+_INDEX_ENTRY = struct.Struct("<QQI")  # key hash, record offset, record length
+_RECORD_HEAD = struct.Struct("<dH")  # last write (unix time), session id length
+
+# Change log: one frame per change, each checksummed so a torn tail is detected.
+_LOG_FRAME = struct.Struct("<II")  # crc32 of body, body length
+_LOG_BODY_HEAD = struct.Struct("<BdH")  # operation, write time, session id length
+_PUT = 1
+_DELETE = 2
+
+# (last write time, encoded session); None records a deletion
+Record = Optional[Tuple[float, bytes]]
+
+
+def _key_hash(session_id: str) -> int:
+    digest = hashlib.blake2b(session_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _log_frame(operation: int, session_id: str, written_at: float, payload: bytes = b"") -> bytes:
+    encoded = session_id.encode("utf-8")
+    body = _LOG_BODY_HEAD.pack(operation, written_at, len(encoded)) + encoded + payload
+    return _LOG_FRAME.pack(zlib.crc32(body), len(body)) + body
+
+
+def _replay_log(path: str) -> Tuple[Dict[str, Record], int]:
+    """The latest record per session in the change log, and the log's valid length.
+
+    Reading stops at the first incomplete or corrupt frame (a write cut off by
+    a crash); that tail is truncated so new frames follow valid ones.
+    """
+    records: Dict[str, Record] = {}
+    if not os.path.exists(path):
+        return records, 0
+    with open(path, "rb") as handle:
+        data = handle.read()
+
+    position = 0
+    while position + _LOG_FRAME.size <= len(data):
+        checksum, length = _LOG_FRAME.unpack_from(data, position)
+        start = position + _LOG_FRAME.size
+        body = data[start : start + length]
+        if len(body) < length or zlib.crc32(body) != checksum:
+            break
+        operation, written_at, id_length = _LOG_BODY_HEAD.unpack_from(body)
+        id_end = _LOG_BODY_HEAD.size + id_length
+        session_id = body[_LOG_BODY_HEAD.size : id_end].decode("utf-8")
+        records[session_id] = (written_at, body[id_end:]) if operation == _PUT else None
+        position = start + length
+
+    if position < len(data):
+        logger.warning("Discarding %s bytes of incomplete session log %s", len(data) - position, path)
+        with open(path, "r+b") as handle:
+            handle.truncate(position)
+    return records, position
+
+
+def _fsync_directory(path: str) -> None:
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+class _Snapshot:
+    """Read-only view of a snapshot file through ``mmap``.
+
+    Opening reads only the header, so it takes the same time for any number
+    of sessions; records are found by binary search over the index and
+    decoded by the caller when needed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.count = 0
+        self._index_offset = 0
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        if not os.path.exists(path) or os.path.getsize(path) < _SNAPSHOT_HEADER.size:
+            return
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, index_offset = _SNAPSHOT_HEADER.unpack_from(self._map, 0)
+        if magic != _SNAPSHOT_MAGIC or index_offset + count * _INDEX_ENTRY.size > len(self._map):
+            logger.warning("Ignoring unreadable session snapshot %s", path)
+            self.close()
+            return
+        self.count = count
+        self._index_offset = index_offset
+
+    def _entry(self, position: int) -> Tuple[int, int, int]:
+        return _INDEX_ENTRY.unpack_from(self._map, self._index_offset + position * _INDEX_ENTRY.size)
+
+    def _record(self, offset: int, length: int) -> Tuple[str, float, bytes]:
+        written_at, id_length = _RECORD_HEAD.unpack_from(self._map, offset)
+        start = offset + _RECORD_HEAD.size
+        session_id = self._map[start : start + id_length].decode("utf-8")
+        return session_id, written_at, self._map[start + id_length : offset + length]
+
+    def find(self, session_id: str) -> Record:
+        if not self.count:
+            return None
+        target = _key_hash(session_id)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+        while low < self.count:
+            key, offset, length = self._entry(low)
+            if key != target:
+                break
+            found_id, written_at, payload = self._record(offset, length)
+            if found_id == session_id:
+                return written_at, payload
+            low += 1
+        return None
+
+    def records(self) -> Iterator[Tuple[str, float, bytes]]:
+        for position in range(self.count):
+            _, offset, length = self._entry(position)
+            yield self._record(offset, length)
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.count = 0
+
+
+def _write_snapshot(path: str, records: Iterator[Tuple[str, float, bytes]]) -> int:
+    """Write records to a new snapshot file and atomically replace ``path`` with it."""
+    temporary = f"{path}.tmp"
+    index = []
+    with open(temporary, "wb") as handle:
+        handle.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, 0, 0))
+        offset = _SNAPSHOT_HEADER.size
+        for session_id, written_at, payload in records:
+            encoded = session_id.encode("utf-8")
+            record = _RECORD_HEAD.pack(written_at, len(encoded)) + encoded + payload
+            handle.write(record)
+            index.append((_key_hash(session_id), offset, len(record)))
+            offset += len(record)
+        index.sort()
+        handle.write(b"".join(_INDEX_ENTRY.pack(*entry) for entry in index))
+        handle.seek(0)
+        handle.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, len(index), offset))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+    _fsync_directory(os.path.dirname(os.path.abspath(path)))
+    return len(index)
+
+
+class SnapshotSessionStore(InMemorySessionStore):
+    """In-memory store whose sessions survive restarts and crashes.
+
+    Changes are recorded in an append-only change log; once the log reaches
+    ``snapshot_log_bytes`` it is folded into a compact snapshot file and
+    started afresh. Both live in ``directory``.
+
+    ``put`` and ``delete`` only mark the session in a pending set. A writer
+    thread encodes pending sessions and appends them to the log in one write
+    every ``flush_interval`` seconds (fsynced unless ``fsync`` is off), so a
+    crash loses at most that much and requests never wait on the disk.
+
+    On startup the snapshot is memory-mapped and the (short) log replayed;
+    a stored session is decoded and moved into memory only when it is first
+    asked for, so startup time does not grow with the number of sessions.
+    Sessions evicted from memory by ``max_sessions`` stay stored and are
+    loaded again when asked for; stored sessions idle for longer than
+    ``ttl_seconds`` are not loaded and are dropped at the next snapshot.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl_seconds: float = 1800.0,
+        max_sessions: int = 10000,
+        flush_interval: float = 1.0,
+        snapshot_log_bytes: int = 16 * 1024 * 1024,
+        fsync: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(ttl_seconds=ttl_seconds, max_sessions=max_sessions, clock=clock)
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.snapshot_log_bytes = snapshot_log_bytes
+        self.fsync = fsync
+        self._wall_clock = wall_clock
+        os.makedirs(directory, exist_ok=True)
+        self.snapshot_path = os.path.join(directory, "sessions.snapshot")
+        self.log_path = os.path.join(directory, "sessions.log")
+
+        # guards _pending, _stored and _snapshot between the event loop and the writer
+        self._state_lock = threading.Lock()
+        # serializes log writes and snapshots
+        self._write_lock = threading.Lock()
+        self._snapshot = _Snapshot(self.snapshot_path)
+        # records newer than the snapshot: replayed from the log, written since, or deletions
+        self._stored, self.log_bytes = _replay_log(self.log_path)
+        self._log = open(self.log_path, "ab")
+        # session id -> session to write, or None for a deletion
+        self._pending: Dict[str, Optional[Session]] = {}
+
+        self.lazy_loads = 0
+        self.flushes = 0
+        self.records_written = 0
+        self.snapshots = 0
+        self.last_flush_seconds = 0.0
+        self.last_snapshot_seconds = 0.0
+        logger.info(
+            "Session snapshot has %s sessions; %s changes replayed from the log",
+            self._snapshot.count,
+            len(self._stored),
+        )
+
+        self._stopping = threading.Event()
+        self._writer = threading.Thread(target=self._write_forever, name="session-writer", daemon=True)
+        self._writer.start()
+
+    def get(self, session_id: str) -> Optional[Session]:
+        session = super().get(session_id)
+        if session is not None:
+            return session
+
+        with self._state_lock:
+            if session_id in self._pending:
+                # evicted from memory before its last change was written
+                session = self._pending[session_id]
+                record = None
+            elif session_id in self._stored:
+                record = self._stored[session_id]
+            else:
+                record = self._snapshot.find(session_id)
+        if session is None:
+            if record is None:
+                return None
+            written_at, payload = record
+            if self._expired(written_at, self._wall_clock()):
+                return None
+            session = decode_session(payload)
+            self.lazy_loads += 1
+        # already stored (or about to be) as it is, so not marked for writing
+        super().put(session_id, session)
+        return session
+
+    def put(self, session_id: str, session: Session) -> None:
+        super().put(session_id, session)
+        with self._state_lock:
+            self._pending[session_id] = session
+
+    def delete(self, session_id: str) -> None:
+        super().delete(session_id)
+        self._forget(session_id)
+
+    def _on_expired(self, session_id: str) -> None:
+        self._forget(session_id)
+
+    def _forget(self, session_id: str) -> None:
+        with self._state_lock:
+            self._pending[session_id] = None
+            # hide the stored copy right away, before the deletion is written
+            self._stored[session_id] = None
+
+    def _write_forever(self) -> None:
+        while not self._stopping.wait(self.flush_interval):
+            try:
+                self.flush()
+                if self.log_bytes >= self.snapshot_log_bytes:
+                    self.snapshot()
+            except Exception:
+                logger.exception("Writing sessions to %s failed", self.directory)
+
+    def flush(self) -> int:
+        """Append pending changes to the log; returns how many were written."""
+        with self._write_lock:
+            with self._state_lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            started = time.perf_counter()
+            written_at = self._wall_clock()
+            frames = []
+            records: Dict[str, Record] = {}
+            for session_id, session in pending.items():
+                if session is None:
+                    frames.append(_log_frame(_DELETE, session_id, written_at))
+                    records[session_id] = None
+                else:
+                    payload = encode_session(session)
+                    frames.append(_log_frame(_PUT, session_id, written_at, payload))
+                    records[session_id] = (written_at, payload)
+            data = b"".join(frames)
+            self._log.write(data)
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+
+            with self._state_lock:
+                for session_id, record in records.items():
+                    # a change made meanwhile is still pending and wins
+                    if session_id not in self._pending:
+                        self._stored[session_id] = record
+            self.log_bytes += len(data)
+            self.flushes += 1
+            self.records_written += len(records)
+            self.last_flush_seconds = time.perf_counter() - started
+            return len(records)
+
+    def snapshot(self) -> int:
+        """Fold the log into a new snapshot and start an empty log; returns the sessions kept."""
+        self.flush()
+        with self._write_lock:
+            started = time.perf_counter()
+            with self._state_lock:
+                stored = dict(self._stored)
+                previous = self._snapshot
+            now = self._wall_clock()
+
+            def live_records() -> Iterator[Tuple[str, float, bytes]]:
+                for session_id, written_at, payload in previous.records():
+                    if session_id not in stored and not self._expired(written_at, now):
+                        yield session_id, written_at, bytes(payload)
+                for session_id, record in stored.items():
+                    if record is not None and not self._expired(record[0], now):
+                        yield session_id, record[0], record[1]
+
+            kept = _write_snapshot(self.snapshot_path, live_records())
+            current = _Snapshot(self.snapshot_path)
+            with self._state_lock:
+                self._snapshot = current
+                for session_id, record in stored.items():
+                    if self._stored.get(session_id, False) is record:
+                        del self._stored[session_id]
+            previous.close()
+            # every logged change is in the snapshot now
+            self._log.close()
+            self._log = open(self.log_path, "wb")
+            self.log_bytes = 0
+            self.snapshots += 1
+            self.last_snapshot_seconds = time.perf_counter() - started
+            return kept
+
+    def close(self) -> None:
+        self._stopping.set()
+        self._writer.join()
+        self.flush()
+        with self._write_lock:
+            self._log.close()
+            with self._state_lock:
+                self._snapshot.close()
+
+    def stats(self) -> Dict[str, int]:
+        stats = super().stats()
+        with self._state_lock:
+            stats["pending_writes"] = len(self._pending)
+            stats["snapshot_sessions"] = self._snapshot.count
+        stats.update(
+            {
+                "lazy_loads": self.lazy_loads,
+                "log_bytes": self.log_bytes,
+                "flushes": self.flushes,
+                "records_written": self.records_written,
+                "snapshots": self.snapshots,
+            }
+        )
+        return stats
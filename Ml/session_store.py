@@ -0,0 +1,330 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from session_model import ChatSession
+
+
+Session = ChatSession
+
+_RAW_PREFIX = b"j"
+_ZLIB_PREFIX = b"z"
+_COMPRESS_MIN_BYTES = 256
+
+
+def encode_session(session: Session) -> bytes:
+    """Serialize a session record as compact JSON, zlib-compressed when large."""
+    raw = json.dumps(session.to_record(), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(raw) >= _COMPRESS_MIN_BYTES:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            return _ZLIB_PREFIX + packed
+    return _RAW_PREFIX + raw
+
+
+def decode_session(payload: bytes) -> Session:
+    payload = bytes(payload)
+    prefix, body = payload[:1], payload[1:]
+    if prefix == _ZLIB_PREFIX:
+        body = zlib.decompress(body)
+    elif prefix != _RAW_PREFIX:
+        raise ValueError("Unknown session encoding")
+    return ChatSession.from_record(json.loads(body.decode("utf-8")))
+
+
+class SessionStore:
+    """Interface for chatbot session storage.
+
+    Implementations own expiry and eviction; callers only get, put and delete
+    whole session records by id. ``blocking`` stores may wait on disk or on
+    other processes, so async callers should not call them on the event loop.
+    """
+
+    blocking = False
+
+    def get(self, session_id: str) -> Optional[Session]:
+        raise NotImplementedError
+
+    def put(self, session_id: str, session: Session) -> None:
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def approx_bytes(self) -> int:
+        """Approximate storage taken by session records (encoded size)."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release resources; called once at shutdown."""
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __len__(self) -> int:
+        return self.stats()["live_sessions"]
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store with idle-TTL expiry and LRU eviction.
+
+    Entries are kept in access order, so the least recently used session is
+    always at the front: eviction pops from the front and the expiry sweep stops
+    at the first session that is still fresh.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 1800.0,
+        max_sessions: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[Session, float]]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, last_access: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - last_access > self.ttl_seconds
+
+    def get(self, session_id: str) -> Optional[Session]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+
+        session, last_access = entry
+        now = self._clock()
+        if self._expired(last_access, now):
+            del self._entries[session_id]
+            self.expirations += 1
+            self._on_expired(session_id)
+            return None
+
+        self._entries[session_id] = (session, now)
+        self._entries.move_to_end(session_id)
+        return session
+
+    def put(self, session_id: str, session: Session) -> None:
+        self._entries[session_id] = (session, self._clock())
+        self._entries.move_to_end(session_id)
+        while self.max_sessions > 0 and len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, session_id: str) -> None:
+        self._entries.pop(session_id, None)
+
+    def _on_expired(self, session_id: str) -> None:
+        """Hook for subclasses: ``session_id`` was idle past the TTL and is gone."""
+
+    def purge_expired(self) -> int:
+        now = self._clock()
+        purged = 0
+        while self._entries:
+            session_id, (_, last_access) = next(iter(self._entries.items()))
+            if not self._expired(last_access, now):
+                break
+            del self._entries[session_id]
+            purged += 1
+            self._on_expired(session_id)
+        self.expirations += purged
+        return purged
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "live_sessions": len(self._entries),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def approx_bytes(self, sample: int = 64) -> int:
+        """Encoded size of the most recently used ``sample`` sessions, scaled to all of them."""
+        count = len(self._entries)
+        if not count:
+            return 0
+        sampled = 0
+        total = 0
+        for session, _ in reversed(self._entries.values()):
+            total += len(encode_session(session))
+            sampled += 1
+            if sampled >= sample:
+                break
+        return total * count // sampled
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteSessionStore(SessionStore):
+    """Store shared by every worker process through one SQLite file in WAL mode.
+
+    Records are copied in and out, so callers must ``put`` a session back after
+    changing it. The session cap is enforced every ``cap_check_interval`` writes
+    and on each expiry sweep rather than on every write, which keeps ``put`` a
+    single upsert.
+
+    Calls wait up to ``busy_timeout`` seconds for another process's write,
+    so they are ``blocking``. The connection lock is held only for the SQL
+    statements; encoding and decoding happen outside it.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 1800.0,
+        max_sessions: int = 10000,
+        clock: Callable[[], float] = time.time,
+        cap_check_interval: int = 256,
+        busy_timeout: float = 5.0,
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.cap_check_interval = cap_check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._puts_since_cap_check = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._conn = sqlite3.connect(
+            path, timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, payload BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access)"
+        )
+
+    def _expired(self, last_access: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - last_access > self.ttl_seconds
+
+    def get(self, session_id: str) -> Optional[Session]:
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, last_access FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            payload, last_access = row
+            if self._expired(last_access, now):
+                self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                self.expirations += 1
+                return None
+            self._conn.execute(
+                "UPDATE sessions SET last_access = ? WHERE session_id = ?", (now, session_id)
+            )
+        return decode_session(payload)
+
+    def put(self, session_id: str, session: Session) -> None:
+        payload = encode_session(session)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, payload, last_access) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET "
+                "payload = excluded.payload, last_access = excluded.last_access",
+                (session_id, payload, self._clock()),
+            )
+            self._puts_since_cap_check += 1
+            if self._puts_since_cap_check >= self.cap_check_interval:
+                self._enforce_cap()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def _enforce_cap(self) -> None:
+        self._puts_since_cap_check = 0
+        if self.max_sessions <= 0:
+            return
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        overflow = count - self.max_sessions
+        if overflow > 0:
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE session_id IN ("
+                "SELECT session_id FROM sessions ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += max(cursor.rowcount, 0)
+
+    def purge_expired(self) -> int:
+        if self.ttl_seconds <= 0:
+            return 0
+        cutoff = self._clock() - self.ttl_seconds
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE last_access < ?", (cutoff,))
+            purged = max(cursor.rowcount, 0)
+            self.expirations += purged
+            self._enforce_cap()
+        return purged
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        return {
+            "live_sessions": count,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def approx_bytes(self) -> int:
+        with self._lock:
+            (pages,) = self._conn.execute("PRAGMA page_count").fetchone()
+            (page_size,) = self._conn.execute("PRAGMA page_size").fetchone()
+        return pages * page_size
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_session_store(
+    backend: str,
+    ttl_seconds: float,
+    max_sessions: int,
+    db_path: str,
+    snapshot_dir: Optional[str] = None,
+    flush_interval: float = 1.0,
+    snapshot_log_bytes: int = 16 * 1024 * 1024,
+    busy_timeout: float = 5.0,
+) -> SessionStore:
+    if backend == "memory":
+        return InMemorySessionStore(ttl_seconds=ttl_seconds, max_sessions=max_sessions)
+    if backend == "sqlite":
+        return SqliteSessionStore(
+            db_path, ttl_seconds=ttl_seconds, max_sessions=max_sessions, busy_timeout=busy_timeout
+        )
+    if backend == "snapshot":
+        # imported here: session_snapshot builds on this module
+        from session_snapshot import SnapshotSessionStore
+
+        if not snapshot_dir:
+            raise ValueError("The snapshot session backend needs a snapshot directory")
+        return SnapshotSessionStore(
+            snapshot_dir,
+            ttl_seconds=ttl_seconds,
+            max_sessions=max_sessions,
+            flush_interval=flush_interval,
+            snapshot_log_bytes=snapshot_log_bytes,
+        )
+    raise ValueError(f"Unknown session backend: {backend}")
@@ -0,0 +1,341 @@
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z]+")
+# words, numbers and the punctuation that ends a phrase
+_TOKEN = re.compile(r"[A-Za-z]+|[0-9]+|[,.;:!?()\n]")
+
+# words that start a place phrase ("near Hanuman mandir"); it runs to the
+# next punctuation or PHRASE_BREAKS word and is left as typed
+PLACE_MARKERS = (
+    "near", "nr", "at", "behind", "opposite", "opp", "beside", "besides", "infront", "front",
+    "nearby", "outside", "across", "along", "around", "towards", "next", "adjacent", "facing",
+)
+PHRASE_BREAKS = (
+    "since", "from", "for", "and", "but", "because", "when", "where", "which", "it", "there",
+    "is", "are", "was", "were", "has", "have",
+)
+
+# suffixes under which an unlisted word still counts as known ("lights",
+# "flooded", "weekly"); the stem may have lost an "e" ("driving") or doubled
+# its last letter ("sitting")
+_SUFFIXES = ("s", "es", "ed", "d", "ing", "ly", "er", "est")
+
+
+def edit_distance(source: str, target: str, limit: int) -> int:
+    """Optimal string alignment distance, or ``limit + 1`` once it exceeds ``limit``.
+
+    Counts insertions, deletions, substitutions and swaps of adjacent letters.
+    """
+    if abs(len(source) - len(target)) > limit:
+        return limit + 1
+    previous_previous: List[int] = []
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        row_min = i
+        source_char = source[i - 1]
+        for j in range(1, len(target) + 1):
+            cost = 0 if source_char == target[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                i > 1
+                and j > 1
+                and source_char == target[j - 2]
+                and source[i - 2] == target[j - 1]
+            ):
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    distance = previous[-1]
+    return distance if distance <= limit else limit + 1
+
+
+def _deletes(word: str, depth: int) -> Set[str]:
+    """``word`` and every string made by deleting up to ``depth`` letters from it."""
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        following: Set[str] = set()
+        for item in frontier:
+            if len(item) <= 1:
+                continue
+            for index in range(len(item)):
+                following.add(item[:index] + item[index + 1 :])
+        following -= found
+        found |= following
+        frontier = following
+    return found
+
+
+class SpellingCorrector:
+    """Edit-distance spelling correction over a fixed vocabulary.
+
+    Uses a symmetric-delete index (as in SymSpell): every vocabulary word is
+    stored under each string obtained by deleting up to ``max_edit_distance``
+    letters from its first ``prefix_length`` letters. An unknown token looks
+    up its own deletes the same way, so candidates come from a handful of
+    dict lookups instead of a scan of the vocabulary; only those candidates
+    get a full distance check.
+
+    ``words`` maps each word to a weight; the closest candidate wins, the
+    heavier one at equal distance. Words lighter than ``min_target_weight``
+    (everyday vocabulary) are only suggested for tokens of at least
+    ``common_min_length`` letters; for shorter tokens such a closest word
+    means "leave it alone". A small everyday list then cannot pull ordinary
+    words towards a civic term that happens to be close, nor "bring" to
+    "being". Tokens shorter than ``min_length``, vocabulary words,
+    ``protected`` words and ``known`` words (all also with a plural, -ed,
+    -ing, -ly or -er ending) are never changed. Protected words are never
+    suggested, and known words only if the vocabulary lists them too: an
+    ordinary English word such as "truck" is kept rather than turned into
+    the nearest civic term.
+    Tokens of up to five letters are corrected by one edit at most and keep
+    their first letter.
+
+    ``correct`` leaves names and addresses as typed: capitalised words, the
+    word after a capitalised one ("Gupta sweets"), words next to a number
+    ("house 221", "5th") and everything in a place phrase, from one of
+    ``place_markers`` to the next punctuation or ``phrase_breaks`` word. ``corrections`` are fixed replacements applied
+    before the index. Per-token results are kept in an LRU cache of
+    ``cache_size`` entries.
+    """
+
+    def __init__(
+        self,
+        words: Mapping[str, float],
+        protected: Iterable[str] = (),
+        corrections: Optional[Mapping[str, str]] = None,
+        max_edit_distance: int = 2,
+        prefix_length: int = 7,
+        min_length: int = 4,
+        min_target_weight: float = 2.0,
+        common_min_length: int = 6,
+        cache_size: int = 8192,
+        place_markers: Iterable[str] = PLACE_MARKERS,
+        phrase_breaks: Iterable[str] = PHRASE_BREAKS,
+        known: Iterable[str] = (),
+    ) -> None:
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self.min_length = min_length
+        self.min_target_weight = min_target_weight
+        self.common_min_length = common_min_length
+        self.protected = frozenset(word.lower() for word in protected)
+        self.known_words = frozenset(word.lower() for word in known)
+        self.place_markers = frozenset(word.lower() for word in place_markers)
+        self.phrase_breaks = frozenset(word.lower() for word in phrase_breaks)
+        self.corrections = {typo.lower(): fixed for typo, fixed in (corrections or {}).items()}
+        self._weights: Dict[str, float] = {}
+        for word, weight in words.items():
+            word = word.lower()
+            if _WORD.fullmatch(word) and weight > self._weights.get(word, 0.0):
+                self._weights[word] = weight
+
+        buckets: Dict[str, List[str]] = {}
+        for word in self._weights:
+            if word in self.protected or len(word) < min_length - max_edit_distance:
+                continue
+            for variant in _deletes(word[:prefix_length], max_edit_distance):
+                buckets.setdefault(variant, []).append(word)
+        self._index: Dict[str, Tuple[str, ...]] = {variant: tuple(found) for variant, found in buckets.items()}
+
+        self._lookup = lru_cache(maxsize=cache_size)(self._lookup_uncached)
+        self.tokens_checked = 0
+        self.tokens_corrected = 0
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def _listed(self, word: str) -> bool:
+        return word in self._weights or word in self.protected or word in self.known_words
+
+    def known(self, token: str) -> bool:
+        if self._listed(token):
+            return True
+        for suffix in _SUFFIXES:
+            if not token.endswith(suffix) or len(token) - len(suffix) < 2:
+                continue
+            stem = token[: -len(suffix)]
+            if self._listed(stem) or self._listed(stem + "e"):
+                return True
+            if stem[-1] == stem[-2] and self._listed(stem[:-1]):
+                return True
+            if suffix in ("es", "ed", "er", "est", "ly") and stem[-1] == "i" and self._listed(stem[:-1] + "y"):
+                return True
+        return False
+
+    def _limit(self, length: int) -> int:
+        if length < self.min_length:
+            return 0
+        return min(self.max_edit_distance, 1 if length <= 5 else 2)
+
+    def _lookup_uncached(self, token: str) -> Optional[str]:
+        fixed = self.corrections.get(token)
+        if fixed is not None:
+            return fixed
+        if self.known(token):
+            return None
+        limit = self._limit(len(token))
+        if not limit:
+            return None
+
+        short = len(token) <= 5
+        best: Optional[str] = None
+        best_key: Tuple[int, float, str] = (limit + 1, 0.0, "")
+        seen: Set[str] = set()
+        for variant in _deletes(token[: self.prefix_length], limit):
+            for word in self._index.get(variant, ()):
+                if word in seen:
+                    continue
+                seen.add(word)
+                if short and word[0] != token[0]:
+                    continue
+                distance = edit_distance(token, word, limit)
+                if distance > limit:
+                    continue
+                key = (distance, -self._weights[word], word)
+                if key < best_key:
+                    best, best_key = word, key
+        if best is not None and -best_key[1] < self.min_target_weight and len(token) < self.common_min_length:
+            return None
+        return best
+
+    def suggest(self, token: str) -> Optional[str]:
+        """The correction for one lower-case token, or None to keep it."""
+        return self._lookup(token)
+
+    def correct(self, text: str) -> str:
+        """``text`` with misspelled words replaced; names and addresses are kept as typed."""
+        tokens = list(_TOKEN.finditer(text))
+        pieces: List[str] = []
+        position = 0
+        in_place = False
+        for index, match in enumerate(tokens):
+            word = match.group(0)
+            if not word[0].isalpha():
+                # punctuation ends a place phrase; numbers do not
+                in_place = in_place and word[0].isdigit()
+                continue
+            lowered = word.lower()
+            if lowered in self.phrase_breaks:
+                in_place = False
+            self.tokens_checked += 1
+            marker = lowered in self.place_markers
+            was_in_place, in_place = in_place, in_place or marker
+            replacement = self._lookup(lowered)
+            # the guards only matter for the few words that would change
+            if (
+                not replacement
+                or was_in_place
+                or marker
+                or word[0].isupper()
+                or self._follows_name(tokens, index)
+                or any(
+                    0 <= neighbour < len(tokens) and tokens[neighbour].group(0)[0].isdigit()
+                    for neighbour in (index - 1, index + 1)
+                )
+            ):
+                continue
+            self.tokens_corrected += 1
+            pieces.append(text[position : match.start()])
+            pieces.append(replacement)
+            position = match.end()
+        pieces.append(text[position:])
+        return "".join(pieces)
+
+    @staticmethod
+    def _follows_name(tokens: List["re.Match[str]"], index: int) -> bool:
+        # a capital at the start of the text or of a sentence does not make a name
+        if index < 2 or not tokens[index - 1].group(0)[0].isupper():
+            return False
+        return tokens[index - 2].group(0) not in (".", "!", "?", "\n")
+
+    def stats(self) -> Dict[str, int]:
+        cache = self._lookup.cache_info()
+        return {
+            "vocabulary": len(self._weights),
+            "known_words": len(self.known_words),
+            "index_keys": len(self._index),
+            "tokens_checked": self.tokens_checked,
+            "tokens_corrected": self.tokens_corrected,
+            "cache_hits": cache.hits,
+            "cache_misses": cache.misses,
+            "cache_size": cache.currsize,
+        }
+
+
+def _phrase_words(phrases: Iterable[str]) -> Iterator[str]:
+    for phrase in phrases:
+        yield from _WORD.findall(phrase.lower())
+
+
+def load_word_list(path: Optional[str]) -> List[str]:
+    """Words from a text file, one per line; ``#`` starts a comment line."""
+    if not path:
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return [line.strip().lower() for line in handle if line.strip() and not line.startswith("#")]
+    except FileNotFoundError:
+        logger.warning("Spelling word list not found: %s", path)
+    except Exception:
+        logger.exception("Failed reading spelling word list: %s", path)
+    return []
+
+
+def load_vocabulary(
+    path: Optional[str],
+    city: Optional[str],
+    extra_terms: Iterable[str] = (),
+) -> Tuple[Dict[str, float], List[str]]:
+    """Word weights and protected words from a JSON vocabulary file.
+
+    The file looks like ``{"terms": [...], "common": [...], "protected":
+    [...], "places": {"common": [...], "cities": {"ghaziabad": [...]}}}``.
+    Civic terms (and ``extra_terms``) weigh 3, place names 2 and common
+    words 1; entries may be phrases. A missing file leaves only
+    ``extra_terms``.
+    """
+    weights: Dict[str, float] = {}
+
+    def add(phrases: Iterable[str], weight: float) -> None:
+        for word in _phrase_words(phrases):
+            if weight > weights.get(word, 0.0):
+                weights[word] = weight
+
+    add(extra_terms, 3.0)
+    if not path or not os.path.exists(path):
+        if path:
+            logger.warning("Spelling vocabulary file not found: %s", path)
+        return weights, []
+
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except Exception:
+        logger.exception("Failed reading spelling vocabulary file: %s", path)
+        return weights, []
+
+    add(payload.get("common", []), 1.0)
+    places = payload.get("places", {})
+    add(places.get("common", []), 2.0)
+    if city:
+        city_places = places.get("cities", {}).get(city.strip().lower())
+        if city_places is None:
+            logger.warning("No place names for city %s in %s", city, path)
+        else:
+            add(city_places, 2.0)
+    add(payload.get("terms", []), 3.0)
+    return weights, list(_phrase_words(payload.get("protected", [])))
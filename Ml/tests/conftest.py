@@ -0,0 +1,6 @@
+import os
+import sys
+
+
+# the app's modules are flat files in Ml/, imported by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
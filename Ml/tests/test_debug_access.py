@@ -0,0 +1,48 @@
+import asyncio
+
+import httpx
+import pytest
+
+import app
+
+
+def call(*requests):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://test") as client:
+            return [await client.request(method, url, **kwargs) for method, url, kwargs in requests]
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def debug_token(monkeypatch):
+    monkeypatch.setattr(app, "DEBUG_TOKEN", "s3cret")
+    monkeypatch.setattr(app.tracer, "_recent", type(app.tracer._recent)(maxlen=10))
+    return "s3cret"
+
+
+def test_traces_hidden_without_a_configured_token(monkeypatch):
+    monkeypatch.setattr(app, "DEBUG_TOKEN", "")
+    (response,) = call(("GET", "/debug/traces", {"headers": {"X-Debug-Token": ""}}))
+    assert response.status_code == 404
+
+
+def test_traces_need_the_token(debug_token):
+    (response,) = call(("GET", "/debug/traces", {"headers": {"X-Debug-Token": "wrong"}}))
+    assert response.status_code == 403
+
+
+def test_trace_header_ignored_without_the_token(debug_token):
+    call(("POST", "/chat", {"json": {"session_id": "victim", "text": "hi"}, "headers": {"X-Chat-Trace": "1"}}))
+    assert app.tracer.recent() == []
+
+
+def test_traces_do_not_carry_the_session_id(debug_token):
+    headers = {"X-Chat-Trace": "1", "X-Debug-Token": debug_token}
+    _, response = call(
+        ("POST", "/chat", {"json": {"session_id": "victim", "text": "hi"}, "headers": headers}),
+        ("GET", "/debug/traces", {"params": {"session_id": "victim"}, "headers": {"X-Debug-Token": debug_token}}),
+    )
+    assert response.status_code == 200
+    assert len(response.json()["traces"]) == 1
+    assert "victim" not in response.text
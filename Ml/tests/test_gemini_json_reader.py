@@ -0,0 +1,53 @@
+import app
+from json_stream import StreamingJsonObjectParser
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+def read(pieces, stop_keys=("assistant_ack", "extracted_data")):
+    reader = app._GeminiJsonReader(lambda path, value: None, stop_keys)
+    for piece in pieces:
+        if reader.feed(Chunk(piece)):
+            break
+    return reader.result()
+
+
+def test_complete_object():
+    assert read(['{"assistant_ack": "ok", ', '"extracted_data": {"address": "sector 5"}}']) == {
+        "assistant_ack": "ok",
+        "extracted_data": {"address": "sector 5"},
+    }
+
+
+def test_stops_once_stop_keys_are_known():
+    pieces = ['{"assistant_ack": "ok", "extracted_data": {"timing": "today"}, ', '"next_question": "Where?"}']
+    assert read(pieces) == {"assistant_ack": "ok", "extracted_data": {"timing": "today"}}
+
+
+def test_truncated_stream_is_unusable():
+    assert read(['{"assistant_ack": "ok", "extracted_data": {"address": "sec']) is None
+
+
+def test_truncated_stream_with_some_members_is_unusable():
+    assert read(['{"assistant_ack": "ok", "next_question": "Where?", ']) is None
+
+
+def test_malformed_stream_is_unusable():
+    assert read(['{"assistant_ack": "ok" "extracted_data": {"address": "sector 5"}}']) is None
+
+
+def test_malformed_member_after_good_ones_is_unusable():
+    assert read(['{"assistant_ack": "ok", next_question: "Where?", "extracted_data": {}}']) is None
+
+
+def test_parser_marks_malformed_and_complete():
+    parser = StreamingJsonObjectParser()
+    parser.feed('{"a": 1 "b": 2}')
+    assert parser.done and parser.malformed and not parser.complete
+
+    parser = StreamingJsonObjectParser()
+    parser.feed('{"a": 1}')
+    assert parser.complete and not parser.malformed
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import app
+
+
+class SlowGenai:
+    """Stands in for google.generativeai; building a model takes ``seconds``."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.built = threading.Event()
+        self.GenerativeModel = self._build
+
+    def configure(self, api_key):
+        pass
+
+    def _build(self, model_name, system_instruction=None):
+        time.sleep(self.seconds)
+        self.built.set()
+        return SimpleNamespace(model_name=model_name, system_instruction=system_instruction)
+
+
+@pytest.fixture
+def slow_genai(monkeypatch):
+    genai = SlowGenai(0.5)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(app, "load_genai", lambda: genai)
+    monkeypatch.setattr(app, "_gemini_models", {})
+    monkeypatch.setattr(app, "_gemini_configured", False)
+    monkeypatch.setattr(app, "_gemini_error", None)
+    app.use_gemini_model_factory(None)
+    yield genai
+    app.llm_executor.shutdown()
+
+
+def test_request_does_not_wait_for_the_model_build(slow_genai):
+    async def run():
+        started = time.perf_counter()
+        response = await app.handle_conversation("model-building", "streetlight broken near sector 5 market")
+        answered = time.perf_counter() - started
+        # the turn scheduled the build on llm_executor; it finishes in the background
+        for _ in range(200):
+            if app.current_gemini_model(app.EXTRACTION_SYSTEM_PROMPT) is not None:
+                break
+            await asyncio.sleep(0.01)
+        return response, answered
+
+    response, answered = asyncio.run(run())
+    app.sessions.delete("model-building")
+    assert answered < slow_genai.seconds
+    assert response.reply
+    assert slow_genai.built.is_set()
+
+
+def test_request_does_not_wait_for_warm_up_holding_the_lock(slow_genai):
+    warming = threading.Thread(target=app.get_gemini_model)
+    warming.start()
+    while not app._gemini_lock.locked():
+        time.sleep(0.001)
+
+    async def run():
+        started = time.perf_counter()
+        await app.handle_conversation("model-warming", "garbage not collected near house 12")
+        return time.perf_counter() - started
+
+    answered = asyncio.run(run())
+    warming.join()
+    app.sessions.delete("model-warming")
+    assert answered < slow_genai.seconds
+    assert app.get_gemini_model() is not None
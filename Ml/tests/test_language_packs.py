@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+import app
+from language_packs import build_language_pack
+
+
+PARTICLE_HI = [
+    "pani hi nahi aa raha hai",
+    "पानी ही नहीं आ रहा है",
+    "nal me paani nahi aata, sirf subah hi aata hai",
+]
+
+
+@pytest.mark.parametrize("text", PARTICLE_HI)
+def test_hindi_particle_hi_is_not_a_greeting(text):
+    assert app.language_packs.get("hi").classify(text) != "greeting"
+
+
+def test_hindi_greetings_still_work():
+    pack = app.language_packs.get("hi")
+    assert pack.classify("namaste") == "greeting"
+    assert pack.classify("hello ji") == "greeting"
+
+
+@pytest.mark.parametrize("text", PARTICLE_HI)
+def test_first_hindi_turn_with_hi_is_taken_as_a_complaint(text):
+    session_id = f"hindi-particle-{PARTICLE_HI.index(text)}"
+    response = asyncio.run(app.handle_conversation(session_id, text, "hi"))
+    app.sessions.delete(session_id)
+    assert response.detected_intent != "greeting"
+    assert response.department == "Water"
+
+
+def test_excluded_base_phrases_are_not_inherited():
+    base = {"intents": {"greeting": ["hi", "hello"]}, "yes_words": ["ok", "hi"]}
+    pack = build_language_pack("xx", {"exclude": ["hi"]}, base, ["Water"])
+    assert pack.classify("hi") == "unknown"
+    assert pack.classify("hello") == "greeting"
+    assert pack.classify("ok") == "confirmation_yes"
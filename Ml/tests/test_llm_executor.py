@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+from llm_executor import BlockingCallExecutor
+
+
+def test_shutdown_takes_cancelled_calls_off_the_queue():
+    executor = BlockingCallExecutor(max_workers=1)
+    release = threading.Event()
+
+    async def run():
+        calls = [asyncio.ensure_future(executor.run(release.wait, 5)) for _ in range(3)]
+        while executor.stats()["busy"] != 1:
+            await asyncio.sleep(0.001)
+        assert executor.stats()["queued"] == 2
+        executor.shutdown()
+        release.set()
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert results[0] is True
+    assert all(isinstance(result, asyncio.CancelledError) for result in results[1:])
+    assert executor.stats()["queued"] == 0
+    assert executor.stats()["busy"] == 0
+
+
+def test_cancelling_a_waiting_call_takes_it_off_the_queue():
+    executor = BlockingCallExecutor(max_workers=1)
+    release = threading.Event()
+
+    async def run():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        waiting = asyncio.ensure_future(executor.run(release.wait, 5))
+        while executor.stats()["busy"] != 1:
+            await asyncio.sleep(0.001)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        queued = executor.stats()["queued"]
+        release.set()
+        await running
+        return queued
+
+    assert asyncio.run(run()) == 0
+    executor.shutdown()
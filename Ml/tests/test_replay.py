@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import replay
+
+
+TOTALS = {"conversations": 2, "turns": 6, "errors": 0, "fields": {}}
+
+
+class FakeResource:
+    RUSAGE_SELF = 0
+    RUSAGE_CHILDREN = -1
+
+    def __init__(self, own, workers):
+        self.usage = {self.RUSAGE_SELF: own, self.RUSAGE_CHILDREN: workers}
+
+    def getrusage(self, who):
+        return SimpleNamespace(ru_maxrss=self.usage[who])
+
+
+def test_report_leaves_out_memory_without_resource(monkeypatch):
+    monkeypatch.setattr(replay, "resource", None)
+    summary = replay.report(TOTALS, 1.0)
+    assert "peak_rss_mib" not in summary
+    assert "peak_worker_rss_mib" not in summary
+    assert summary["turns_per_second"] == 6.0
+
+
+def test_peak_rss_is_kib_on_linux(monkeypatch):
+    monkeypatch.setattr(replay, "resource", FakeResource(200 * 1024, 100 * 1024))
+    monkeypatch.setattr(sys, "platform", "linux")
+    assert replay._peak_rss_mib() == (200.0, 100.0)
+
+
+def test_peak_rss_is_bytes_on_macos(monkeypatch):
+    monkeypatch.setattr(replay, "resource", FakeResource(200 * 1024 * 1024, 100 * 1024 * 1024))
+    monkeypatch.setattr(sys, "platform", "darwin")
+    summary = replay.report(TOTALS, 1.0)
+    assert (summary["peak_rss_mib"], summary["peak_worker_rss_mib"]) == (200.0, 100.0)
+
+
+def test_lines_that_are_not_objects_do_not_abort_the_run(tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text(
+        '["hello", "water leak near house 12"]\n'
+        '{"id": "scripted", "turns": ["hi", {"say": "streetlight broken near sector 5"}]}\n'
+        '"just a string"\n'
+        "not json\n",
+        encoding="utf-8",
+    )
+    done = subprocess.run(
+        [sys.executable, "replay.py", str(corpus), "--workers", "1"],
+        cwd=os.path.dirname(os.path.abspath(replay.__file__)),
+        env=dict(os.environ, GEMINI_API_KEY=""),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert done.returncode == 0, done.stderr
+    lines = [json.loads(line) for line in done.stdout.splitlines()]
+    assert lines[0]["data"]["department"] == "Water"
+    assert len(lines[0]["turns"]) == 2
+    assert "error" not in lines[1] and len(lines[1]["turns"]) == 2
+    assert lines[2] == {"line": 3, "error": "not a conversation: a JSON str"}
+    assert lines[3]["error"].startswith("invalid JSON")
+    summary = json.loads(done.stderr.strip().splitlines()[-1])
+    assert summary["conversations"] == 2
+    assert summary["errors"] == 2
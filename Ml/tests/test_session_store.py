@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+import pytest
+
+import app
+from session_store import SqliteSessionStore
+
+
+class RecordingStore(SqliteSessionStore):
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = set()
+
+    def get(self, session_id):
+        self.threads.add(threading.current_thread())
+        return super().get(session_id)
+
+    def put(self, session_id, session):
+        self.threads.add(threading.current_thread())
+        super().put(session_id, session)
+
+
+@pytest.fixture
+def sqlite_sessions(tmp_path, monkeypatch):
+    store = RecordingStore(str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(app, "sessions", store)
+    yield store
+    app.store_executor.shutdown()
+    store.close()
+
+
+def test_sqlite_store_is_called_off_the_event_loop(sqlite_sessions):
+    async def run():
+        await app.handle_conversation("store-thread", "hi")
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+    assert sqlite_sessions.threads
+    assert loop_thread not in sqlite_sessions.threads
+    assert sqlite_sessions.get("store-thread") is not None
+
+
+def test_restart_replaces_the_stored_session(sqlite_sessions):
+    async def run():
+        await app.handle_conversation("store-restart", "streetlight not working near Gupta sweets")
+        await app.handle_conversation("store-restart", "restart")
+
+    asyncio.run(run())
+    session = sqlite_sessions.get("store-restart")
+    assert [entry.text for entry in session.history][0] == app.WELCOME_MESSAGE
+    assert session.data.get("description") in (None, "")
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+import app
+from benchmarks.fake_gemini import FakeGemini
+
+
+KEPT_AS_TYPED = [
+    "house 221 Shastri nagar near Hanuman mandir, Meerut",
+    "Meerut",
+    "opposite Gupta sweets",
+    "Ramprastha Greens gate 2",
+    "garbage infront of my house",
+    "mandir ke paas, sector 5",
+]
+
+
+@pytest.mark.parametrize("text", KEPT_AS_TYPED)
+def test_place_names_are_not_corrected(text):
+    assert app.correct_spelling(text) == text
+
+
+def test_typos_outside_names_are_still_corrected():
+    assert app.correct_spelling("garbge not picked up near Gupta sweets") == "garbage not picked up near Gupta sweets"
+    assert app.correct_spelling("watter leekage since two days") == "water leakage since two days"
+
+
+def test_rules_keep_the_address_as_typed():
+    address = "house 221 Shastri nagar near Hanuman mandir, Meerut"
+    analysis = app._rules_first_extract({}, "address", address, app.correct_spelling(address))
+    assert analysis["updated_data"]["address"] == address
+
+
+def test_fallback_routes_on_corrected_text_but_keeps_the_description():
+    text = "garbge pile opposite Gupta sweets"
+    analysis = app._fallback_extract({}, text, app.correct_spelling(text))
+    assert analysis["updated_data"]["department"] == "Sanitation"
+    assert analysis["updated_data"]["description"] == text
+
+
+@pytest.fixture
+def fake_gemini():
+    app.use_gemini_model_factory(FakeGemini().model)
+    yield
+    app.use_gemini_model_factory(None)
+
+
+def test_conversation_stores_places_as_typed(fake_gemini):
+    async def run():
+        for text in [
+            "hi",
+            "garbage pile infront of Gupta sweets, it smells a lot",
+            "sanitation",
+            "house 221 Shastri nagar near Hanuman mandir, Meerut",
+        ]:
+            await app.handle_conversation("places-as-typed", text)
+        return app.sessions.get("places-as-typed").data
+
+    data = asyncio.run(run())
+    app.sessions.delete("places-as-typed")
+    assert data["address"] == "house 221 Shastri nagar near Hanuman mandir, Meerut"
+    assert "Gupta sweets" in data["description"]
+
+
+ENGLISH_WORDS = [
+    "truck", "collect", "bright", "sitting", "hanging", "doctor", "killed", "monkey", "driving",
+    "riding", "father", "burnt", "thrown", "wide", "kindly", "weekly",
+]
+
+
+@pytest.mark.parametrize("word", ENGLISH_WORDS)
+def test_english_words_are_not_corrected(word):
+    assert app.correct_spelling(f"the {word} one") == f"the {word} one"
+
+
+@pytest.mark.parametrize(
+    "text, intent",
+    [
+        ("garbage truck has not come to our lane for 3 days", "unknown"),
+        ("please collect garbage", "unknown"),
+        ("cancle this", "cancel"),
+    ],
+)
+def test_intent_is_not_made_up_by_the_corrector(text, intent):
+    assert app.recognize_intent(app.correct_spelling(text)) == intent
+
+
+def test_corrections_never_target_yes_no_or_intent_words():
+    for word in ["correct", "right", "track", "stop", "change", "status", "yes", "no"]:
+        assert word in app.spelling_corrector.protected
+
+
+def test_collect_does_not_confirm_a_complaint(fake_gemini):
+    async def run():
+        for text in [
+            "garbage pile near sector 5 market, it smells a lot",
+            "sanitation",
+            "house 12 raj nagar",
+            "since last week",
+            "it is blocking the road",
+        ]:
+            await app.handle_conversation("collect-not-yes", text)
+        asked = app.sessions.get("collect-not-yes").last_bot_action
+        response = await app.handle_conversation("collect-not-yes", "please collect garbage")
+        return asked, response
+
+    asked, response = asyncio.run(run())
+    app.sessions.delete("collect-not-yes")
+    assert asked == "confirm_info"
+    assert response.detected_intent != "confirmation_yes"
+    assert response.action != "trigger_registration"
+
+
+def test_truck_complaint_is_registered_not_answered_as_status(fake_gemini):
+    async def run():
+        return await app.handle_conversation("truck-complaint", "garbage truck has not come to our lane for 3 days")
+
+    response = asyncio.run(run())
+    app.sessions.delete("truck-complaint")
+    assert response.detected_intent != "status_check"
+    assert response.action == "gather_info"
+    assert "new complaint registration" not in response.reply
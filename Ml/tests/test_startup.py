@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.bench_startup import ML_DIR
+
+# like bench_startup's first-chat run, with a real provider behind the key:
+# warm-up imports it in the background while the first chat is answered
+_COLD_START = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+provider_at_import = "google.generativeai" in sys.modules
+import httpx
+
+
+async def main():
+    async with app.lifespan(app.app):
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://test")
+        response = await client.post("/chat", json={"session_id": "cold", "text": "streetlight broken near sector 5"})
+        response.raise_for_status()
+        chatted = time.perf_counter()
+        models_at_first_chat = len(app._gemini_models)
+        while (await client.get("/ready")).status_code != 200:
+            await asyncio.sleep(0.001)
+        ready = time.perf_counter()
+        await client.aclose()
+    return response.json(), chatted, ready, models_at_first_chat
+
+
+body, chatted, ready, models_at_first_chat = asyncio.run(main())
+print(json.dumps({
+    "provider_at_import": provider_at_import,
+    "reply": body["reply"],
+    "models_at_first_chat": models_at_first_chat,
+    "import_app_ms": (imported - started) * 1000,
+    "first_chat_ms": (chatted - started) * 1000,
+    "ready_ms": (ready - started) * 1000,
+}))
+"""
+
+
+def cold_start(**env):
+    done = subprocess.run(
+        [sys.executable, "-c", _COLD_START],
+        cwd=ML_DIR,
+        env=dict(os.environ, SESSION_BACKEND="memory", GEMINI_WARM_CONNECTION="0", LOG_LEVEL="ERROR", **env),
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=120,
+    )
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+def test_app_import_leaves_the_provider_unimported():
+    result = cold_start(GEMINI_API_KEY="")
+    assert result["provider_at_import"] is False
+    assert result["reply"]
+    assert result["import_app_ms"] < result["first_chat_ms"]
+
+
+def test_first_chat_does_not_wait_for_warm_up():
+    pytest.importorskip("google.generativeai")
+    # a key makes warm-up import the provider and build every model; the
+    # first chat is answered locally meanwhile
+    result = cold_start(GEMINI_API_KEY="test-key", GEMINI_CONTEXT_CACHE="0")
+    assert result["provider_at_import"] is False
+    assert result["reply"]
+    # answered before warm-up had built a single model, so it did not wait on the build
+    assert result["models_at_first_chat"] == 0
+    assert result["first_chat_ms"] < result["ready_ms"]
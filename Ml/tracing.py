@@ -0,0 +1,323 @@
+import cProfile
+import io
+import itertools
+import logging
+import pstats
+import random
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+_active_span: ContextVar[Optional["Span"]] = ContextVar("active_span", default=None)
+
+
+class Span:
+    """One timed step of a traced turn; times are ``time.perf_counter`` values."""
+
+    __slots__ = ("name", "start", "end", "attributes", "children")
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None, start: Optional[float] = None) -> None:
+        self.name = name
+        self.start = time.perf_counter() if start is None else start
+        self.end: Optional[float] = None
+        self.attributes = attributes or {}
+        self.children: List["Span"] = []
+
+    @property
+    def duration(self) -> float:
+        return (time.perf_counter() if self.end is None else self.end) - self.start
+
+    def walk(self, depth: int = 0) -> Iterable[Tuple["Span", int]]:
+        yield self, depth
+        for child in list(self.children):
+            yield from child.walk(depth + 1)
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        item: Dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+        if self.end is None:
+            # still running, e.g. an LLM call left behind by a hedged turn
+            item["unfinished"] = True
+        if self.attributes:
+            item["attributes"] = self.attributes
+        if self.children:
+            item["children"] = [child.to_dict(origin) for child in list(self.children)]
+        return item
+
+
+class _NoSpan:
+    """Returned by ``span`` when the current turn is not traced."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _SpanScope:
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Span) -> None:
+        self.span = span
+        self.token: Optional[Token] = None
+
+    def __enter__(self) -> Span:
+        self.token = _active_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.span.end = time.perf_counter()
+        if exc_type is not None:
+            self.span.attributes["error"] = exc_type.__name__
+        _active_span.reset(self.token)
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """Time a block as a child of the active span; a no-op outside a traced turn.
+
+    Tasks created inside the block inherit it through the context, so
+    concurrent work started by a stage shows up under that stage.
+    """
+    parent = _active_span.get()
+    if parent is None:
+        return _NO_SPAN
+    child = Span(name, attributes)
+    parent.children.append(child)
+    return _SpanScope(child)
+
+
+def add_span(name: str, start: float, end: float, **attributes: Any) -> None:
+    """Record an already measured step under the active span."""
+    parent = _active_span.get()
+    if parent is not None:
+        child = Span(name, attributes, start)
+        child.end = end
+        parent.children.append(child)
+
+
+def annotate(**attributes: Any) -> None:
+    """Attach attributes to the active span, if any."""
+    current = _active_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+class Trace:
+    __slots__ = ("trace_id", "root", "started_at", "reason", "profile")
+
+    def __init__(self, trace_id: str, root: Span, started_at: float) -> None:
+        self.trace_id = trace_id
+        self.root = root
+        self.started_at = started_at
+        self.reason = ""
+        self.profile: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration
+
+    def to_dict(self) -> Dict[str, Any]:
+        item = {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "reason": self.reason,
+            "root": self.root.to_dict(self.root.start),
+        }
+        if self.profile is not None:
+            item["profile"] = self.profile
+        return item
+
+
+def chrome_trace(traces: Iterable[Trace]) -> Dict[str, Any]:
+    """Traces in the Chrome trace-event format (chrome://tracing, Perfetto, speedscope).
+
+    Each trace becomes its own track; spans are complete ("X") events in
+    microseconds of wall-clock time.
+    """
+    events: List[Dict[str, Any]] = []
+    for track, trace in enumerate(traces, start=1):
+        origin_us = trace.started_at * 1e6
+        events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": track,
+                "args": {"name": f"{trace.root.name} {trace.trace_id} ({trace.duration * 1000:.0f} ms)"},
+            }
+        )
+        for item, _ in trace.root.walk():
+            events.append(
+                {
+                    "name": item.name,
+                    "cat": "chat",
+                    "ph": "X",
+                    "ts": round(origin_us + (item.start - trace.root.start) * 1e6, 3),
+                    "dur": round(item.duration * 1e6, 3),
+                    "pid": 1,
+                    "tid": track,
+                    "args": dict(item.attributes),
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+class _TraceScope:
+    __slots__ = ("tracer", "name", "attributes", "force", "profile", "trace", "token", "profiler", "nested")
+
+    def __init__(self, tracer: "Tracer", name: str, force: bool, profile: bool, attributes: Dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.force = force
+        self.profile = profile
+        self.trace: Optional[Trace] = None
+        self.token: Optional[Token] = None
+        self.profiler: Optional[cProfile.Profile] = None
+        self.nested: Any = None
+
+    def __enter__(self) -> Optional[Span]:
+        tracer = self.tracer
+        if _active_span.get() is not None:
+            # already inside a traced turn: just a nested span
+            self.nested = span(self.name, **self.attributes)
+            return self.nested.__enter__()
+
+        profile = self.profile or tracer._chance(tracer.profile_sample_rate)
+        sampled = self.force or profile or tracer._chance(tracer.sample_rate)
+        if not (sampled or tracer.slow_seconds > 0):
+            return None
+
+        root = Span(self.name, self.attributes)
+        self.trace = Trace(f"{next(tracer._ids):x}", root, time.time())
+        self.trace.reason = "forced" if self.force or self.profile else ("sampled" if sampled else "")
+        self.token = _active_span.set(root)
+        tracer.traces_started += 1
+        if profile:
+            self.profiler = tracer._start_profiler()
+        return root
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if self.nested is not None:
+            self.nested.__exit__(exc_type, exc, tb)
+            return
+        trace = self.trace
+        if trace is None:
+            return
+        trace.root.end = time.perf_counter()
+        if exc_type is not None:
+            trace.root.attributes["error"] = exc_type.__name__
+        _active_span.reset(self.token)
+        if self.profiler is not None:
+            trace.profile = self.tracer._stop_profiler(self.profiler)
+        self.tracer._finish(trace)
+
+
+class Tracer:
+    """Opt-in span trees for chat turns, with the slowest recent ones kept.
+
+    A turn is traced when the caller forces it (a request header), when it
+    is sampled with ``sample_rate``, or - while ``slow_seconds`` is set - always,
+    keeping the tree only if the turn took at least ``slow_seconds``. Forced
+    turns may also run under ``cProfile``; ``profile_sample_rate`` profiles a
+    share of turns unasked. The profiler sees everything the event loop runs
+    meanwhile, so only one turn is profiled at a time.
+
+    The last ``keep`` captured traces are retained; ``slowest`` returns them
+    by duration.
+    """
+
+    def __init__(
+        self,
+        slow_seconds: float = 0.0,
+        sample_rate: float = 0.0,
+        profile_sample_rate: float = 0.0,
+        keep: int = 100,
+        profile_lines: int = 40,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.slow_seconds = slow_seconds
+        self.sample_rate = sample_rate
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_lines = profile_lines
+        self._recent: Deque[Trace] = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+        self._random = random.Random(seed)
+        self._profiling = False
+        self.traces_started = 0
+        self.traces_kept = 0
+        self.slow_traces = 0
+        self.profiles = 0
+        self.profiles_skipped = 0
+
+    def trace(self, name: str, force: bool = False, profile: bool = False, **attributes: Any) -> _TraceScope:
+        return _TraceScope(self, name, force, profile, attributes)
+
+    def _chance(self, rate: float) -> bool:
+        return rate > 0 and self._random.random() < rate
+
+    def _start_profiler(self) -> Optional[cProfile.Profile]:
+        if self._profiling:
+            self.profiles_skipped += 1
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # another profiler is already attached to this thread
+            self.profiles_skipped += 1
+            return None
+        self._profiling = True
+        return profiler
+
+    def _stop_profiler(self, profiler: cProfile.Profile) -> str:
+        profiler.disable()
+        self._profiling = False
+        self.profiles += 1
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(self.profile_lines)
+        return out.getvalue()
+
+    def _finish(self, trace: Trace) -> None:
+        duration = trace.duration
+        slow = self.slow_seconds > 0 and duration >= self.slow_seconds
+        if slow:
+            self.slow_traces += 1
+            trace.reason = trace.reason or "slow"
+            logger.warning("Slow %s: %.0f ms (trace %s)", trace.root.name, duration * 1000, trace.trace_id)
+        if trace.reason:
+            self._recent.append(trace)
+            self.traces_kept += 1
+
+    def recent(self) -> List[Trace]:
+        return list(self._recent)
+
+    def slowest(self, limit: int = 10) -> List[Trace]:
+        return sorted(self._recent, key=lambda trace: trace.duration, reverse=True)[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slow_seconds": self.slow_seconds,
+            "sample_rate": self.sample_rate,
+            "profile_sample_rate": self.profile_sample_rate,
+            "retained": len(self._recent),
+            "traces_started": self.traces_started,
+            "traces_kept": self.traces_kept,
+            "slow_traces": self.slow_traces,
+            "profiles": self.profiles,
+            "profiles_skipped": self.profiles_skipped,
+        }
@@ -0,0 +1,65 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class StartupWarmup:
+    """Runs startup steps once, in order, and reports readiness.
+
+    Each step is a named callable; its duration and outcome are kept for
+    ``stats``. A failing step is logged and recorded but does not stop the
+    others: the service can still answer from its local fallbacks. The
+    service counts as ready once every step has run.
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], Any]]]) -> None:
+        self.steps = steps
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def run(self) -> None:
+        """Run every step; blocking, so call it from a worker thread."""
+        with self._lock:
+            if self.started_at is not None:
+                return
+            self.started_at = time.perf_counter()
+        for name, step in self.steps:
+            started = time.perf_counter()
+            try:
+                detail = step()
+                result: Dict[str, Any] = {"ok": True}
+                if detail is not None:
+                    result["detail"] = detail
+            except Exception as exc:
+                logger.warning("Startup step %s failed: %s", name, exc)
+                result = {"ok": False, "error": str(exc) or type(exc).__name__}
+            result["seconds"] = round(time.perf_counter() - started, 4)
+            self.results[name] = result
+        self.finished_at = time.perf_counter()
+        self._done.set()
+        logger.info("Startup warm-up finished in %.2fs", self.finished_at - self.started_at)
+
+    def skip(self) -> None:
+        """Mark the service ready without running the steps."""
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        seconds = None
+        if self.started_at is not None:
+            end = self.finished_at if self.finished_at is not None else time.perf_counter()
+            seconds = round(end - self.started_at, 4)
+        return {"ready": self.ready, "seconds": seconds, "steps": dict(self.results)}